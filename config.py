@@ -81,6 +81,35 @@ config = {
             'use_openvino': True,
         }
     },
+    'yolo': {
+        'model': 'echo.onnx',  # echo_int8.onnx from tools/quantize_echo_model.py for low core count cpus
+        'preload': True,  # load and warm up the echo model in the background at start
+        'async': False,  # run echo detection on a background worker, walking loops steer on the latest result
+        'track': False,  # track echoes between detections while walking, inference runs every few frames
+        'batch_scan': False,  # capture all camera turns first and detect them in one batch inference
+        'cache_threshold': 0.2,  # detections of the same frame are cached at this threshold, 0 to disable
+        'inference': {  # runtime settings, cap these to keep the game frame rate stable, 0 = runtime default
+            'intra_op_threads': 0,  # onnxruntime threads inside one operator
+            'inter_op_threads': 0,  # onnxruntime threads across operators, parallel execution mode only
+            'graph_optimization': 'all',  # onnxruntime: disable, basic, extended, all
+            'execution_mode': 'sequential',  # onnxruntime: sequential, parallel (cpu only)
+            'io_binding': True,  # onnxruntime: write outputs into preallocated buffers
+            'openvino_hint': 'LATENCY',  # LATENCY, THROUGHPUT
+            'openvino_streams': 0,
+            'openvino_threads': 0,
+        },
+        'profile': 'full-640',  # default detection profile
+        'profiles': {  # input size and optional roi (x, y, to_x, to_y relative to the frame)
+            'full-640': {'size': 640},
+            'front-roi-416': {'size': 416, 'roi': (0.25, 0.2, 0.75, 0.8)},
+            'near-320': {'size': 320, 'roi': (0.1, 0.3, 0.9, 1.0)},
+        },
+    },
+    'ocr_worker': {
+        'async': False,  # run the combat entry boss level and count down OCR on a background worker
+        'max_pending': 2,  # queued jobs, the oldest is cancelled when full
+        'max_age': 0.5,  # seconds, jobs whose frame is older than this when the worker gets to them are cancelled
+    },
     'my_app': ['src.globals', 'Globals'],
     'start_timeout': 120,  # default 60
     'wait_until_settle_time': 0,
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+
+class ArrowAngleEstimator:
+    """
+    小地图箭头朝向, 预先生成0-359度旋转后的箭头模板, 先按coarse_step粗搜索, 再在最好的几个角度附近逐度细搜索
+    模板和截图尺寸相同时, 归一化相关系数 (与cv2.TM_CCOEFF_NORMED相同) 就是归一化向量的点积, 一次矩阵乘法算完所有候选角度
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self.h, self.w = template.shape[:2]
+        self.center = (self.w // 2, self.h // 2)
+        self.bank = np.stack([self.normalize(self.rotate(angle)) for angle in range(360)])
+
+    def rotate(self, angle):
+        rotation_matrix = cv2.getRotationMatrix2D(self.center, -angle, 1.0)
+        return cv2.warpAffine(self.template, rotation_matrix, (self.w, self.h))
+
+    @staticmethod
+    def normalize(mat):
+        """
+        每个通道减去均值后展开并归一化, 两个这样的向量的点积等于TM_CCOEFF_NORMED
+        """
+        mat = mat.astype(np.float32)
+        mat -= mat.reshape(-1, mat.shape[2] if mat.ndim == 3 else 1).mean(axis=0)
+        vector = mat.ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def scores(self, crop, angles):
+        """
+        Returns:
+            (每个角度的相关系数, 每个角度的最佳位置 (x, y) 相对crop)
+        """
+        angles = np.asarray(angles)
+        if crop.shape == self.template.shape:
+            return self.bank[angles] @ self.normalize(crop), np.zeros((len(angles), 2), dtype=np.int32)
+        # 搜索区域比模板大, 对候选角度逐个matchTemplate
+        scores = np.empty(len(angles), dtype=np.float32)
+        locations = np.empty((len(angles), 2), dtype=np.int32)
+        for i, angle in enumerate(angles):
+            result = cv2.matchTemplate(crop, self.rotate(int(angle)), cv2.TM_CCOEFF_NORMED)
+            np.nan_to_num(result, copy=False, nan=0, posinf=0, neginf=0)
+            _, scores[i], _, locations[i] = cv2.minMaxLoc(result)
+        return scores, locations
+
+    def estimate(self, crop, coarse_step=15, fine_range=7, top_k=2):
+        """
+        Args:
+            crop: 箭头所在区域的截图
+            coarse_step: 粗搜索的角度间隔
+            fine_range: 细搜索时在粗搜索结果前后搜索的度数
+            top_k: 细搜索粗搜索最好的几个角度
+        Returns:
+            (角度, 相关系数, 最佳位置 (x, y) 相对crop)
+        """
+        coarse = np.arange(0, 360, coarse_step)
+        coarse_scores, _ = self.scores(crop, coarse)
+        best = coarse[np.argsort(-coarse_scores)[:top_k]]
+        fine = np.unique((best[:, None] + np.arange(-fine_range, fine_range + 1)[None, :]) % 360)
+        fine_scores, locations = self.scores(crop, fine)
+        i = int(np.argmax(fine_scores))
+        return int(fine[i]), float(fine_scores[i]), tuple(int(v) for v in locations[i])
+
+    def brute_force(self, crop):
+        """
+        逐度搜索全部360个角度, 用于测试和对比
+        """
+        scores, locations = self.scores(crop, np.arange(360))
+        i = int(np.argmax(scores))
+        return i, float(scores[i]), tuple(int(v) for v in locations[i])
@@ -0,0 +1,235 @@
+import threading
+import time
+
+import numpy as np
+
+from ok import Logger, sort_boxes
+from src.yolo_postprocess import postprocess, postprocess_arrays, to_boxes
+from src.yolo_preprocess import LetterboxPreprocessor
+
+logger = Logger.get_logger(__name__)
+
+
+class BaseYolo8Detect:
+    """
+    YOLOv8 检测器公共部分: 预处理, 后处理, 同步检测, 以及异步检测的最新结果
+    子类实现 _infer 和 submit
+    """
+    backend = 'yolo'
+
+    def __init__(self, weights='echo.onnx', model_h=640, model_w=640, iou_thres=0.45):
+        self.dic_labels = {0: 'echo'}
+        self.weights = weights
+        self.model_size = (model_w, model_h)
+        self.iou_threshold = iou_thres
+        self.input_shape = (model_h, model_w)
+        self.preprocessor = None
+        self._preprocessors = {}
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._latest = None
+        self._latest_lock = threading.Lock()
+        self.async_submitted = 0
+        self.async_dropped = 0
+        self.async_completed = 0
+
+    def _init_preprocessor(self, input_h, input_w):
+        self.input_shape = (input_h, input_w)
+        self.preprocessor = LetterboxPreprocessor(input_h, input_w)
+        self._preprocessors[(1, self.input_shape)] = self.preprocessor
+
+    def _get_preprocessor(self, input_shape, batch=1):
+        key = (batch, input_shape)
+        preprocessor = self._preprocessors.get(key)
+        if preprocessor is None:
+            preprocessor = LetterboxPreprocessor(*input_shape, batch=batch)
+            self._preprocessors[key] = preprocessor
+        return preprocessor
+
+    def _preprocess(self, img, input_shape=None):
+        """图像预处理（保持宽高比的缩放填充）, 写入该输入尺寸复用的输入张量"""
+        if input_shape is None or input_shape == self.input_shape:
+            return self.preprocessor(img)
+        return self._get_preprocessor(input_shape)(img)
+
+    def _create_session(self, input_shape, batch=1):
+        """
+        为指定输入尺寸和batch创建推理会话
+        Returns:
+            (会话, 实际输入尺寸 (height, width)), 后端不支持该尺寸时可以返回默认会话和默认尺寸,
+            不支持该batch时返回None
+        """
+        raise NotImplementedError()
+
+    def get_session(self, input_shape=None, batch=1):
+        """
+        按输入尺寸和batch缓存的推理会话, 每种组合只创建一次
+        Returns:
+            (会话, 实际输入尺寸 (height, width)), 不支持该batch时返回None
+        """
+        input_shape = self.input_shape if input_shape is None else tuple(input_shape)
+        key = (batch, input_shape)
+        if key not in self._sessions:
+            with self._sessions_lock:
+                if key not in self._sessions:
+                    self._sessions[key] = self._create_session(input_shape, batch)
+        return self._sessions[key]
+
+    def warm_up(self, input_shape=None):
+        """
+        用空白输入推理一次, 提前完成会话创建和首次推理的初始化
+        Returns:
+            首次推理耗时, 秒
+        """
+        session, input_shape = self.get_session(input_shape)
+        start = time.perf_counter()
+        self._infer(np.zeros((1, 3, *input_shape), dtype=np.float32), session)
+        return time.perf_counter() - start
+
+    def _infer(self, input_tensor, session=None):
+        """
+        同步推理, 返回模型第一个输出, session为None时使用默认会话
+        """
+        raise NotImplementedError()
+
+    def _postprocess(self, output, padding, orig_shape, confidence_threshold, label, input_shape=None):
+        """
+        Perform post-processing on the model's output to extract detections.
+
+        Args:
+            output (np.ndarray): The output tensor from the model.
+            padding (Tuple[int, int]): Padding values (top, left) used during letterboxing.
+            orig_shape (Tuple[int, int]): Original image (height, width).
+            confidence_threshold (float): Minimum class score to keep a detection.
+            label (int): Only keep this class id, -1 keeps all.
+            input_shape (Tuple[int, int]): Model input (height, width), defaults to the model's own.
+
+        Returns:
+            (List[Box]): Detections in original image coordinates after NMS.
+        """
+        return postprocess(output, padding, orig_shape, input_shape or self.input_shape,
+                           confidence_threshold, self.iou_threshold, self.dic_labels, label)
+
+    def detect(self, image, threshold=0.5, label=-1, roi=None, input_shape=None):
+        '''
+        预测
+        Args:
+            roi: 只检测该区域 (Box), 结果坐标仍然是整张图的坐标
+            input_shape: 模型输入尺寸 (height, width), 为None时使用模型默认尺寸
+        '''
+        try:
+            return self.to_boxes(*self.detect_arrays(image, threshold, label, roi, input_shape))
+        except Exception as e:
+            logger.error(f'{self.backend} yolo detect error: {e}')
+            return []
+
+    def detect_arrays(self, image, threshold=0.5, label=-1, roi=None, input_shape=None):
+        """
+        推理并返回NMS后的numpy数组, 出错时抛出异常
+        Returns:
+            boxes (N, 4) [left, top, width, height] 整张图坐标, scores (N,), class_ids (N,)
+        """
+        session, input_shape = self.get_session(input_shape)
+        image, offset_x, offset_y = crop_roi(image, roi)
+        img_data, pad = self._preprocess(image, input_shape)
+        output = self._infer(img_data, session)
+        boxes, scores, class_ids = postprocess_arrays(output, pad, image.shape[:2], input_shape, threshold,
+                                                      self.iou_threshold, label)
+        boxes[:, 0] += offset_x
+        boxes[:, 1] += offset_y
+        return boxes, scores, class_ids
+
+    def to_boxes(self, boxes, scores, class_ids):
+        return sort_boxes(to_boxes(boxes, scores, class_ids, self.dic_labels))
+
+    def detect_batch(self, images, threshold=0.5, label=-1, roi=None, input_shape=None):
+        '''
+        多帧一次推理, 例如转动视角时的多个方向
+        Args:
+            images: BGR图像列表
+            roi: 每帧都只检测该区域 (Box)
+            input_shape: 模型输入尺寸 (height, width), 为None时使用模型默认尺寸
+        Returns:
+            每帧一个检测结果列表
+        '''
+        if len(images) <= 1:
+            return [self.detect(image, threshold, label, roi, input_shape) for image in images]
+        try:
+            session = self.get_session(input_shape, batch=len(images))
+            if session is None:
+                # 模型不支持该batch, 逐帧推理
+                return [self.detect(image, threshold, label, roi, input_shape) for image in images]
+            session, input_shape = session
+            preprocessor = self._get_preprocessor(input_shape, batch=len(images))
+            crops = []
+            for i, image in enumerate(images):
+                crop, offset_x, offset_y = crop_roi(image, roi)
+                _, pad = preprocessor(crop, i)
+                crops.append((crop.shape[:2], pad, offset_x, offset_y))
+            output = self._infer(preprocessor.tensor, session)
+            results = []
+            for i, (shape, pad, offset_x, offset_y) in enumerate(crops):
+                boxes = self._postprocess(output[i], pad, shape, threshold, label, input_shape)
+                for box in boxes:
+                    box.x += offset_x
+                    box.y += offset_y
+                results.append(sort_boxes(boxes))
+            return results
+        except Exception as e:
+            logger.error(f'{self.backend} yolo detect_batch error: {e}')
+            return [[] for _ in images]
+
+    def submit(self, image, timestamp=None):
+        """
+        异步检测, 提交一帧后立即返回, 推理未完成时旧的待处理帧会被新帧替换
+        Args:
+            image: BGR图像
+            timestamp: 该帧的时间戳, 默认为当前时间
+        """
+        raise NotImplementedError()
+
+    def _publish(self, output, pad, orig_shape, timestamp):
+        with self._latest_lock:
+            if self._latest is None or timestamp >= self._latest[3]:
+                self._latest = (output, pad, orig_shape, timestamp)
+            self.async_completed += 1
+
+    def latest(self, threshold=0.5, label=-1):
+        """
+        最新一次异步检测的结果
+        Returns:
+            (list[Box], 源帧时间戳), 还没有结果时返回 ([], 0)
+        """
+        with self._latest_lock:
+            latest = self._latest
+        if latest is None:
+            return [], 0
+        output, pad, orig_shape, timestamp = latest
+        try:
+            return sort_boxes(self._postprocess(output, pad, orig_shape, threshold, label)), timestamp
+        except Exception as e:
+            logger.error(f'{self.backend} yolo latest error: {e}')
+            return [], timestamp
+
+    def clear_latest(self):
+        with self._latest_lock:
+            self._latest = None
+
+    def close(self):
+        pass
+
+
+def crop_roi(image, roi):
+    """
+    裁剪检测区域, 返回视图, 不复制
+    Returns:
+        (裁剪后的图像, x偏移, y偏移)
+    """
+    if roi is None:
+        return image, 0, 0
+    h, w = image.shape[:2]
+    x1, y1 = max(0, int(roi.x)), max(0, int(roi.y))
+    x2, y2 = min(w, int(roi.x + roi.width)), min(h, int(roi.y + roi.height))
+    if x2 <= x1 or y2 <= y1:
+        raise ValueError(f'roi {roi} is outside of image {w}x{h}')
+    return image[y1:y2, x1:x2], x1, y1
@@ -0,0 +1,115 @@
+import time
+
+from src.CdReader import SLOTS
+
+
+class CdEstimator:
+    """
+    技能冷却的预测, 每个角色每个技能记录最后一次读到或者释放时的冷却和时间, 冷却按扣除冻结后经过的时间减少
+    预测带一个误差范围, 误差随时间增大; 预测快到0或者误差太大时才需要重新读技能栏
+    """
+
+    def __init__(self, elapsed=None, clock=time.time, read_error=0.1, cast_error=0.1, drift=0.05, ready_drift=0.2,
+                 max_error=0.5, cast_grace=0.3):
+        """
+        Args:
+            elapsed: 计算从某个时间开始经过的时间的函数, 默认不扣除冻结
+            clock: 当前时间的函数
+            read_error: 读技能栏得到的冷却的误差
+            cast_error: 释放技能时按已知冷却时间预测的误差, 要比max_error小, 释放后到冷却快结束前都不用读
+            drift: 冷却中的技能每秒增加的误差, 来自冻结时间的估计误差
+            ready_drift: 没有冷却的技能每秒增加的误差, 可能有没记录到的释放
+            max_error: 误差超过这个值时需要重新读
+            cast_grace: 释放后这段时间内读到没有冷却的不算, 技能栏还没变
+        """
+        self.clock = clock
+        self.elapsed = elapsed or (lambda start: self.clock() - start)
+        self.read_error = read_error
+        self.cast_error = cast_error
+        self.drift = drift
+        self.ready_drift = ready_drift
+        self.max_error = max_error
+        self.cast_grace = cast_grace
+        self.states = {}
+        self.reset()
+
+    def reset(self):
+        self.states = {}
+        self.checks = 0
+        self.reads = 0
+        self.casts = 0
+        self.surprises = 0
+
+    @property
+    def saved(self):
+        return self.checks - self.reads
+
+    def predict(self, index, slot):
+        """
+        Returns:
+            (剩余冷却, 误差), 没有记录时返回None
+        """
+        state = self.states.get((index, slot))
+        if state is None:
+            return None
+        value, start, error, _ = state
+        age = max(0.0, self.elapsed(start))
+        return value - age, error + (self.drift if value > 0 else self.ready_drift) * age
+
+    def get(self, index, slot):
+        """
+        Returns:
+            剩余冷却, 小于等于0为可用, 和以前get_cd的返回值相同
+        """
+        prediction = self.predict(index, slot)
+        return prediction[0] if prediction is not None else 0
+
+    def uncertain(self, index, slot):
+        prediction = self.predict(index, slot)
+        if prediction is None:
+            return True
+        remaining, error = prediction
+        # 冷却中的技能快到0或者已经过了0还没确认, 都要读一次
+        return error > self.max_error or (self.states[(index, slot)][0] > 0 and remaining <= error)
+
+    def needs_read(self, index):
+        """
+        每帧检查一次当前角色, 有一个技能不确定就需要读技能栏
+        """
+        self.checks += 1
+        if any(self.uncertain(index, slot) for slot in SLOTS):
+            self.reads += 1
+            return True
+        return False
+
+    def observe(self, index, cds):
+        """
+        记录读到的冷却
+        Args:
+            cds: {'resonance': 冷却, 'echo': 冷却, 'liberation': 冷却}
+        """
+        now = self.clock()
+        for slot in SLOTS:
+            value = cds.get(slot, 0)
+            state = self.states.get((index, slot))
+            if state is not None and state[3] and value <= 0 and now - state[1] < self.cast_grace:
+                continue
+            prediction = self.predict(index, slot)
+            if prediction is not None and prediction[1] <= self.max_error and abs(
+                    max(prediction[0], 0) - value) > prediction[1]:
+                self.surprises += 1
+            self.states[(index, slot)] = (value, now, self.read_error, False)
+
+    def cast(self, index, slot, cd):
+        """
+        记录技能释放, 按已知的冷却时间重新开始预测, 不知道冷却时间时下次读技能栏
+        """
+        self.casts += 1
+        if cd:
+            self.states[(index, slot)] = (cd, self.clock(), self.cast_error, True)
+        else:
+            self.states.pop((index, slot), None)
+
+    def __str__(self):
+        return f'checks: {self.checks} reads: {self.reads} saved: {self.saved} casts: {self.casts} ' \
+               f'surprises: {self.surprises}'
@@ -0,0 +1,225 @@
+import os
+
+import cv2
+import numpy as np
+
+GLYPH_FILE = os.path.join('assets', 'cd_glyphs.npz')
+GLYPH_WIDTH, GLYPH_HEIGHT = 12, 16
+SLOTS = ('resonance', 'echo', 'liberation')
+
+# 和isolate_white_text_to_black相同, 任意通道大于243算文字
+text_lower = np.array([0, 0, 0], dtype=np.uint8)
+text_upper = np.array([243, 243, 243], dtype=np.uint8)
+
+
+def text_mask(bar):
+    return cv2.bitwise_not(cv2.inRange(bar, text_lower, text_upper))
+
+
+def glyph_vector(glyph):
+    """
+    按高度缩放到GLYPH_HEIGHT, 保持宽高比居中放进固定大小的画布, 减均值后归一化, 两个向量的点积就是相关系数
+    """
+    height, width = glyph.shape[:2]
+    scaled_width = max(1, min(GLYPH_WIDTH, round(width * GLYPH_HEIGHT / height)))
+    canvas = np.zeros((GLYPH_HEIGHT, GLYPH_WIDTH), dtype=np.float32)
+    x = (GLYPH_WIDTH - scaled_width) // 2
+    canvas[:, x:x + scaled_width] = cv2.resize(glyph, (scaled_width, GLYPH_HEIGHT),
+                                               interpolation=cv2.INTER_AREA).astype(np.float32)
+    vector = canvas.ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def glyph_kind(box, digit_height):
+    """
+    Returns:
+        '.'是小点, 'digit'是数字大小的字符, None是其它
+    """
+    if box is None:
+        return None
+    _, _, width, height = box
+    if 2 <= height <= digit_height * 0.35 and 2 <= width <= digit_height * 0.4:
+        return '.'
+    if digit_height * 0.75 <= height <= digit_height * 1.25:
+        return 'digit'
+    return None
+
+
+class CdReader:
+    """
+    技能栏冷却数字的读取, 不用OCR
+    技能栏截图二值化后按列投影切出字符, 小点按高度识别, 数字和字形库逐个比相关系数
+    识别不可靠时返回None, 由调用方用OCR读取, OCR的结果可以用learn补充字形库
+    """
+
+    def __init__(self, glyph_file=GLYPH_FILE, threshold=0.65, margin=0.05, max_samples=200):
+        """
+        Args:
+            glyph_file: tools/build_cd_glyphs.py生成的字形库
+            threshold: 数字的最低相关系数
+            margin: 最好和第二好的不同数字之间的最小差距
+            max_samples: 字形库最多的样本数
+        """
+        self.threshold = threshold
+        self.margin = margin
+        self.max_samples = max_samples
+        self.labels = np.zeros(0, dtype='<U1')
+        self.bank = np.zeros((0, GLYPH_WIDTH * GLYPH_HEIGHT), dtype=np.float32)
+        if glyph_file and os.path.exists(glyph_file):
+            data = np.load(glyph_file)
+            self.labels, self.bank = data['labels'], data['bank'].astype(np.float32)
+        self.reads = 0
+        self.fallbacks = 0
+
+    def classify(self, vectors):
+        """
+        Returns:
+            list[(数字, 相关系数)], 相关系数太低或者和其它数字分不开时数字为None
+        """
+        if len(self.bank) == 0 or len(vectors) == 0:
+            return [(None, 0)] * len(vectors)
+        results = []
+        for scores in np.stack(vectors) @ self.bank.T:
+            order = np.argsort(-scores)
+            label, score = str(self.labels[order[0]]), float(scores[order[0]])
+            for other in order[1:]:
+                if self.labels[other] != label:
+                    if score - scores[other] < self.margin:
+                        label = None
+                    break
+            results.append((label if score >= self.threshold else None, score))
+        return results
+
+    @staticmethod
+    def segment(mask, digit_height):
+        """
+        按列投影切分字符, 每个字符取有像素的行作为上下边界
+        Returns:
+            list[(x, y, width, height)]
+        """
+        columns = mask.any(axis=0)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], columns.view(np.int8), [0]))))
+        boxes = []
+        for x1, x2 in zip(edges[::2], edges[1::2]):
+            if x2 - x1 > digit_height:
+                # 图标之类的大块, 不是字符
+                boxes.append(None)
+                continue
+            rows = np.flatnonzero(mask[:, x1:x2].any(axis=1))
+            boxes.append((int(x1), int(rows[0]), int(x2 - x1), int(rows[-1] - rows[0] + 1)))
+        return boxes
+
+    def parse(self, mask, boxes, digit_height):
+        """
+        找出所有 数字{1,2} 点 数字 排列的字符组, 再识别组里的数字
+        Returns:
+            (list[(x, 冷却时间)], 是否有认不出的数字)
+        """
+        kinds = [glyph_kind(box, digit_height) for box in boxes]
+        groups = []
+        for i, kind in enumerate(kinds):
+            if kind != '.' or i == 0 or i + 1 >= len(boxes):
+                continue
+            dot = boxes[i]
+            if kinds[i + 1] != 'digit' or not self.aligned(dot, boxes[i + 1]):
+                continue
+            before = []
+            for j in (i - 1, i - 2):
+                if j < 0 or kinds[j] != 'digit' or not self.aligned(dot, boxes[j]) or (
+                        before and boxes[before[-1]][0] - boxes[j][0] - boxes[j][2] > digit_height * 0.6):
+                    break
+                before.append(j)
+            if before:
+                groups.append(before[::-1] + [i + 1])
+        digits = sorted({j for group in groups for j in group})
+        labels = dict(zip(digits, self.classify([glyph_vector(mask[y:y + height, x:x + width])
+                                                 for x, y, width, height in (boxes[j] for j in digits)])))
+        results = []
+        for group in groups:
+            chars = [labels[j][0] for j in group]
+            if None in chars:
+                return [], True
+            results.append((boxes[group[0]][0], float(''.join(chars[:-1]) + '.' + chars[-1])))
+        return results, False
+
+    @staticmethod
+    def aligned(dot, digit):
+        """
+        小点的底边和数字的底边对齐
+        """
+        return abs((dot[1] + dot[3]) - (digit[1] + digit[3])) <= max(2, digit[3] * 0.2)
+
+    @staticmethod
+    def text_band(frame):
+        """
+        技能栏中间文字所在的一条的二值图
+        Returns:
+            (mask, 数字高度, mask左边在画面上的x)
+        """
+        height, width = frame.shape[:2]
+        bar = frame[round(height * 0.86):round(height * 0.93), round(width * 0.81):round(width * 0.97), :3]
+        mask = text_mask(bar[round(bar.shape[0] * 0.3):round(bar.shape[0] * 0.75)])
+        return mask, height * 16 / 1080, round(width * 0.81)
+
+    def read(self, frame):
+        """
+        Returns:
+            {'resonance': 冷却, 'echo': 冷却, 'liberation': 冷却}, 没有数字的技能为0; 识别不可靠时返回None
+        """
+        self.reads += 1
+        width = frame.shape[1]
+        mask, digit_height, left = self.text_band(frame)
+        results, uncertain = self.parse(mask, self.segment(mask, digit_height), digit_height)
+        if uncertain:
+            self.fallbacks += 1
+            return None
+        cds = {slot: 0 for slot in SLOTS}
+        for x, cd in results:
+            cds[self.slot(left + x, width)] = cd
+        return cds
+
+    @staticmethod
+    def slot(x, width):
+        """
+        和refresh_cd里按OCR文字位置区分技能的规则相同
+        """
+        if x < width * 0.86:
+            return 'resonance'
+        elif x > width * 0.91:
+            return 'liberation'
+        return 'echo'
+
+    def samples(self, frame, texts):
+        """
+        用已知的冷却文字给切出的字符打标签
+        Args:
+            texts: [(文字在画面上的x, 文字)]
+        Returns:
+            list[(数字, 向量)]
+        """
+        width = frame.shape[1]
+        mask, digit_height, left = self.text_band(frame)
+        boxes = [box for box in self.segment(mask, digit_height) if glyph_kind(box, digit_height)]
+        samples = []
+        for x, text in texts:
+            slot = self.slot(x, width)
+            glyphs = [box for box in boxes if self.slot(left + box[0], width) == slot]
+            if len(glyphs) != len(text) or any((glyph_kind(box, digit_height) == '.') != (char == '.')
+                                               for box, char in zip(glyphs, text)):
+                continue
+            for (gx, gy, gw, gh), char in zip(glyphs, text):
+                if char.isdigit():
+                    samples.append((char, glyph_vector(mask[gy:gy + gh, gx:gx + gw])))
+        return samples
+
+    def learn(self, frame, texts):
+        """
+        OCR读到的冷却文字补充进字形库
+        """
+        samples = self.samples(frame, texts)
+        if samples:
+            self.labels = np.concatenate([self.labels, [label for label, _ in samples]])[-self.max_samples:]
+            self.bank = np.concatenate([self.bank, np.stack([vector for _, vector in samples])])[-self.max_samples:]
+        return len(samples)
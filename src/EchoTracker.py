@@ -0,0 +1,170 @@
+import math
+import time
+
+import numpy as np
+
+from ok import Box, sort_boxes
+
+
+class EchoTrack:
+    """
+    单个声骸的跟踪状态, 匀速模型, 坐标和速度都是像素, 速度单位为像素/秒
+    """
+
+    def __init__(self, box, now):
+        self.x, self.y, self.width, self.height = float(box.x), float(box.y), float(box.width), float(box.height)
+        self.vx = 0.0
+        self.vy = 0.0
+        self.confidence = box.confidence
+        self.name = box.name
+        self.updated = now
+        self.misses = 0
+        self.hits = 1
+
+    def predict(self, now):
+        dt = now - self.updated
+        return self.x + self.vx * dt, self.y + self.vy * dt, self.width, self.height
+
+    def correct(self, box, now, smoothing):
+        dt = now - self.updated
+        if dt > 0:
+            vx = (box.x - self.x) / dt
+            vy = (box.y - self.y) / dt
+            if self.hits == 1:
+                # 第二次观测直接得到速度
+                self.vx, self.vy = vx, vy
+            else:
+                self.vx = smoothing * vx + (1 - smoothing) * self.vx
+                self.vy = smoothing * vy + (1 - smoothing) * self.vy
+        self.x, self.y, self.width, self.height = float(box.x), float(box.y), float(box.width), float(box.height)
+        self.confidence = box.confidence
+        self.updated = now
+        self.misses = 0
+        self.hits += 1
+
+
+def iou_matrix(a, b):
+    """
+    两组框 [x, y, w, h] 两两之间的IoU
+    """
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    inter_w = np.clip(np.minimum(ax2[:, None], bx2[None, :]) - np.maximum(a[:, 0:1], b[None, :, 0]), 0, None)
+    inter_h = np.clip(np.minimum(ay2[:, None], by2[None, :]) - np.maximum(a[:, 1:2], b[None, :, 1]), 0, None)
+    inter = inter_w * inter_h
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+class EchoTracker:
+    """
+    声骸框跟踪, 两次检测之间用匀速模型预测框的位置, 每隔N帧或者置信度下降时才重新检测
+    N根据实际推理耗时自适应, 让平均每帧的检测开销不超过budget秒
+    """
+
+    def __init__(self, detect_function, iou_threshold=0.2, min_interval=1, max_interval=6, budget=0.03,
+                 decay=0.85, min_confidence=0.35, max_misses=2, smoothing=0.5, time_function=time.time):
+        """
+        Args:
+            detect_function: 无参数, 返回当前帧的检测结果 list[Box]
+            iou_threshold: 检测结果和预测框关联的最小IoU
+            min_interval: 最少每几帧检测一次
+            max_interval: 最多每几帧检测一次
+            budget: 平均每帧允许的检测耗时, 秒
+            decay: 每预测一帧置信度乘以该值
+            min_confidence: 任一跟踪的置信度低于该值时立即重新检测
+            max_misses: 连续几次检测没有关联上就删除该跟踪
+            smoothing: 速度的指数平滑系数
+            time_function: 时间函数, 测试时可以替换
+        """
+        self.detect_function = detect_function
+        self.iou_threshold = iou_threshold
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = budget
+        self.decay = decay
+        self.min_confidence = min_confidence
+        self.max_misses = max_misses
+        self.smoothing = smoothing
+        self.time_function = time_function
+        self.tracks = []
+        self.interval = min_interval
+        self.inference_cost = 0
+        self.frames_since_detect = 0
+        self.frames = 0
+        self.detections = 0
+
+    def reset(self):
+        self.tracks = []
+        self.frames_since_detect = 0
+
+    def need_detect(self):
+        if not self.tracks or self.frames_since_detect >= self.interval:
+            return True
+        return any(track.confidence < self.min_confidence for track in self.tracks)
+
+    def update(self):
+        """
+        每帧调用一次
+        Returns:
+            list[Box]: 当前帧的声骸框, 检测帧返回检测结果, 其他帧返回预测结果, 每次都是新的Box
+        """
+        self.frames += 1
+        if self.need_detect():
+            start = time.perf_counter()
+            detections = self.detect_function()
+            self._update_interval(time.perf_counter() - start)
+            self.detections += 1
+            self.frames_since_detect = 1
+            self._associate(detections, self.time_function())
+        else:
+            self.frames_since_detect += 1
+            for track in self.tracks:
+                track.confidence *= self.decay
+        return self.boxes()
+
+    def boxes(self, now=None):
+        if now is None:
+            now = self.time_function()
+        boxes = []
+        for track in self.tracks:
+            if track.misses > 0:
+                continue
+            x, y, w, h = track.predict(now)
+            boxes.append(Box(round(x), round(y), round(w), round(h), confidence=track.confidence, name=track.name))
+        return sort_boxes(boxes)
+
+    def _update_interval(self, cost):
+        self.inference_cost = cost if self.inference_cost == 0 else 0.7 * self.inference_cost + 0.3 * cost
+        interval = math.ceil(self.inference_cost / self.budget) if self.budget > 0 else self.max_interval
+        self.interval = min(self.max_interval, max(self.min_interval, interval))
+
+    def _associate(self, detections, now):
+        matched_tracks = set()
+        matched_detections = set()
+        if self.tracks and detections:
+            predicted = [track.predict(now) for track in self.tracks]
+            ious = iou_matrix(predicted, [(d.x, d.y, d.width, d.height) for d in detections])
+            # 贪心关联, IoU从大到小
+            for flat in np.argsort(-ious, axis=None):
+                t, d = np.unravel_index(flat, ious.shape)
+                if ious[t, d] < self.iou_threshold:
+                    break
+                if t in matched_tracks or d in matched_detections:
+                    continue
+                self.tracks[t].correct(detections[d], now, self.smoothing)
+                matched_tracks.add(t)
+                matched_detections.add(d)
+        tracks = []
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+            tracks.append(track)
+        for i, detection in enumerate(detections):
+            if i not in matched_detections:
+                tracks.append(EchoTrack(detection, now))
+        self.tracks = tracks
@@ -0,0 +1,192 @@
+import math
+import time
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+
+@lru_cache(maxsize=8)
+def circle_mask_with_hole(height, width):
+    """
+    小地图的圆形mask, 中间挖掉人物箭头所在的方块, 按尺寸缓存, 返回的数组不要修改
+    """
+    mask = np.zeros((height, width), dtype=np.uint8)
+    center_x, center_y = width // 2, height // 2
+    cv2.circle(mask, (center_x, center_y), min(width, height) // 2, 255, -1)
+    rect_w = round(width / 4.4)
+    rect_h = round(height / 4.4)
+    rect_x1 = center_x - rect_w // 2
+    rect_y1 = center_y - rect_h // 2
+    cv2.rectangle(mask, (rect_x1, rect_y1), (rect_x1 + rect_w, rect_y1 + rect_h), 0, -1)
+    mask.flags.writeable = False
+    return mask
+
+
+@lru_cache(maxsize=8)
+def small_circle_mask(height, width, factor):
+    return cv2.resize(circle_mask_with_hole(height, width), (width // factor, height // factor),
+                      interpolation=cv2.INTER_NEAREST)
+
+
+class MiniMapLocator:
+    """
+    小地图在截好的大地图上的定位
+    按上次的位置和速度预测搜索窗口, 先在缩小的灰度图上粗搜, 再在原图的小窗口里用彩色精确匹配
+    confidence是精确匹配的相关系数, drift是实际位置和预测位置的距离, 定位不可靠时下次扩大窗口
+    """
+
+    def __init__(self, big_map, start_window, factor=2, threshold=0.05, track_confidence=0.3, candidates=3):
+        """
+        Args:
+            big_map: 大地图截图
+            start_window: 第一次搜索的范围 (x, y, width, height)
+            factor: 粗搜时的缩小倍数
+            threshold: 低于这个相关系数认为没找到
+            track_confidence: 低于这个相关系数时不更新速度, 并且下次扩大搜索窗口
+            candidates: 粗搜后精确匹配的候选位置数
+        """
+        self.big_map = big_map[:, :, :3]
+        self.big_gray = cv2.cvtColor(self.big_map, cv2.COLOR_BGR2GRAY)
+        self.small_gray = cv2.resize(self.big_gray, (self.big_gray.shape[1] // factor,
+                                                     self.big_gray.shape[0] // factor),
+                                     interpolation=cv2.INTER_AREA)
+        self.factor = factor
+        self.threshold = threshold
+        self.track_confidence = track_confidence
+        self.candidates = candidates
+        self.start_window = start_window
+        self.window = start_window
+        self.position = None
+        self.velocity = (0.0, 0.0)
+        self.last_time = 0
+        self.lost = 0
+        self.confidence = 0.0
+        self.drift = 0.0
+        self.count = 0
+        self.total_time = 0.0
+
+    @property
+    def average_time(self):
+        return self.total_time / self.count if self.count else 0
+
+    def predict(self, now):
+        """
+        Returns:
+            预测的左上角位置, 还没定位过时返回None
+        """
+        if self.position is None:
+            return None
+        dt = min(now - self.last_time, 1.0)
+        return self.position[0] + self.velocity[0] * dt, self.position[1] + self.velocity[1] * dt
+
+    def search_window(self, template_shape, now, grow=None):
+        """
+        预测位置周围的搜索窗口, 余量随速度和连续丢失次数增大, 最大不超过第一次的窗口
+        """
+        predicted = self.predict(now)
+        if predicted is None:
+            return self.start_window
+        height, width = template_shape[:2]
+        dt = min(now - self.last_time, 1.0)
+        speed = math.hypot(*self.velocity) * dt
+        margin = (max(16, width * 0.1) + speed) * (2 ** (self.lost if grow is None else grow))
+        margin = min(margin, max(self.start_window[2] - width, self.start_window[3] - height, 16))
+        return (round(predicted[0] - margin), round(predicted[1] - margin),
+                round(width + margin * 2), round(height + margin * 2))
+
+    def clip(self, window, template_shape):
+        x, y, w, h = window
+        map_height, map_width = self.big_map.shape[:2]
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(map_width, x + w), min(map_height, y + h)
+        if x2 - x1 < template_shape[1] or y2 - y1 < template_shape[0]:
+            return None
+        return x1, y1, x2, y2
+
+    def locate(self, mini_map, now=None):
+        """
+        Args:
+            mini_map: 小地图截图
+            now: 截图时间, 默认time.time()
+        Returns:
+            (x, y, confidence) 小地图左上角在大地图上的位置, 找不到时返回None
+        """
+        start = time.perf_counter()
+        if now is None:
+            now = time.time()
+        mini_map = mini_map[:, :, :3]
+        self.window = self.search_window(mini_map.shape, now)
+        result = self.match(mini_map, self.window)
+        if result is not None and result[2] < self.track_confidence and self.lost == 0 and self.position is not None:
+            # 预测窗口里不可靠, 用第一次的窗口大小重新搜一次
+            self.window = self.search_window(mini_map.shape, now, grow=8)
+            wide = self.match(mini_map, self.window)
+            if wide is not None and wide[2] > result[2]:
+                result = wide
+        self.update(result, now)
+        self.count += 1
+        self.total_time += time.perf_counter() - start
+        return result
+
+    def match(self, mini_map, window):
+        height, width = mini_map.shape[:2]
+        area = self.clip(window, mini_map.shape)
+        if area is None:
+            return None
+        x1, y1, x2, y2 = area
+        mask = circle_mask_with_hole(height, width)
+        factor = self.factor
+        pad = factor * 2
+        if factor > 1 and max(x2 - x1 - width, y2 - y1 - height) > pad * 2:
+            small_template = cv2.resize(cv2.cvtColor(mini_map, cv2.COLOR_BGR2GRAY),
+                                        (width // factor, height // factor), interpolation=cv2.INTER_AREA)
+            small_area = self.small_gray[y1 // factor:y2 // factor, x1 // factor:x2 // factor]
+            coarse = cv2.matchTemplate(small_area, small_template, cv2.TM_CCOEFF_NORMED,
+                                       mask=small_circle_mask(height, width, factor))
+            np.nan_to_num(coarse, copy=False, nan=0, posinf=0, neginf=0)
+            windows = []
+            for _ in range(self.candidates):
+                _, _, _, (cx, cy) = cv2.minMaxLoc(coarse)
+                coarse[max(0, cy - 2):cy + 3, max(0, cx - 2):cx + 3] = -1
+                cx, cy = (x1 // factor + cx) * factor, (y1 // factor + cy) * factor
+                windows.append((max(x1, cx - pad), max(y1, cy - pad),
+                                min(x2, cx + width + pad), min(y2, cy + height + pad)))
+        else:
+            # 窗口已经很小, 直接在原图匹配
+            windows = [area]
+        best = None
+        for rx1, ry1, rx2, ry2 in windows:
+            if rx2 - rx1 < width or ry2 - ry1 < height:
+                continue
+            result = cv2.matchTemplate(self.big_map[ry1:ry2, rx1:rx2], mini_map, cv2.TM_CCOEFF_NORMED, mask=mask)
+            np.nan_to_num(result, copy=False, nan=0, posinf=0, neginf=0)
+            _, max_val, _, (mx, my) = cv2.minMaxLoc(result)
+            if best is None or max_val > best[2]:
+                best = (rx1 + mx, ry1 + my, float(max_val))
+            if best[2] >= self.track_confidence:
+                # 粗搜最好的位置已经可靠, 不用再验证其它候选
+                break
+        if best is None or best[2] < self.threshold:
+            return None
+        return best
+
+    def update(self, result, now):
+        if result is None:
+            self.confidence = 0.0
+            self.lost += 1
+            return
+        x, y, confidence = result
+        predicted = self.predict(now)
+        self.drift = math.hypot(x - predicted[0], y - predicted[1]) if predicted is not None else 0.0
+        self.confidence = confidence
+        if confidence < self.track_confidence:
+            self.lost += 1
+            return
+        if self.position is not None and now > self.last_time:
+            dt = now - self.last_time
+            velocity = ((x - self.position[0]) / dt, (y - self.position[1]) / dt)
+            self.velocity = (self.velocity[0] * 0.5 + velocity[0] * 0.5, self.velocity[1] * 0.5 + velocity[1] * 0.5)
+        self.position = (x, y)
+        self.last_time = now
+        self.lost = 0
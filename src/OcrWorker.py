@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class OcrWorker:
+    """
+    后台线程做OCR, 提交后马上返回Future, 战斗检查在之后的帧里取结果, 不卡住连招
+    待处理的任务有上限, 满了取消最旧的; 轮到时截图已经太旧的任务也取消, 不浪费时间识别过期的画面
+    """
+
+    def __init__(self, ocr_function, lock=None, max_pending=2, max_age=0.5, clock=time.time):
+        """
+        Args:
+            ocr_function: ocr_function(frame, box, params)返回文字框
+            lock: 和主线程共用的OCR锁, OCR库的推理不能同时调用
+            max_pending: 最多待处理的任务数
+            max_age: 截图时间超过这个秒数的任务不再识别
+            clock: 当前时间的函数
+        """
+        self.ocr_function = ocr_function
+        self.lock = lock or threading.Lock()
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.clock = clock
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._closed = False
+        self.submitted = 0
+        self.dropped = 0
+        self.stale = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, frame, box, timestamp=None, **params):
+        """
+        Args:
+            frame: 截图, 提交后不能再修改
+            box: 识别的区域
+            timestamp: 截图时间, 默认当前时间
+            params: 传给ocr的其它参数, 比如match, target_height
+        Returns:
+            Future, 结果是文字框列表; 被丢弃或者过期时是cancelled
+        """
+        future = Future()
+        if timestamp is None:
+            timestamp = self.clock()
+        with self._cond:
+            if self._closed:
+                future.cancel()
+                return future
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._worker_loop, name="OcrWorker", daemon=True)
+                self._worker.start()
+            while len(self._pending) >= self.max_pending:
+                self._pending.popleft()[0].cancel()
+                self.dropped += 1
+            self._pending.append((future, frame, box, timestamp, params))
+            self.submitted += 1
+            self._cond.notify()
+        return future
+
+    def run_next(self):
+        """
+        取出一个任务执行, 工作线程里循环调用
+        Returns:
+            是否执行了任务
+        """
+        with self._cond:
+            if not self._pending:
+                return False
+            future, frame, box, timestamp, params = self._pending.popleft()
+        if self.clock() - timestamp > self.max_age:
+            future.cancel()
+            self.stale += 1
+            return True
+        if not future.set_running_or_notify_cancel():
+            return True
+        try:
+            with self.lock:
+                result = self.ocr_function(frame, box, params)
+            future.set_result(result)
+            self.completed += 1
+        except Exception as e:
+            # 异常交给取结果的一方处理
+            future.set_exception(e)
+            self.failed += 1
+        return True
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            self.run_next()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._pending:
+                self._pending.popleft()[0].cancel()
+            self._cond.notify()
+
+    def __str__(self):
+        return f'submitted: {self.submitted} completed: {self.completed} dropped: {self.dropped} ' \
+               f'stale: {self.stale} failed: {self.failed}'
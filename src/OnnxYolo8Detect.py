@@ -1,40 +1,58 @@
-import os
-import random
+import threading
 import time
-from typing import Tuple
 
 import onnxruntime as ort  # Added onnxruntime
-# from openvino import Core  # Removed OpenVINO Core
-import cv2
-import numpy as np
 
-from ok import Logger, Box, sort_boxes, og  # Assuming these are available
+from ok import Logger, og  # Assuming these are available
+from src.BaseYolo8Detect import BaseYolo8Detect
+from src.yolo_preprocess import LetterboxPreprocessor
 
 logger = Logger.get_logger(__name__)
 
+graph_optimization_levels = {
+    'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
 
-class OnnxYolo8Detect:  # Renamed class
 
-    def __init__(self, weights='echo.onnx', model_h=640, model_w=640, iou_thres=0.45):
+class OnnxYolo8Detect(BaseYolo8Detect):  # Renamed class
+    backend = 'ONNX Runtime'
+
+    def __init__(self, weights='echo.onnx', model_h=640, model_w=640, iou_thres=0.45, inference=None):
         """
         yolov ONNX Runtime inference
         dic_labels: {0: 'person', 1: 'bicycle'}
+        inference: config.py yolo.inference profile (threads, graph optimization, execution mode, io binding)
         """
-        self.dic_labels = {0: 'echo'}
-        self.weights = weights
+        super().__init__(weights, model_h, model_w, iou_thres)
         # Store model_h and model_w for preprocessing.
         # These will be the target dimensions for the letterbox function.
         self.preprocess_target_h = model_h
         self.preprocess_target_w = model_w
-        # self.model_size was in original code, kept for structural similarity if it was used elsewhere.
-        # It stored (width, height).
-        self.model_size = (model_w, model_h)
-        self.iou_threshold = iou_thres
-        # self.openfile_name_model = weights # Redundant with self.weights
+        self._init_preprocessor(model_h, model_w)
+
+        # async worker state, started on first submit
+        self._worker = None
+        self._pending = None
+        self._pending_cond = threading.Condition()
+        self._closed = False
+
+        inference = inference or {}
+        self.io_binding = inference.get('io_binding', False)
+        # io bindings and preallocated outputs are per thread, the async worker runs next to detect()
+        self._thread_bindings = threading.local()
 
         # --- ONNX Runtime Initialization ---
         options = ort.SessionOptions()
-        # options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL # Optional
+        if inference.get('intra_op_threads'):
+            options.intra_op_num_threads = inference['intra_op_threads']
+        if inference.get('inter_op_threads'):
+            options.inter_op_num_threads = inference['inter_op_threads']
+        if inference.get('graph_optimization'):
+            options.graph_optimization_level = graph_optimization_levels[inference['graph_optimization']]
+        parallel = inference.get('execution_mode') == 'parallel'
 
         available_providers = ort.get_available_providers()
         logger.info(f"Available ONNX Runtime providers: {available_providers}")
@@ -50,6 +68,12 @@ class OnnxYolo8Detect:  # Renamed class
 
         providers.append('CPUExecutionProvider')  # Always include CPU as a fallback
 
+        if parallel and len(providers) > 1:
+            logger.info("ONNX Runtime parallel execution mode is CPU only, keep sequential")
+            parallel = False
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL if parallel else ort.ExecutionMode.ORT_SEQUENTIAL
+        logger.info(f"ONNX Runtime inference profile: {inference}")
+
         try:
             logger.info(f"Initializing ONNX Runtime session with providers: {providers} for model: {self.weights}")
             self.session = ort.InferenceSession(self.weights, sess_options=options, providers=providers)
@@ -62,9 +86,12 @@ class OnnxYolo8Detect:  # Renamed class
             model_input_shape = self.session.get_inputs()[0].shape  # e.g., [1, 3, 640, 640] for NCHW
             self.model_actual_input_h = model_input_shape[2]
             self.model_actual_input_w = model_input_shape[3]
+            self.dynamic_input = not isinstance(self.model_actual_input_h, int) or \
+                                 not isinstance(self.model_actual_input_w, int)
+            self.dynamic_batch = not isinstance(model_input_shape[0], int)
 
-            if self.preprocess_target_h != self.model_actual_input_h or \
-                    self.preprocess_target_w != self.model_actual_input_w:
+            if not self.dynamic_input and (self.preprocess_target_h != self.model_actual_input_h or
+                                           self.preprocess_target_w != self.model_actual_input_w):
                 logger.warning(
                     f"User-specified preprocessing HxW ({self.preprocess_target_h}x{self.preprocess_target_w}) "
                     f"differs from ONNX model's expected input HxW ({self.model_actual_input_h}x{self.model_actual_input_w}). "
@@ -81,127 +108,79 @@ class OnnxYolo8Detect:  # Renamed class
             raise RuntimeError("Could not initialize ONNX Runtime model") from e
         # --- End ONNX Runtime Initialization ---
 
-    def letterbox(self, img: np.ndarray, new_shape: Tuple[int, int] = (640, 640)) -> Tuple[np.ndarray, Tuple[int, int]]:
+    def _create_session(self, input_shape, batch=1):
+        if batch > 1 and not self.dynamic_batch:
+            logger.info(f"ONNX model batch is fixed to 1, detect_batch runs {batch} frames one by one")
+            return None
+        if input_shape == self.input_shape or self.dynamic_input:
+            return self.session, input_shape
+        # ONNX Runtime can not reshape a model with a static input, keep the exported size
+        logger.warning(f"ONNX model input is fixed to {self.model_actual_input_h}x{self.model_actual_input_w}, "
+                       f"can not use {input_shape[0]}x{input_shape[1]}, export the model with dynamic=True")
+        return self.session, self.input_shape
+
+    def _infer(self, input_tensor, session=None):
+        session = self.session if session is None else session
+        if self.io_binding:
+            return self._infer_io_binding(input_tensor, session)
+        # Input is a dictionary {input_name: data}
+        # Output is a list of numpy arrays
+        return session.run([self.output_name], {self.input_name: input_tensor})[0]
+
+    def _infer_io_binding(self, input_tensor, session):
         """
-        Resize and reshape images while maintaining aspect ratio by adding padding.
-        Args:
-            img (np.ndarray): Input image to be resized.
-            new_shape (Tuple[int, int]): Target shape (height, width) for the image.
-        Returns:
-            (np.ndarray): Resized and padded image.
-            (Tuple[int, int]): Padding values (top, left) applied to the image.
+        输出写入预分配的数组, 返回的数组下次同尺寸推理时会被覆盖
         """
-        shape = img.shape[:2]  # current shape [height, width]
-
-        r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
-
-        new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
-        dw, dh = (new_shape[1] - new_unpad[0]) / 2, (new_shape[0] - new_unpad[1]) / 2
-
-        if shape[::-1] != new_unpad:
-            img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
-        top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
-        left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
-        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
-
-        return img, (top, left)
-
-    def _preprocess(self, img):
-        """图像预处理（保持宽高比的缩放填充）"""
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        # Use preprocess_target_h and preprocess_target_w for letterboxing
-        img_letterboxed, pad = self.letterbox(img_rgb, (self.preprocess_target_h, self.preprocess_target_w))
-
-        image_data = np.array(img_letterboxed) / 255.0
-        image_data = np.transpose(image_data, (2, 0, 1))  # Channel first HWC to CHW
-        image_data = np.expand_dims(image_data, axis=0).astype(np.float32)
-
-        return image_data, pad
-
-    def _postprocess(self, outputs_from_model, padding, orig_shape, confidence_threshold, label):
-        """
-        Perform post-processing on the model's output.
-        """
-        # outputs_from_model is a list from session.run(), take the first element.
-        processed_outputs = np.transpose(np.squeeze(outputs_from_model[0]))
-        rows = processed_outputs.shape[0]
-
-        boxes = []
-        scores = []
-        class_ids = []
-
-        # The 'gain' calculation below replicates the logic from the original OpenVINO-based code.
-        # In the original code, self.input_width stored model height, and self.input_height stored model width.
-        # The gain was calculated as: min(variable_storing_width / original_image_height, variable_storing_height / original_image_width).
-        # To replicate this with current variable names (where preprocess_target_h is height, preprocess_target_w is width):
-        # gain = min(self.preprocess_target_w / orig_shape[0], self.preprocess_target_h / orig_shape[1])
-        # This calculation for 'gain' might be incorrect if orig_shape is (height, width) as it would mix width/height ratios.
-        # A more standard gain calculation would be:
-        # gain = min(self.preprocess_target_h / orig_shape[0], self.preprocess_target_w / orig_shape[1])
-        # However, to adhere to "do not fix bugs", the original logic is replicated.
-        gain = min(self.preprocess_target_w / orig_shape[0], self.preprocess_target_h / orig_shape[1])
-
-        # Adjust detections for padding
-        # padding is (pad_top, pad_left)
-        # processed_outputs[:, 0] are x-centers, processed_outputs[:, 1] are y-centers
-        processed_outputs[:, 0] -= padding[1]  # Adjust x-coordinates by left padding
-        processed_outputs[:, 1] -= padding[0]  # Adjust y-coordinates by top padding
-
-        for i in range(rows):
-            classes_scores = processed_outputs[i][4:]
-            max_score = np.amax(classes_scores)
-            class_id = np.argmax(classes_scores)
-
-            if max_score >= confidence_threshold and (label == -1 or label == class_id):
-                x, y, w, h = processed_outputs[i][0], processed_outputs[i][1], processed_outputs[i][2], \
-                    processed_outputs[i][3]
-
-                left = int((x - w / 2) / gain)
-                top = int((y - h / 2) / gain)
-                width = int(w / gain)
-                height = int(h / gain)
-
-                class_ids.append(class_id)
-                scores.append(max_score)
-                boxes.append([left, top, width, height])
-
-        indices = cv2.dnn.NMSBoxes(boxes, scores, confidence_threshold, self.iou_threshold)
-
-        results = []
-        # Check if indices is not an empty tuple, which can happen if NMSBoxes returns nothing.
-        if len(indices) > 0:
-            # In OpenCV 4.x NMSBoxes returns a 2D array if more than one box, 1D if one.
-            # Flatten in case it's [[0], [1]] etc.
-            if isinstance(indices, tuple):  # Should not happen with current cv2 versions but defensive
-                indices_flat = np.array(indices).flatten()
-            else:  # numpy array
-                indices_flat = indices.flatten()
-
-            for i in indices_flat:
-                box = boxes[i]
-                box_obj = Box(box[0], box[1], box[2], box[3])
-                box_obj.name = self.dic_labels.get(int(class_ids[i]), 'unknown')
-                box_obj.confidence = scores[i]
-                results.append(box_obj)
-        return results
-
-    def detect(self, image, threshold=0.5, label=-1):
-        '''
-        预测
-        '''
-        try:
-            h, w = image.shape[:2]
-            img_data, pad = self._preprocess(image)
-
-            # --- ONNX Runtime Inference ---
-            # Input is a dictionary {input_name: data}
-            # Output is a list of numpy arrays
-            outputs = self.session.run([self.output_name], {self.input_name: img_data})
-            # --- End ONNX Runtime Inference ---
-
-            boxes = self._postprocess(outputs, pad, (h, w), threshold, label)
-
-            return sort_boxes(boxes)  # Assuming sort_boxes is available
-        except Exception as e:
-            logger.error(f'ONNX Runtime yolo detect error: {e}')
-            return []
+        bindings = getattr(self._thread_bindings, 'bindings', None)
+        if bindings is None:
+            bindings = self._thread_bindings.bindings = {}
+        key = (id(session), input_tensor.shape)
+        binding = bindings.get(key)
+        if binding is None:
+            output = session.run([self.output_name], {self.input_name: input_tensor})[0]
+            io_binding = session.io_binding()
+            io_binding.bind_output(self.output_name, 'cpu', 0, output.dtype, output.shape, output.ctypes.data)
+            bindings[key] = (io_binding, output)
+            return output
+        io_binding, output = binding
+        io_binding.bind_cpu_input(self.input_name, input_tensor)
+        session.run_with_iobinding(io_binding)
+        return output
+
+    def submit(self, image, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        with self._pending_cond:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._worker_loop, name="OnnxYolo8DetectWorker",
+                                                daemon=True)
+                self._worker.start()
+            if self._pending is not None:
+                self.async_dropped += 1
+            self._pending = (image, timestamp)
+            self.async_submitted += 1
+            self._pending_cond.notify()
+
+    def _worker_loop(self):
+        # 工作线程有自己的输入张量, 不和同步detect共用
+        preprocessor = LetterboxPreprocessor(*self.input_shape)
+        while True:
+            with self._pending_cond:
+                while self._pending is None and not self._closed:
+                    self._pending_cond.wait()
+                if self._closed:
+                    return
+                image, timestamp = self._pending
+                self._pending = None
+            try:
+                input_tensor, pad = preprocessor(image)
+                output = self._infer(input_tensor)
+                self._publish(output.copy() if self.io_binding else output, pad, image.shape[:2], timestamp)
+            except Exception as e:
+                logger.error(f'ONNX Runtime yolo async detect error: {e}')
+
+    def close(self):
+        with self._pending_cond:
+            self._closed = True
+            self._pending = None
+            self._pending_cond.notify()
@@ -0,0 +1,223 @@
+import math
+
+
+def distance(a, b):
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def path_length(start, points):
+    length = 0
+    current = start
+    for point in points:
+        length += distance(current, point)
+        current = point
+    return length
+
+
+def fits(max_distance, *lengths):
+    return max_distance == 0 or all(length <= max_distance for length in lengths)
+
+
+def nearest_neighbour(start, points, max_distance=0):
+    """
+    贪心顺序, 每次走最近的点, 没有max_distance以内的点时停止
+    Returns:
+        list[int]: 点的下标, 走不到的点不在里面
+    """
+    unvisited = list(range(len(points)))
+    order = []
+    current = start
+    while unvisited:
+        reachable = [i for i in unvisited if max_distance == 0 or distance(current, points[i]) <= max_distance]
+        if not reachable:
+            break
+        next_index = min(reachable, key=lambda i: distance(current, points[i]))
+        order.append(next_index)
+        unvisited.remove(next_index)
+        current = points[next_index]
+    return order
+
+
+def two_opt(start, points, order, max_distance=0):
+    """
+    反转一段路线, 起点固定, 终点不固定, 新的边不能超过max_distance
+    Returns:
+        bool: 是否有改进, order原地修改
+    """
+    n = len(order)
+    changed = False
+
+    def at(k):
+        return start if k < 0 else points[order[k]]
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            a, b = at(i - 1), at(i)
+            for j in range(i + 1, n):
+                c = at(j)
+                d = at(j + 1) if j + 1 < n else None
+                old = distance(a, b) + (distance(c, d) if d is not None else 0)
+                new_ac = distance(a, c)
+                new_bd = distance(b, d) if d is not None else 0
+                if new_ac + new_bd < old - 1e-6 and fits(max_distance, new_ac, new_bd):
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    improved = changed = True
+                    b = at(i)
+    return changed
+
+
+def or_opt(start, points, order, max_distance=0, max_segment=3):
+    """
+    把1到max_segment个连续的点挪到路线的其它位置, 可以反向插入
+    Returns:
+        bool: 是否有改进, order原地修改
+    """
+    changed = False
+    improved = True
+    while improved:
+        improved = False
+        for size in range(1, max_segment + 1):
+            i = 0
+            while i + size <= len(order):
+                segment = order[i:i + size]
+                rest = order[:i] + order[i + size:]
+                prev_point = start if i == 0 else points[order[i - 1]]
+                next_point = points[order[i + size]] if i + size < len(order) else None
+                first, last = points[segment[0]], points[segment[-1]]
+                gain = distance(prev_point, first)
+                if next_point is not None:
+                    bridge = distance(prev_point, next_point)
+                    gain += distance(last, next_point) - bridge
+                    if not fits(max_distance, bridge):
+                        i += 1
+                        continue
+                best = None
+                for j in range(len(rest) + 1):
+                    if j == i:
+                        continue
+                    before = start if j == 0 else points[rest[j - 1]]
+                    after = points[rest[j]] if j < len(rest) else None
+                    for candidate in (segment, segment[::-1]):
+                        head, tail = points[candidate[0]], points[candidate[-1]]
+                        edges = [distance(before, head)]
+                        cost = edges[0]
+                        if after is not None:
+                            edges.append(distance(tail, after))
+                            cost += edges[1] - distance(before, after)
+                        if cost < gain - 1e-6 and fits(max_distance, *edges) and (
+                                best is None or cost < best[0]):
+                            best = (cost, j, candidate)
+                if best is not None:
+                    _, j, candidate = best
+                    order[:] = rest[:j] + candidate + rest[j:]
+                    improved = changed = True
+                i += 1
+    return changed
+
+
+def plan_route(start, points, max_distance=0, rounds=10):
+    """
+    最近邻生成初始路线, 再交替用2-opt和Or-opt缩短
+    Returns:
+        (优化后的下标顺序, 贪心的下标顺序)
+    """
+    greedy = nearest_neighbour(start, points, max_distance)
+    order = greedy[:]
+    for _ in range(rounds):
+        changed = two_opt(start, points, order, max_distance)
+        changed = or_opt(start, points, order, max_distance) or changed
+        if not changed:
+            break
+    return order, greedy
+
+
+class GridIndex:
+    """
+    按格子分桶的点索引, 查询剩余点里离某个位置最近的点
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+
+    def cell(self, point):
+        return int(point[0] // self.cell_size), int(point[1] // self.cell_size)
+
+    def add(self, point, item):
+        self.cells.setdefault(self.cell(point), []).append((point, item))
+        self.count += 1
+
+    def remove(self, point, item):
+        bucket = self.cells.get(self.cell(point), [])
+        for k, (_, existing) in enumerate(bucket):
+            if existing is item:
+                del bucket[k]
+                self.count -= 1
+                return True
+        return False
+
+    def closest(self, point):
+        """
+        从所在格子一圈一圈往外找, 已经找到的点比下一圈的最近距离还近时停止
+        Returns:
+            (item, 距离), 没有点时返回(None, 0)
+        """
+        if self.count == 0:
+            return None, 0
+        cx, cy = self.cell(point)
+        best, best_distance = None, math.inf
+        max_ring = max(max(abs(x - cx), abs(y - cy)) for x, y in self.cells)
+        for ring in range(max_ring + 1):
+            if best is not None and best_distance <= (ring - 1) * self.cell_size:
+                break
+            for x in range(cx - ring, cx + ring + 1):
+                for y in (range(cy - ring, cy + ring + 1) if abs(x - cx) == ring else (cy - ring, cy + ring)):
+                    for candidate, item in self.cells.get((x, y), ()):
+                        d = distance(point, candidate)
+                        if d < best_distance:
+                            best, best_distance = item, d
+        return best, best_distance
+
+
+class StarRoute:
+    """
+    大地图上的星星路线, 加载时规划一次访问顺序, 之后按顺序走, 走到或者路过的星星从路线和索引里删除
+    """
+
+    def __init__(self, stars, start, max_distance=0, cell_size=64, position=None):
+        """
+        Args:
+            stars: 星星, 默认是Box
+            start: 起点, 会放在路线的第一个
+            max_distance: 相邻两个星星的最大距离, 0为不限制
+            cell_size: 索引格子的大小
+            position: 取坐标的函数, 默认用Box.center()
+        """
+        self.position = position or (lambda item: item.center())
+        start_point = self.position(start)
+        points = [self.position(star) for star in stars]
+        order, greedy = plan_route(start_point, points, max_distance)
+        self.length = path_length(start_point, [points[i] for i in order])
+        self.greedy_length = path_length(start_point, [points[i] for i in greedy])
+        self.dropped = len(stars) - len(order)
+        self.stars = [start] + [stars[i] for i in order]
+        self.index = GridIndex(cell_size)
+        for star in self.stars:
+            self.index.add(self.position(star), star)
+
+    def __len__(self):
+        return len(self.stars)
+
+    def remove(self, star):
+        self.stars.remove(star)
+        self.index.remove(self.position(star), star)
+
+    def closest(self, item):
+        """
+        Returns:
+            (剩下的星星里离item最近的, 距离)
+        """
+        return self.index.closest(self.position(item))
@@ -7,8 +7,10 @@ import numpy as np  # noqa
 
 from ok import Config, Logger  # noqa
 from src import text_white_color  # noqa
+from src.roi import rois, scaled
 
 SKILL_TIME_OUT = 10
+rois.declare('forte_full', scaled(3840, 2160, 2251, 1993, 2311, 2016, name='forte_full', hcenter=True))
 
 
 class Priority(IntEnum):
@@ -377,18 +379,21 @@ class BaseChar:
         current = time.time()
         if current - self.last_res > self.res_cd:  # count the first click only
             self.last_res = time.time()
+            self.task.cd_estimator.cast(self.index, 'resonance', self.res_cd)
 
     def update_liberation_cd(self):
         """更新共鸣解放的最后使用时间。"""
         current = time.time()
         if current - self.last_liberation > (self.liberation_cd - 2):  # count the first click only
             self.last_liberation = time.time()
+            self.task.cd_estimator.cast(self.index, 'liberation', self.liberation_cd)
 
     def update_echo_cd(self):
         """更新声骸技能的最后使用时间。"""
         current = time.time()
         if current - self.last_echo > self.echo_cd:  # count the first click only
             self.last_echo = time.time()
+            self.task.cd_estimator.cast(self.index, 'echo', self.echo_cd)
 
     def click_echo(self, duration=0, sleep_time=0, time_out=1):
         """尝试点击并释放声骸技能。
@@ -675,8 +680,8 @@ class BaseChar:
         Returns:
             bool: 如果充满/可用则返回 True。
         """
-        box = self.task.box_of_screen_scaled(3840, 2160, 2251, 1993, 2311, 2016, name='forte_full', hcenter=True)
-        white_percent = self.task.calculate_color_percentage(forte_white_color, box)
+        box = self.task.roi('forte_full')
+        white_percent = self.task.hud_readings()['forte_full']
         # num_labels, stats = get_connected_area_by_color(box.crop_frame(self.task.frame), forte_white_color,
         #                                                 connectivity=8)
         # total_area = 0
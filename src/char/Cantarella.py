@@ -63,7 +63,7 @@ class Cantarella(BaseChar):
 
     def is_forte_full(self):
         box = self.task.box_of_screen_scaled(5120, 2880, 3034, 2640, 3090, 2700, name='forte_full', hcenter=True)
-        white_percent = self.task.calculate_color_percentage(forte_white_color, box)
+        white_percent = self.task.hud_reading('cantarella_forte_full', box, forte_white_color)
         self.logger.debug(f'forte_color_percent {white_percent}')
         return white_percent > 0.06
         
@@ -147,7 +147,7 @@ class Cartethyia(BaseChar):
             box = self.task.box_of_screen_scaled(3840, 2160, 2298, 1997, 2361, 2022, name='inner_cartethyia_space',
                                                  hcenter=True)
             self.task.draw_boxes(box.name, box)
-            if self.task.calculate_color_percentage(forte_white_color, box) > 0.15:
+            if self.task.hud_reading('inner_cartethyia_space', box, forte_white_color) > 0.15:
                 cropped = box.crop_frame(self.task.frame)
                 gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
                 mean_val = np.mean(gray)
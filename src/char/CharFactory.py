@@ -80,19 +80,33 @@ char_dict = {
 char_names = char_dict.keys()
 
 
-def get_char_by_pos(task, box, index, old_char):
+def get_char_by_pos(task, box, index, old_char, portrait_index=None):
     highest_confidence = 0
     info = None
     name = "unknown"
     char = None
+    fingerprint = None
+    if portrait_index is not None:
+        fingerprint = portrait_index.fingerprint(task, box)
+        if old_char and old_char.char_name in char_names and portrait_index.unchanged(index, fingerprint):
+            portrait_index.reused += 1
+            return old_char
+        portrait_index.forget(index)
     if old_char and old_char.char_name in char_names:
         char = task.find_one(old_char.char_name, box=box, threshold=0.72)
         if char:
+            if fingerprint is not None:
+                portrait_index.remember(index, fingerprint)
             return old_char
 
     if not char:
-        char = task.find_best_match_in_box(box, char_names, threshold=0.72)
+        if portrait_index is not None:
+            char = portrait_index.match(task, box, threshold=0.72)
+        else:
+            char = task.find_best_match_in_box(box, char_names, threshold=0.72)
         if char:
+            if fingerprint is not None:
+                portrait_index.remember(index, fingerprint)
             info = char_dict.get(char.name)
             name = char.name
             cls = info.get('cls')
@@ -105,7 +119,7 @@ def get_char_by_pos(task, box, index, old_char):
     if has_cd and is_float(has_cd[0].name):
         task.log_info(f'found char {has_cd[0]} wait and reload')
         task.next_frame()
-        return get_char_by_pos(task, box, index, old_char)
+        return get_char_by_pos(task, box, index, old_char, portrait_index)
     if task.debug:
         task.screenshot(f'could not find char {index}')
     return BaseChar(task, index, char_name=name)
@@ -434,7 +434,7 @@ class Phoebe(BaseChar):
             box = self.task.box_of_screen_scaled(3840, 2160, 2256, 1992, 2276, 2018, name='forte_full', hcenter=True)
         self.task.draw_boxes(box.name, box)
         mean_val = contrast_val = 0
-        if self.task.calculate_color_percentage(forte_white_color, box) > 0.08:
+        if self.task.hud_reading(f'phoebe_forte_full_{self.attribute}', box, forte_white_color) > 0.08:
             cropped = box.crop_frame(self.task.frame)
             gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
             mean_val = np.mean(gray)
@@ -0,0 +1,125 @@
+import cv2
+import numpy as np
+
+from ok import Logger
+
+logger = Logger.get_logger(__name__)
+
+ATLAS_SIZE = 16
+
+
+def dhash(image, size=8):
+    """
+    差值哈希, 返回size*size位的int
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def atlas_vector(image):
+    """
+    缩小到ATLAS_SIZE后减均值归一化, 两个向量的点积近似两张图的相关系数
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    vector = cv2.resize(gray, (ATLAS_SIZE, ATLAS_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class PortraitIndex:
+    """
+    队伍头像识别
+    1. 每个槽位的头像区域算dhash, 和上次相同就直接用上次的角色
+    2. 否则用所有头像缩小后的atlas一次矩阵乘法排序, 只对最像的top_k个用find_one确认
+    3. top_k都没确认时才回退到逐个模板匹配
+    """
+
+    def __init__(self, names, slot_names=('box_char_1', 'box_char_2', 'box_char_3'), top_k=3, max_distance=4):
+        self.names = list(names)
+        self.slot_names = slot_names
+        self.top_k = top_k
+        self.max_distance = max_distance
+        self.hashes = {}
+        self.frame_size = None
+        self.atlas = None
+        self.atlas_names = []
+        self.offsets = []
+        self.reused = 0
+        self.atlas_matched = 0
+        self.full_matched = 0
+
+    def reset(self):
+        self.hashes = {}
+
+    def fingerprint(self, task, box):
+        return dhash(task.frame[box.y:box.y + box.height, box.x:box.x + box.width])
+
+    def unchanged(self, index, fingerprint):
+        last = self.hashes.get(index)
+        return last is not None and bin(last ^ fingerprint).count('1') <= self.max_distance
+
+    def remember(self, index, fingerprint):
+        self.hashes[index] = fingerprint
+
+    def forget(self, index):
+        self.hashes.pop(index, None)
+
+    def ensure_atlas(self, task):
+        """
+        分辨率变化时重建, 记录每个头像相对它所在槽位的位置
+        """
+        frame_size = task.frame.shape[:2]
+        if self.atlas is not None and self.frame_size == frame_size:
+            return
+        slots = [task.get_box_by_name(name) for name in self.slot_names]
+        vectors = []
+        self.atlas_names = []
+        self.offsets = []
+        for name in self.names:
+            feature = task.get_feature_by_name(name)
+            if feature is None:
+                continue
+            center_y = feature.y + feature.height / 2
+            slot = min(slots, key=lambda s: abs(s.y + s.height / 2 - center_y))
+            vectors.append(atlas_vector(feature.mat))
+            self.atlas_names.append(name)
+            self.offsets.append((round(feature.x - slot.x), round(feature.y - slot.y), feature.width, feature.height))
+        self.atlas = np.stack(vectors) if vectors else np.zeros((0, ATLAS_SIZE * ATLAS_SIZE), dtype=np.float32)
+        self.frame_size = frame_size
+        logger.info(f'portrait atlas built {len(self.atlas_names)} portraits for {frame_size}')
+
+    def rank(self, task, box):
+        """
+        Returns:
+            按atlas相似度从高到低排序的头像名
+        """
+        self.ensure_atlas(task)
+        crop = task.frame[box.y:box.y + box.height, box.x:box.x + box.width]
+        candidates = np.empty_like(self.atlas)
+        for i, (x, y, w, h) in enumerate(self.offsets):
+            region = crop[max(0, y):max(0, y) + h, max(0, x):max(0, x) + w]
+            if region.size == 0:
+                candidates[i] = 0
+            else:
+                candidates[i] = atlas_vector(region)
+        scores = np.einsum('ij,ij->i', self.atlas, candidates)
+        return [self.atlas_names[i] for i in np.argsort(-scores)]
+
+    def match(self, task, box, threshold):
+        """
+        和find_best_match_in_box返回相同的Box, 大部分情况下只匹配top_k个模板
+        """
+        ranked = self.rank(task, box)
+        best = None
+        for name in ranked[:self.top_k]:
+            found = task.find_one(name, box=box, threshold=threshold)
+            if found and (best is None or found.confidence > best.confidence):
+                best = found
+        if best is not None:
+            self.atlas_matched += 1
+            return best
+        self.full_matched += 1
+        return task.find_best_match_in_box(box, self.names, threshold=threshold)
@@ -5,6 +5,10 @@ import cv2
 import numpy as np
 
 from src.char.BaseChar import BaseChar, Priority, text_white_color, forte_white_color
+from src.roi import rois, scaled
+
+rois.declare('zani_attack_text', scaled(3840, 2160, 2709, 1894, 2827, 1972, name='box_attack', hcenter=True))
+rois.declare('zani_forte_full', scaled(3840, 2160, 2284, 1992, 2311, 2019, name='forte_full', hcenter=True))
 
 
 class State(Enum):
@@ -42,7 +46,7 @@ class Zani(BaseChar):
         return 1
 
     def current_attack(self):
-        box = self.task.box_of_screen_scaled(3840, 2160, 2709, 1894, 2827, 1972, name='box_attack', hcenter=True)
+        box = self.task.roi('zani_attack_text')
         self.task.draw_boxes(box.name, box)
         return self.task.calculate_color_percentage(text_white_color, box)
 
@@ -403,11 +407,11 @@ class Zani(BaseChar):
         )
 
     def is_forte_full(self):
-        box = self.task.box_of_screen_scaled(3840, 2160, 2284, 1992, 2311, 2019, name='forte_full', hcenter=True)
+        box = self.task.roi('zani_forte_full')
         self.task.draw_boxes(box.name, box)
         mean_val = contrast_val = 0
-        if self.task.calculate_color_percentage(forte_white_color, box) > 0.08:
-            cropped = box.crop_frame(self.task.frame)
+        if self.task.hud_reading('zani_forte_full', box, forte_white_color) > 0.08:
+            cropped = self.task.roi_view('zani_forte_full')
             gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
             mean_val = np.mean(gray)
             contrast_val = np.std(gray)
@@ -0,0 +1,37 @@
+import cv2
+
+
+def color_bounds(color_range):
+    return ((color_range['b'][0], color_range['g'][0], color_range['r'][0]),
+            (color_range['b'][1], color_range['g'][1], color_range['r'][1]))
+
+
+def color_percentages(frame, regions):
+    """
+    一次计算多个区域的颜色占比, 结果和对每个区域调用calculate_color_percentage相同
+    同一个区域只裁剪一次, 同一区域的多个颜色共用一个截图
+    Args:
+        frame: 当前帧
+        regions: [(Box, 颜色范围), ...]
+    Returns:
+        list[float]: 和regions顺序相同的占比, 区域超出画面时为0
+    """
+    crops = {}
+    percentages = []
+    frame_height, frame_width = frame.shape[:2]
+    for box, color_range in regions:
+        key = (box.x, box.y, box.width, box.height)
+        crop = crops.get(key)
+        if crop is None:
+            if (box.x >= 0 and box.y >= 0 and box.x + box.width <= frame_width
+                    and box.y + box.height <= frame_height and box.width > 0 and box.height > 0):
+                crop = frame[box.y:box.y + box.height, box.x:box.x + box.width, :3]
+            else:
+                crop = False
+            crops[key] = crop
+        if crop is False:
+            percentages.append(0)
+            continue
+        lower, upper = color_bounds(color_range)
+        percentages.append(cv2.countNonZero(cv2.inRange(crop, lower, upper)) / (crop.shape[0] * crop.shape[1]))
+    return percentages
@@ -3,14 +3,23 @@ import time
 
 import win32api
 
-from ok import find_boxes_by_name, Logger
+from ok import find_boxes_by_name, Logger, og
 from ok import find_color_rectangles, get_mask_in_color_range, is_pure_black
 from src import text_white_color
+from src.CdEstimator import CdEstimator
+from src.OcrWorker import OcrWorker
 from src.char.Roccia import Roccia
+from src.roi import rois, scaled, relative
 from src.task.BaseWWTask import BaseWWTask
 
 logger = Logger.get_logger(__name__)
 
+rois.declare('check_count_down', scaled(3840, 2160, 1820, 266, 2100, 340, name='check_count_down', hcenter=True))
+rois.declare('target_area_box', relative(0.1, 0.10, 0.9, 0.9, name='target_area_box', hcenter=True))
+rois.declare('boss_health_bar', relative(1269 / 3840, 58 / 2160, 2533 / 3840, 200 / 2160, name='boss_health_bar'))
+rois.declare('boss_lv_text', relative(1269 / 3840, 10 / 2160, 2533 / 3840, 140 / 2160, name='boss_lv_text',
+                                      hcenter=True))
+
 
 class CombatCheck(BaseWWTask):
 
@@ -35,10 +44,11 @@ class CombatCheck(BaseWWTask):
         self.combat_end_condition = None
         self._in_illusive = False
         self.has_lavitator = False
-        self.cds = {
-        }
+        self.cd_estimator = CdEstimator(lambda start: self.time_elapsed_accounting_for_freeze(start))
         self.cd_refreshed = False
         self.esc_count = 0
+        self.ocr_worker = None
+        self._ocr_jobs = {}
 
     @property
     def in_liberation(self):
@@ -70,7 +80,14 @@ class CombatCheck(BaseWWTask):
         return False
 
     def do_reset_to_false(self):
-        self.cds = {}
+        if self.cd_estimator.checks:
+            logger.info(f'cd estimator this combat {self.cd_estimator}')
+            self.info['CD Reads Saved'] = f'{self.cd_estimator.saved}/{self.cd_estimator.checks}'
+        self.cd_estimator.reset()
+        if self.ocr_worker is not None:
+            self.info['OCR Worker'] = str(self.ocr_worker)
+        for name in list(self._ocr_jobs):
+            self.drop_ocr(name)
         self.cd_refreshed = False
         self._in_combat = False
         self.boss_lv_mask = None
@@ -92,35 +109,79 @@ class CombatCheck(BaseWWTask):
         return time.time() - self._last_liberation < 0.15
 
     def check_count_down(self):
-        count_down_area = self.box_of_screen_scaled(3840, 2160, 1820, 266, 2100,
-                                                    340, name="check_count_down", hcenter=True)
+        count_down_area = self.roi('check_count_down')
         count_down = self.calculate_color_percentage(text_white_color,
                                                      count_down_area)
 
         if self.has_count_down:
-            if count_down < 0.03:
-                numbers = self.ocr(box=count_down_area, match=count_down_re)
-                if self.debug:
-                    self.screenshot(f'count_down disappeared {count_down:.2f}%')
-                logger.info(f'count_down disappeared {numbers} {count_down:.2f}%')
-                if not numbers:
-                    self.has_count_down = False
-                    return False
-                else:
-                    return True
-            else:
-                return True
+            changed = count_down < 0.03
         else:
-            if count_down > 0.03:
-                numbers = self.ocr(box=count_down_area, match=count_down_re)
-                if numbers:
-                    self.has_count_down = True
-                logger.info(f'set count_down to {self.has_count_down}  {numbers} {count_down:.2f}%')
+            changed = count_down > 0.03
+        if not changed:
+            # 颜色又变回去了, 之前提交的识别结果不再对应这次变化
+            self.drop_ocr('count_down')
             return self.has_count_down
+        if og.my_app.ocr_async:
+            result = self.ocr_result('count_down')
+            if result is None:
+                # 结果在之后的帧里取, 这次保持原来的状态
+                self.submit_ocr('count_down', count_down_area, match=count_down_re)
+                return self.has_count_down
+            numbers, frame = result
+        else:
+            numbers, frame = self.ocr(box=count_down_area, match=count_down_re), self.frame
+        if self.has_count_down and self.debug:
+            self.screenshot(f'count_down disappeared {count_down:.2f}%', frame=frame)
+        self.has_count_down = bool(numbers)
+        logger.info(f'set count_down to {self.has_count_down}  {numbers} {count_down:.2f}%')
+        return self.has_count_down
+
+    def submit_ocr(self, name, box, **params):
+        """
+        当前帧的区域交给后台OCR, 同名的任务还没取走结果时不重复提交
+        """
+        if name in self._ocr_jobs:
+            return self._ocr_jobs[name][0]
+        if self.ocr_worker is None:
+            config = og.config.get('ocr_worker', {})
+            self.ocr_worker = OcrWorker(self.worker_ocr, lock=og.my_app.ocr_lock,
+                                        max_pending=config.get('max_pending', 2),
+                                        max_age=config.get('max_age', 0.5))
+        timestamp = time.time()
+        future = self.ocr_worker.submit(self.frame, box, timestamp=timestamp, **params)
+        self._ocr_jobs[name] = (future, self.frame, timestamp)
+        return future
+
+    def drop_ocr(self, name):
+        job = self._ocr_jobs.pop(name, None)
+        if job is not None:
+            job[0].cancel()
+
+    def ocr_result(self, name):
+        """
+        取走后台OCR的结果
+        Returns:
+            (文字框, 提交时的截图), 还没完成, 被丢弃, 出错或者截图已经超过max_age时返回None
+        """
+        job = self._ocr_jobs.get(name)
+        if job is None or not job[0].done():
+            return None
+        del self._ocr_jobs[name]
+        future, frame, timestamp = job
+        if future.cancelled() or time.time() - timestamp > self.ocr_worker.max_age:
+            return None
+        if (e := future.exception()) is not None:
+            logger.error(f'ocr worker {name} failed: {e}')
+            return None
+        return future.result(), frame
+
+    def worker_ocr(self, frame, box, params):
+        # 在OcrWorker线程里执行, 不走只给主线程用的帧缓存
+        return super(BaseWWTask, self).ocr(box=box, frame=frame, **params)
 
     @property
     def target_area_box(self):
-        return self.box_of_screen(0.1, 0.10, 0.9, 0.9, hcenter=True, name="target_area_box")
+        return self.roi('target_area_box')
 
     def in_combat(self):
         if self.in_liberation or self.recent_liberation():
@@ -152,7 +213,8 @@ class CombatCheck(BaseWWTask):
             from src.task.AutoCombatTask import AutoCombatTask
             has_target = self.has_target()
             in_combat = has_target or ((self.config.get('Auto Target') or not isinstance(self,
-                                                                                         AutoCombatTask)) and self.check_health_bar())
+                                                                                         AutoCombatTask)) and self.check_health_bar(
+                async_ocr=og.my_app.ocr_async))
             if in_combat:
                 self._in_illusive = self.in_illusive_realm()
                 if not has_target and not self.target_enemy(wait=True):
@@ -261,7 +323,7 @@ class CombatCheck(BaseWWTask):
             return True
         else:
             boxes = find_color_rectangles(self.frame, boss_health_color, min_width, min_height * 1.3,
-                                          box=self.box_of_screen(1269 / 3840, 58 / 2160, 2533 / 3840, 200 / 2160))
+                                          box=self.roi('boss_health_bar'))
             if len(boxes) == 1:
                 self.boss_health_box = boxes[0]
                 self.boss_health_box.width = 10
@@ -271,15 +333,30 @@ class CombatCheck(BaseWWTask):
                 return True
         return False
 
-    def check_health_bar(self):
+    def check_health_bar(self, async_ocr=False):
         if self.has_health_bar():
+            self.drop_ocr('boss_lv_text')
             return True
+        elif async_ocr:
+            return self.find_boss_lv_text_async()
         else:
             return self.find_boss_lv_text()
 
     def find_boss_lv_text(self):
-        texts = self.ocr(box=self.box_of_screen(1269 / 3840, 10 / 2160, 2533 / 3840, 140 / 2160, hcenter=True),
-                         target_height=540, name='boss_lv_text')
+        texts = self.ocr(box=self.roi('boss_lv_text'), target_height=540, name='boss_lv_text')
+        return self.on_boss_lv_text(texts, self.frame)
+
+    def find_boss_lv_text_async(self):
+        """
+        取上次提交的boss等级识别结果, 再提交当前帧, 没有结果时返回False
+        """
+        result = self.ocr_result('boss_lv_text')
+        self.submit_ocr('boss_lv_text', self.roi('boss_lv_text'), target_height=540, name='boss_lv_text')
+        if result is None:
+            return False
+        return self.on_boss_lv_text(*result)
+
+    def on_boss_lv_text(self, texts, frame):
         fps_text = find_boxes_by_name(texts,
                                       re.compile(r'FPS', re.IGNORECASE))
         if fps_text:
@@ -289,14 +366,14 @@ class CombatCheck(BaseWWTask):
         if len(boss_lv_texts) > 0:
             logger.debug(f'boss_lv_texts: {boss_lv_texts}')
             self.boss_lv_box = boss_lv_texts[0]
-            self.boss_lv_template, self.boss_lv_mask = self.keep_boss_text_white()
+            self.boss_lv_template, self.boss_lv_mask = self.keep_boss_text_white(frame)
             if self.boss_lv_template is None:
                 self.boss_lv_box = None
                 return False
             return True
 
-    def keep_boss_text_white(self):
-        cropped = self.boss_lv_box.crop_frame(self.frame)
+    def keep_boss_text_white(self, frame=None):
+        cropped = self.boss_lv_box.crop_frame(self.frame if frame is None else frame)
         mask, area = get_mask_in_color_range(cropped, boss_white_text_color)
         if area / mask.shape[0] * mask.shape[1] < 0.05:
             mask, area = get_mask_in_color_range(cropped, boss_orange_text_color)
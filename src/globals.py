@@ -1,10 +1,16 @@
 import os.path
+import threading
+import time
 from os import path
 
 import cv2
 from PySide6.QtCore import Signal, QObject
 
-from ok import Config, Logger, get_path_relative_to_exe, og
+from ok import Config, Logger, get_path_relative_to_exe, og, Box
+from src.ArrowAngleEstimator import ArrowAngleEstimator
+from src.CdReader import CdReader, GLYPH_FILE
+from src.template_pack import install_template_pack
+from src.yolo_postprocess import filter_detections
 
 logger = Logger.get_logger(__name__)
 
@@ -14,27 +20,187 @@ class Globals(QObject):
     def __init__(self, exit_event):
         super().__init__()
         self._yolo_model = None
+        self._yolo_model_lock = threading.Lock()
+        self._yolo_cache_lock = threading.Lock()
+        self._yolo_cache_frame = None
+        self._yolo_cache = {}
+        self.yolo_cache_hits = 0
+        self.yolo_cache_misses = 0
+        self._processed_lock = threading.Lock()
+        self._processed_frame = None
+        self._processed = {}
+        self.processed_hits = 0
+        self.processed_misses = 0
+        # OCR库的推理不能在两个线程同时调用, 主线程和OcrWorker共用
+        self.ocr_lock = threading.Lock()
         self.mini_map_arrow = None
+        self.cd_reader = CdReader(get_path_relative_to_exe(GLYPH_FILE))
         self.logged_in = False
+        executor = getattr(og, 'executor', None)
+        if executor is not None:
+            install_template_pack(executor.feature_set)
+        if og.config.get('yolo', {}).get('preload', False):
+            threading.Thread(target=self.preload_yolo_model, name="preload_yolo_model", daemon=True).start()
 
     @property
     def yolo_model(self):
         if self._yolo_model is None:
-            weights = get_path_relative_to_exe(os.path.join("assets", "echo_model", "echo.onnx"))
-            if og.config.get("ocr").get("params").get("use_openvino"):
-                logger.info("yolo_model Using OpenVinoYolo8Detect")
-                from src.OpenVinoYolo8Detect import OpenVinoYolo8Detect
-                self._yolo_model = OpenVinoYolo8Detect(
-                    weights=weights)
-            else:
-                logger.info("yolo_model Using OnnxYolo8Detect")
-                from src.OnnxYolo8Detect import OnnxYolo8Detect
-                self._yolo_model = OnnxYolo8Detect(
-                    weights=weights)
+            with self._yolo_model_lock:
+                if self._yolo_model is None:
+                    self._yolo_model = self._create_yolo_model()
         return self._yolo_model
 
-    def yolo_detect(self, image, threshold=0.6, label=-1):
-        return self.yolo_model.detect(image, threshold=threshold, label=label)
+    def arrow_estimator(self, template):
+        """
+        小地图箭头的旋转模板库, 分辨率变化后模板重新加载时重建
+        """
+        if self.mini_map_arrow is None or self.mini_map_arrow.template is not template:
+            start = time.perf_counter()
+            self.mini_map_arrow = ArrowAngleEstimator(template)
+            logger.info(f'built arrow template bank {template.shape} in {(time.perf_counter() - start) * 1000:.1f}ms')
+        return self.mini_map_arrow
+
+    def process_frame(self, frame, frame_processor, area):
+        """
+        同一帧同一区域的frame_processor结果只算一次
+        Args:
+            frame: 当前帧
+            frame_processor: 处理函数, 比如binarize_for_matching
+            area: frame的切片, 用切片在内存中的位置和形状作为区域的key
+        """
+        key = (frame_processor, area.__array_interface__['data'][0], area.shape, area.strides)
+        with self._processed_lock:
+            if frame is not self._processed_frame:
+                # 新的一帧, 之前的结果全部失效
+                self._processed_frame = frame
+                self._processed = {}
+            processed = self._processed.get(key)
+            if processed is not None:
+                self.processed_hits += 1
+                return processed
+        self.processed_misses += 1
+        processed = frame_processor(area)
+        with self._processed_lock:
+            if frame is self._processed_frame:
+                self._processed[key] = processed
+        return processed
+
+    def _create_yolo_model(self):
+        weights = get_path_relative_to_exe(os.path.join("assets", "echo_model", "echo.onnx"))
+        model = og.config.get('yolo', {}).get('model', 'echo.onnx')
+        if model != 'echo.onnx':
+            selected = get_path_relative_to_exe(os.path.join("assets", "echo_model", model))
+            if os.path.exists(selected):
+                weights = selected
+            else:
+                logger.error(f"yolo_model {selected} not found, using echo.onnx")
+        if og.config.get("ocr").get("params").get("use_openvino"):
+            logger.info(f"yolo_model Using OpenVinoYolo8Detect {weights}")
+            from src.OpenVinoYolo8Detect import OpenVinoYolo8Detect
+            cache_dir = os.path.join(og.config.get('config_folder', 'configs'), 'openvino_cache')
+            return OpenVinoYolo8Detect(weights=weights, cache_dir=get_path_relative_to_exe(cache_dir),
+                                       inference=og.config.get('yolo', {}).get('inference'))
+        else:
+            logger.info(f"yolo_model Using OnnxYolo8Detect {weights}")
+            from src.OnnxYolo8Detect import OnnxYolo8Detect
+            return OnnxYolo8Detect(
+                weights=weights, inference=og.config.get('yolo', {}).get('inference'))
+
+    def preload_yolo_model(self):
+        """
+        后台线程创建模型并预热, 第一次找声骸时不用再等模型加载和编译
+        """
+        try:
+            start = time.perf_counter()
+            model = self.yolo_model
+            loaded = time.perf_counter() - start
+            yolo_config = og.config.get('yolo', {})
+            sizes = {settings.get('size') for settings in yolo_config.get('profiles', {}).values()}
+            shapes = [None] + [(size, size) for size in sorted(s for s in sizes if s)]
+            warm_ups = []
+            for shape in shapes:
+                cold = model.warm_up(shape)
+                warm = model.warm_up(shape)
+                warm_ups.append(f'{shape or model.input_shape} cold {cold * 1000:.0f}ms warm {warm * 1000:.0f}ms')
+            logger.info(f'preload_yolo_model {model.backend} loaded in {loaded * 1000:.0f}ms, '
+                        f'total {(time.perf_counter() - start) * 1000:.0f}ms, {", ".join(warm_ups)}')
+        except Exception as e:
+            logger.error(f'preload_yolo_model error: {e}')
+
+    def yolo_detect(self, image, threshold=0.6, label=-1, roi=None, profile=None):
+        input_shape, roi = self.yolo_profile(image, roi, profile)
+        cache_threshold = og.config.get('yolo', {}).get('cache_threshold', 0)
+        if not cache_threshold or threshold < cache_threshold:
+            return self.yolo_model.detect(image, threshold=threshold, label=label, roi=roi, input_shape=input_shape)
+        key = (input_shape, None if roi is None else (roi.x, roi.y, roi.width, roi.height))
+        with self._yolo_cache_lock:
+            if image is not self._yolo_cache_frame:
+                # 新的一帧, 之前的结果全部失效
+                self._yolo_cache_frame = image
+                self._yolo_cache = {}
+            detections = self._yolo_cache.get(key)
+            if detections is not None:
+                self.yolo_cache_hits += 1
+        if detections is None:
+            self.yolo_cache_misses += 1
+            try:
+                detections = self.yolo_model.detect_arrays(image, threshold=cache_threshold, roi=roi,
+                                                           input_shape=input_shape)
+            except Exception as e:
+                logger.error(f'yolo_detect error: {e}')
+                return []
+            with self._yolo_cache_lock:
+                if image is self._yolo_cache_frame:
+                    self._yolo_cache[key] = detections
+        # 每次返回新的Box, 调用方会修改Box
+        return self.yolo_model.to_boxes(*filter_detections(*detections, threshold, label))
+
+    def yolo_detect_batch(self, images, threshold=0.6, label=-1, roi=None, profile=None):
+        input_shape, roi = self.yolo_profile(images[0], roi, profile)
+        return self.yolo_model.detect_batch(images, threshold=threshold, label=label, roi=roi,
+                                            input_shape=input_shape)
+
+    @property
+    def yolo_track(self):
+        return og.config.get('yolo', {}).get('track', False)
+
+    @property
+    def yolo_batch_scan(self):
+        return og.config.get('yolo', {}).get('batch_scan', False)
+
+    def yolo_profile(self, image, roi=None, profile=None):
+        """
+        Returns:
+            (模型输入尺寸 (height, width), 检测区域 Box 或 None)
+        """
+        yolo_config = og.config.get('yolo', {})
+        if profile is None:
+            profile = yolo_config.get('profile')
+        if profile is None:
+            return None, roi
+        settings = yolo_config.get('profiles', {}).get(profile)
+        if settings is None:
+            raise ValueError(f'yolo profile {profile} not found')
+        size = settings.get('size')
+        if roi is None and settings.get('roi') is not None:
+            h, w = image.shape[:2]
+            x, y, to_x, to_y = settings['roi']
+            roi = Box(int(x * w), int(y * h), to_x=int(to_x * w), to_y=int(to_y * h), name=profile)
+        return (size, size) if size else None, roi
+
+    @property
+    def yolo_async(self):
+        return og.config.get('yolo', {}).get('async', False)
+
+    @property
+    def ocr_async(self):
+        return og.config.get('ocr_worker', {}).get('async', False)
+
+    def yolo_submit(self, image, timestamp=None):
+        self.yolo_model.submit(image, timestamp)
+
+    def yolo_latest(self, threshold=0.6, label=-1):
+        return self.yolo_model.latest(threshold=threshold, label=label)
 
 
 if __name__ == "__main__":
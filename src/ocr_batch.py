@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+
+
+def containers(rects):
+    """
+    被其它区域完整包含的区域不用单独识别, 从包含它的最大区域的结果里取
+    Args:
+        rects: [(x, y, width, height)]
+    Returns:
+        list[int]: 每个区域由哪个区域识别, 不被包含的是自己
+    """
+    result = []
+    for i, (x, y, w, h) in enumerate(rects):
+        owner = i
+        for j, (ox, oy, ow, oh) in enumerate(rects):
+            if ox <= x and oy <= y and x + w <= ox + ow and y + h <= oy + oh:
+                area, owner_area = ow * oh, rects[owner][2] * rects[owner][3]
+                if area > owner_area or (area == owner_area and j < owner):
+                    owner = j
+        result.append(owner)
+    return result
+
+
+def tile(crops, gap=32):
+    """
+    多个区域的截图按行排进一张接近正方形的图, 中间用黑色隔开, 一次OCR识别所有区域
+    接近正方形是为了检测模型限制最长边时少缩小
+    Args:
+        crops: 区域截图, 通道数相同
+        gap: 区域之间的间隔, 要比文字高, 避免检测时把相邻两块的文字连在一起
+    Returns:
+        (拼接图, [(区域在拼接图上的x, y, 宽, 高)])
+    """
+    row_width = max(max(crop.shape[1] for crop in crops),
+                    math.ceil(math.sqrt(sum(crop.shape[0] * crop.shape[1] for crop in crops))))
+    tiles = []
+    x = y = row_height = 0
+    for crop in crops:
+        height, width = crop.shape[:2]
+        if x > 0 and x + width > row_width:
+            x, y, row_height = 0, y + row_height + gap, 0
+        tiles.append((x, y, width, height))
+        x += width + gap
+        row_height = max(row_height, height)
+    canvas = np.zeros((y + row_height, max(tx + tw for tx, _, tw, _ in tiles)) + crops[0].shape[2:],
+                      dtype=crops[0].dtype)
+    for (tx, ty, tw, th), crop in zip(tiles, crops):
+        canvas[ty:ty + th, tx:tx + tw] = crop
+    return canvas, tiles
+
+
+def inside(box, rect):
+    """
+    文字框的中心在区域(x, y, width, height)里
+    """
+    x, y, width, height = rect
+    center_x, center_y = box.x + box.width / 2, box.y + box.height / 2
+    return x <= center_x < x + width and y <= center_y < y + height
+
+
+def untile(boxes, tiles, origins):
+    """
+    拼接图上识别到的文字框按中心点分回各个区域, 坐标改成画面上的坐标, 落在间隔里的丢掉
+    Args:
+        boxes: 拼接图上的文字框, 有x, y, width, height属性, 原地修改
+        tiles: tile返回的区域位置
+        origins: 每个区域在画面上的左上角(x, y)
+    Returns:
+        list[list]: 每个区域的文字框
+    """
+    results = [[] for _ in tiles]
+    for box in boxes:
+        for i, rect in enumerate(tiles):
+            if inside(box, rect):
+                box.x += origins[i][0] - rect[0]
+                box.y += origins[i][1] - rect[1]
+                results[i].append(box)
+                break
+    return results
@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+
+# 在大范围里搜索的模板, 值为粗搜时的缩小倍数, 由tools/validate_pyramid.py在result.json的标注图上验证
+PYRAMID_FEATURES = {
+    'map_way_point': 4,
+    'map_way_point_big': 4,
+    'boss_check_mark': 4,
+    'boss_no_check_mark': 4,
+    'treasure_icon': 4,
+    'big_map_star': 4,
+    'big_map_diamond': 4,
+}
+
+MIN_TEMPLATE_SIDE = 6  # 缩小后模板的最短边, 再小粗搜就不可靠了
+COARSE_MARGIN = 0.25  # 粗搜阈值比原阈值低多少, 缩小后的相似度会偏低
+MIN_AREA_RATIO = 16  # 搜索区域不到模板面积的这个倍数时直接全图匹配更快
+
+
+def pyramid_factor(template_shape, search_shape, factor):
+    """
+    实际使用的缩小倍数, 模板太小时降低倍数, 返回1表示不需要金字塔匹配
+    """
+    template_height, template_width = template_shape[:2]
+    search_height, search_width = search_shape[:2]
+    if search_height * search_width < template_height * template_width * MIN_AREA_RATIO:
+        return 1
+    while factor > 1 and min(template_height, template_width) / factor < MIN_TEMPLATE_SIDE:
+        factor //= 2
+    return max(factor, 1)
+
+
+def pyramid_match(search_area, template, threshold, factor, mask=None, limit=0, max_candidates=256):
+    """
+    先在缩小的图上找候选位置, 再只在候选位置附近用原图匹配, 结果和cv2.matchTemplate加阈值过滤一致
+    Args:
+        search_area: 搜索区域的截图
+        template: 模板
+        threshold: TM_CCOEFF_NORMED阈值
+        factor: 缩小倍数, 模板太小时会自动降低
+        mask: 模板的mask
+        limit: 1时只返回最好的一个
+        max_candidates: 最多验证多少个候选位置, 要找全部结果时候选超过这个数退回全图匹配
+    Returns:
+        list[(x, y, confidence)]: 相对search_area的坐标, 置信度从高到低, 互不重叠; 不适合金字塔匹配时返回None
+    """
+    factor = pyramid_factor(template.shape, search_area.shape, factor)
+    if factor <= 1:
+        return None
+    template_height, template_width = template.shape[:2]
+    search_height, search_width = search_area.shape[:2]
+    small_area = cv2.resize(search_area, (search_width // factor, search_height // factor),
+                            interpolation=cv2.INTER_AREA)
+    small_template = cv2.resize(template, (template_width // factor, template_height // factor),
+                                interpolation=cv2.INTER_AREA)
+    small_mask = None
+    if mask is not None:
+        small_mask = cv2.resize(mask, (small_template.shape[1], small_template.shape[0]),
+                                interpolation=cv2.INTER_NEAREST)
+    coarse = cv2.matchTemplate(small_area, small_template, cv2.TM_CCOEFF_NORMED, mask=small_mask)
+    np.nan_to_num(coarse, copy=False, nan=0, posinf=0, neginf=0)
+
+    # 候选位置: 依次取最大值, 然后把周围一个模板大小的范围清掉
+    coarse_threshold = threshold - COARSE_MARGIN
+    small_height, small_width = small_template.shape[:2]
+    if limit == 1:
+        max_candidates = min(max_candidates, 4)
+    candidates = []
+    while True:
+        _, max_val, _, (x, y) = cv2.minMaxLoc(coarse)
+        if max_val < coarse_threshold:
+            break
+        if len(candidates) >= max_candidates:
+            if limit == 1:
+                break
+            # 候选太多, 截断会漏掉匹配
+            return None
+        candidates.append((x * factor, y * factor))
+        coarse[max(0, y - small_height // 2):y + small_height // 2 + 1,
+               max(0, x - small_width // 2):x + small_width // 2 + 1] = -1
+
+    # 原图上只匹配候选位置附近, 多留出缩小时丢失的像素
+    pad = factor * 2
+    matches = []
+    for x, y in candidates:
+        x1, y1 = max(0, x - pad), max(0, y - pad)
+        x2 = min(search_width, x + template_width + pad + factor)
+        y2 = min(search_height, y + template_height + pad + factor)
+        if x2 - x1 < template_width or y2 - y1 < template_height:
+            continue
+        result = cv2.matchTemplate(search_area[y1:y2, x1:x2], template, cv2.TM_CCOEFF_NORMED, mask=mask)
+        np.nan_to_num(result, copy=False, nan=0, posinf=0, neginf=0)
+        _, max_val, _, (mx, my) = cv2.minMaxLoc(result)
+        if max_val >= threshold:
+            matches.append((x1 + mx, y1 + my, float(max_val)))
+
+    matches.sort(key=lambda match: match[2], reverse=True)
+    selected = []
+    for x, y, confidence in matches:
+        if not any(x < sx + template_width and x + template_width > sx and
+                   y < sy + template_height and y + template_height > sy for sx, sy, _ in selected):
+            selected.append((x, y, confidence))
+            if limit == 1:
+                break
+    return selected
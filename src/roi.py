@@ -0,0 +1,66 @@
+class RoiRegistry:
+    """
+    命名区域表, 每个区域在模块里用参考分辨率声明一次
+    分辨率不变时每次返回同一个Box, 只在截图尺寸变化后重新计算
+    返回的Box是共享的, 需要移动或者修改大小时先copy()
+    """
+
+    def __init__(self):
+        self.specs = {}
+        self.size = None
+        self.boxes = {}
+        self.slices = {}
+
+    def declare(self, key, spec):
+        """
+        Args:
+            key: 区域名
+            spec: 参数为task, 返回Box的函数, 一般用scaled或relative生成
+        """
+        self.specs[key] = spec
+        return key
+
+    def _check_size(self, task):
+        size = (task.screen_width, task.screen_height, task.width, task.height)
+        if size != self.size:
+            self.size = size
+            self.boxes = {}
+            self.slices = {}
+
+    def box(self, task, key):
+        self._check_size(task)
+        box = self.boxes.get(key)
+        if box is None:
+            box = self.boxes[key] = self.specs[key](task)
+        return box
+
+    def slice(self, task, key):
+        """
+        Returns:
+            (行切片, 列切片), frame[slice]就是区域的截图
+        """
+        self._check_size(task)
+        area = self.slices.get(key)
+        if area is None:
+            box = self.box(task, key)
+            area = self.slices[key] = (slice(max(0, box.y), box.y + box.height),
+                                       slice(max(0, box.x), box.x + box.width))
+        return area
+
+
+def scaled(ref_width, ref_height, x, y, to_x, to_y, name, hcenter=False, vcenter=False):
+    """
+    参考分辨率下的像素坐标, 同box_of_screen_scaled
+    """
+    return lambda task: task.box_of_screen_scaled(ref_width, ref_height, x, y, to_x, to_y, name=name,
+                                                  hcenter=hcenter, vcenter=vcenter)
+
+
+def relative(x, y, to_x, to_y, name, hcenter=False, vcenter=False):
+    """
+    屏幕比例坐标, 同box_of_screen
+    """
+    return lambda task: task.box_of_screen(x, y, to_x, to_y, name=name, hcenter=hcenter, vcenter=vcenter)
+
+
+rois = RoiRegistry()
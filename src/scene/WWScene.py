@@ -1,3 +1,5 @@
+import time
+
 from qfluentwidgets import FluentIcon
 
 from ok import Logger, BaseScene
@@ -6,22 +8,61 @@ logger = Logger.get_logger(__name__)
 
 
 class WWScene(BaseScene):
+    """
+    当前帧的界面状态, 所有任务共享, in_team等判断每帧只算一次
+    executor换帧, sleep, wait_until时会调用reset, 另外帧对象变化时也会失效
+    """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._in_team = None
-        self._echo_enhance_btn = None
+        self._frame = None
+        self._states = {}
+        self.stats = {}
 
     def reset(self):
-        self._in_team = None
-        self._echo_enhance_btn = None
+        self._frame = None
+        self._states = {}
+
+    def state(self, name, fun, frame=None):
+        """
+        Args:
+            name: 状态名, 同一帧内同名状态只调用一次fun
+            fun: 无参数的判断函数
+            frame: 当前帧, 传入时帧对象变化也会清空之前的状态
+        """
+        if frame is not None and frame is not self._frame:
+            self._frame = frame
+            self._states = {}
+        stat = self.stats.get(name)
+        if stat is None:
+            stat = self.stats[name] = SceneStat()
+        stat.calls += 1
+        if name in self._states:
+            return self._states[name]
+        start = time.perf_counter()
+        value = fun()
+        stat.evaluations += 1
+        stat.total_time += time.perf_counter() - start
+        self._states[name] = value
+        return value
 
     def in_team(self, fun):
-        if self._in_team is None:
-            self._in_team = fun()
-        return self._in_team
+        return self.state('in_team_and_world', fun)
 
     def echo_enhance_btn(self, fun):
-        if self._echo_enhance_btn is None:
-            self._echo_enhance_btn = fun()
-        return self._echo_enhance_btn
+        return self.state('echo_enhance_btn', fun)
+
+    def stats_summary(self):
+        return {name: str(stat) for name, stat in self.stats.items()}
+
+
+class SceneStat:
+
+    def __init__(self):
+        self.calls = 0
+        self.evaluations = 0
+        self.total_time = 0.0
+
+    def __str__(self):
+        average = self.total_time * 1000 / self.evaluations if self.evaluations else 0
+        return f'{self.evaluations}/{self.calls} evaluated, avg {average:.2f}ms'
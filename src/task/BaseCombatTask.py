@@ -5,19 +5,23 @@ from decimal import Decimal, ROUND_UP, ROUND_DOWN
 import cv2
 import numpy as np
 
-from ok import Logger, Config
+from ok import Logger, Config, og
 from ok import color_range_to_bound
 from ok import safe_get
 from src import text_white_color
 from src.char import BaseChar
-from src.char.BaseChar import Priority, dot_color  # noqa
-from src.char.CharFactory import get_char_by_pos
+from src.char.BaseChar import Priority, dot_color, forte_white_color  # noqa
+from src.char.CharFactory import get_char_by_pos, char_names
+from src.char.PortraitIndex import PortraitIndex
 from src.char.Healer import Healer
+from src.color_stats import color_percentages
 from src.combat.CombatCheck import CombatCheck
+from src.roi import rois, scaled
 from src.task.BaseWWTask import isolate_white_text_to_black, binarize_for_matching
 
 logger = Logger.get_logger(__name__)
 cd_regex = re.compile(r'\d{1,2}\.\d')
+rois.declare('con_full', scaled(3840, 2160, 1431, 1942, 1557, 2068, name='con_full', hcenter=True))
 
 
 class NotInCombatException(Exception):
@@ -58,6 +62,8 @@ class BaseCombatTask(CombatCheck):
         self.key_config = self.get_global_config('Game Hotkey Config')  # 游戏热键配置
         self.mouse_pos = None  # 当前鼠标位置
         self.combat_start = 0  # 战斗开始时间戳
+        self.portrait_index = PortraitIndex(char_names)  # 队伍头像识别
+        self.load_chars_time = 0  # 上次load_chars耗时
 
         self.char_texts = ['char_1_text', 'char_2_text', 'char_3_text']
         self.add_text_fix({'Ｅ': 'e'})
@@ -136,36 +142,31 @@ class BaseCombatTask(CombatCheck):
     def refresh_cd(self):
         if self.cd_refreshed:
             return
-        index = self.get_current_char().index
-        cds = self.cds.get(index)
-        if cds is None:
-            cds = {}
-            self.cds[index] = cds
-        cds['time'] = time.time()
-        cds['resonance'] = 0
-        cds['liberation'] = 0
-        cds['echo'] = 0
-        texts = self.ocr(0.81, 0.86, 0.97, 0.93, frame_processor=isolate_white_text_to_black, match=cd_regex)
-        for text in texts:
-            cd = convert_cd(text)
-            if text.x < self.width_of_screen(0.86):
-                cds['resonance'] = cd
-            elif text.x > self.width_of_screen(0.91):
-                cds['liberation'] = cd
-            else:
-                cds['echo'] = cd
         self.cd_refreshed = True
-        self.log_debug(f'cd refreshed: {cds} {time.time() - cds["time"]}')
+        index = self.get_current_char().index
+        if not self.cd_estimator.needs_read(index):
+            return
+        start = time.time()
+        cds = {'resonance': 0, 'echo': 0, 'liberation': 0}
+        cd_reader = og.my_app.cd_reader
+        read = cd_reader.read(self.frame)
+        if read is not None:
+            cds.update(read)
+        else:
+            # 数字认不出来时用OCR, 结果补充进字形库
+            texts = self.ocr(0.81, 0.86, 0.97, 0.93, frame_processor=isolate_white_text_to_black, match=cd_regex)
+            for text in texts:
+                cd = convert_cd(text)
+                cds[cd_reader.slot(text.x, self.width)] = cd
+            cd_reader.learn(self.frame, [(text.x, text.name) for text in texts if cd_regex.fullmatch(text.name)])
+        self.cd_estimator.observe(index, cds)
+        self.log_debug(f'cd refreshed: {cds} {time.time() - start}')
 
     def get_cd(self, box_name, char_index=None):
         self.refresh_cd()
         if char_index is None:
             char_index = self.get_current_char().index
-        if cds := self.cds.get(char_index):
-            time_elapsed = self.time_elapsed_accounting_for_freeze(cds['time'])
-            return cds[box_name] - time_elapsed
-        else:
-            return 0
+        return self.cd_estimator.get(char_index, box_name)
 
     def next_frame(self):
         self.cd_refreshed = False
@@ -223,11 +224,50 @@ class BaseCombatTask(CombatCheck):
         Returns:
             bool: 如果可用则返回 True, 否则 False。
         """
-        current = self.calculate_color_percentage(text_white_color,
-                                                  self.get_box_by_name(f'box_{name}'))
+        current = self.hud_readings().get(name)
+        if current is None:
+            current = self.calculate_color_percentage(text_white_color, self.get_box_by_name(f'box_{name}'))
         if current > 0 and not self.has_cd(name):
             return True
 
+    def hud_readings(self):
+        """当前帧战斗HUD各区域的颜色占比, 一次算完, 同一帧只算一次。
+
+        Returns:
+            dict: resonance/echo/liberation为技能图标的白字占比, resonance_white为共鸣技能的纯白占比,
+                forte_full为共鸣回路的白色占比。
+        """
+        return self.scene_state('hud_readings', self._read_hud)
+
+    def hud_reading(self, name, box, color_range):
+        """角色自己的HUD区域的颜色占比, 和hud_readings存在一起, 同一帧只算一次。
+
+        Args:
+            name (str): 读数的名字, 不同的区域或颜色要用不同的名字。
+            box (Box): 区域。
+            color_range (dict): 颜色范围。
+
+        Returns:
+            float: 颜色占比。
+        """
+        readings = self.hud_readings()
+        if name not in readings:
+            readings[name] = color_percentages(self.frame, [(box, color_range)])[0]
+        return readings[name]
+
+    def _read_hud(self):
+        names = ['resonance', 'echo', 'liberation', 'resonance_white', 'forte_full']
+        resonance = self.get_box_by_name('box_resonance')
+        regions = [(resonance, text_white_color),
+                   (self.get_box_by_name('box_echo'), text_white_color),
+                   (self.get_box_by_name('box_liberation'), text_white_color),
+                   (resonance, white_color),
+                   (self.roi('forte_full'), forte_white_color)]
+        percentages = color_percentages(self.frame, regions)
+        if self.debug:
+            self.draw_boxes('hud', [box for box, _ in regions])
+        return dict(zip(names, percentages))
+
     def combat_once(self, wait_combat_time=200, raise_if_not_found=True):
         """执行一次完整的战斗流程。
 
@@ -507,11 +547,15 @@ class BaseCombatTask(CombatCheck):
         if not in_team:
             return
         # self.log_info('load chars')
-        self.chars[0] = get_char_by_pos(self, self.get_box_by_name('box_char_1'), 0, safe_get(self.chars, 0))
-        self.chars[1] = get_char_by_pos(self, self.get_box_by_name('box_char_2'), 1, safe_get(self.chars, 1))
+        start = time.perf_counter()
+        self.chars[0] = get_char_by_pos(self, self.get_box_by_name('box_char_1'), 0, safe_get(self.chars, 0),
+                                        self.portrait_index)
+        self.chars[1] = get_char_by_pos(self, self.get_box_by_name('box_char_2'), 1, safe_get(self.chars, 1),
+                                        self.portrait_index)
 
         if count == 3:
-            new_char = get_char_by_pos(self, self.get_box_by_name('box_char_3'), 2, safe_get(self.chars, 2))
+            new_char = get_char_by_pos(self, self.get_box_by_name('box_char_3'), 2, safe_get(self.chars, 2),
+                                       self.portrait_index)
             if len(self.chars) == 2:
                 self.chars.append(new_char)
             else:
@@ -519,7 +563,9 @@ class BaseCombatTask(CombatCheck):
         else:
             if len(self.chars) == 3:
                 self.chars = self.chars[:2]
+            self.portrait_index.forget(2)
             logger.info(f'team size changed to 2')
+        self.load_chars_time = time.perf_counter() - start
 
         healer_count = 0
         for char in self.chars:
@@ -571,7 +617,7 @@ class BaseCombatTask(CombatCheck):
         Returns:
             float: 白色像素百分比。
         """
-        return self.calculate_color_percentage(white_color, self.get_box_by_name('box_resonance'))
+        return self.hud_readings()['resonance_white']
 
     def is_con_full(self):
         """检查当前角色的协奏值是否已满。
@@ -592,8 +638,8 @@ class BaseCombatTask(CombatCheck):
 
             best_index = 0
             best_percentage = 0
-            for i in range(len(con_colors)):
-                percent = self.calculate_color_percentage(con_colors[i], box)
+            percentages = color_percentages(self.frame, [(box, color) for color in con_colors])
+            for i, percent in enumerate(percentages):
                 if percent > best_percentage:
                     best_percentage = percent
                     best_index = i
@@ -608,8 +654,7 @@ class BaseCombatTask(CombatCheck):
         Returns:
             Box: 盒子对象。
         """
-        return self.box_of_screen_scaled(3840, 2160, 1431, 1942, 1557, 2068, name='con_full',
-                                         hcenter=True)
+        return self.roi('con_full')
 
     def get_current_con(self):
         """获取当前角色的协奏值百分比。
@@ -625,7 +670,7 @@ class BaseCombatTask(CombatCheck):
         max_is_full = False
         target_index = self._ensure_ring_index()
 
-        cropped = box.crop_frame(self.frame)
+        cropped = self.roi_view('con_full')
         for i in range(len(con_colors)):
             if target_index != -1 and i != target_index:
                 continue
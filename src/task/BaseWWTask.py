@@ -1,3 +1,4 @@
+import copy
 import math
 import re
 import time
@@ -5,8 +6,13 @@ from datetime import datetime, timedelta
 
 import numpy as np
 
-from ok import BaseTask, Logger, find_boxes_by_name, og, find_color_rectangles, mask_white
+from ok import BaseTask, Logger, find_boxes_by_name, og, find_color_rectangles, mask_white, Box, sort_boxes, \
+    relative_box
 from ok import CannotFindException
+from src.EchoTracker import EchoTracker
+from src.ocr_batch import containers, inside, tile, untile
+from src.pyramid_match import PYRAMID_FEATURES, pyramid_match
+from src.roi import rois
 import cv2
 
 logger = Logger.get_logger(__name__)
@@ -20,6 +26,15 @@ f_white_color = {
 processed_feature = False
 
 
+def f_search_box(task):
+    f_box = task.get_box_by_name('pick_up_f_hcenter_vcenter')
+    return f_box.copy(x_offset=-f_box.width * 0.3, width_offset=f_box.width * 0.65,
+                      height_offset=f_box.height * 6, y_offset=-f_box.height * 5, name='search_dialog')
+
+
+rois.declare('search_dialog', f_search_box)
+
+
 class BaseWWTask(BaseTask):
     map_zoomed = False
 
@@ -29,6 +44,11 @@ class BaseWWTask(BaseTask):
         self.monthly_card_config = self.get_global_config('Monthly Card Config')
         self.next_monthly_card_start = 0
         self._logged_in = False
+        self._ocr_cache_frame = None
+        self._ocr_cache = {}
+        self.ocr_cache_hits = 0
+        self.ocr_cache_misses = 0
+        self.ocr_batches = 0
 
     def is_open_world_auto_combat(self):
         from src.task.AutoCombatTask import AutoCombatTask
@@ -91,13 +111,21 @@ class BaseWWTask(BaseTask):
 
     @property
     def f_search_box(self):
-        f_search_box = self.get_box_by_name('pick_up_f_hcenter_vcenter')
-        f_search_box = f_search_box.copy(x_offset=-f_search_box.width * 0.3,
-                                         width_offset=f_search_box.width * 0.65,
-                                         height_offset=f_search_box.height * 6,
-                                         y_offset=-f_search_box.height * 5,
-                                         name='search_dialog')
-        return f_search_box
+        return self.roi('search_dialog')
+
+    def roi(self, key):
+        """
+        src.roi里声明的区域, 同一分辨率下返回同一个Box, 不要修改位置
+        """
+        return rois.box(self, key)
+
+    def roi_view(self, key, frame=None):
+        """
+        区域在当前帧上的截图, 是frame的view, 不复制
+        """
+        if frame is None:
+            frame = self.frame
+        return frame[rois.slice(self, key)]
 
     def find_f_with_text(self, target_text=None):
         f = self.find_one('pick_up_f_hcenter_vcenter', box=self.f_search_box, threshold=0.8)
@@ -134,10 +162,17 @@ class BaseWWTask(BaseTask):
     def has_target(self):
         return False
 
-    def walk_to_yolo_echo(self, time_out=8, update_function=None, echo_threshold=0.5):
+    def walk_to_yolo_echo(self, time_out=8, update_function=None, echo_threshold=0.5, profile=None):
         last_direction = None
         start = time.time()
         no_echo_start = 0
+        use_async = og.my_app.yolo_async
+        last_frame_time = 0
+        tracker = None
+        if use_async:
+            og.my_app.yolo_model.clear_latest()
+        elif og.my_app.yolo_track:
+            tracker = EchoTracker(lambda: self._detect_walk_echos(echo_threshold, profile))
         while time.time() - start < time_out:
             self.next_frame()
             if self.pick_f():
@@ -148,7 +183,18 @@ class BaseWWTask(BaseTask):
                 self.log_debug('pick echo has_target return fail')
                 self._stop_last_direction(last_direction)
                 return False
-            echos = self.find_echos(threshold=echo_threshold)
+            if use_async:
+                echos, frame_time = self.find_echos_latest(threshold=echo_threshold)
+                if frame_time == last_frame_time:
+                    # no new detection yet, keep walking in the last direction
+                    if update_function is not None:
+                        update_function()
+                    continue
+                last_frame_time = frame_time
+            elif tracker is not None:
+                echos = self._to_echo_boxes(tracker.update())
+            else:
+                echos = self._to_echo_boxes(self._detect_walk_echos(echo_threshold, profile))
             if not echos:
                 if no_echo_start == 0:
                     no_echo_start = time.time()
@@ -174,6 +220,16 @@ class BaseWWTask(BaseTask):
             if update_function is not None:
                 update_function()
         self._stop_last_direction(last_direction)
+        if tracker is not None:
+            self.log_debug(f'walk_to_yolo_echo tracker detected {tracker.detections}/{tracker.frames} frames, '
+                           f'interval {tracker.interval}')
+
+    def _detect_walk_echos(self, threshold, profile):
+        boxes = og.my_app.yolo_detect(self.frame, threshold=threshold, label=0, profile=profile)
+        if not boxes and profile is not None:
+            # the fast profile may not cover the whole screen, fall back to the default one
+            boxes = og.my_app.yolo_detect(self.frame, threshold=threshold, label=0)
+        return boxes
 
     def _walk_direction(self, last_direction, next_direction):
         if next_direction != last_direction:
@@ -316,12 +372,169 @@ class BaseWWTask(BaseTask):
                 return cost
         return 0
 
+    def find_feature(self, *args, frame_processor=None, frame=None, **kwargs):
+        if frame_processor is not None:
+            frame_processor = self.cached_frame_processor(frame_processor, self.frame if frame is None else frame)
+        else:
+            boxes = self.pyramid_find_feature(args, kwargs, frame)
+            if boxes is not None:
+                return boxes
+        return super().find_feature(*args, frame_processor=frame_processor, frame=frame, **kwargs)
+
+    def pyramid_find_feature(self, args, kwargs, frame):
+        """
+        PYRAMID_FEATURES里的模板在指定的大范围box里搜索时, 先缩小粗搜再在候选位置附近精确匹配
+        灰度, canny, 自定义模板等参数走原来的全图匹配, 返回None
+        """
+        feature_name = args[0] if len(args) == 1 else kwargs.get('feature_name')
+        box = kwargs.get('box')
+        if len(args) > 1 or not isinstance(feature_name, str) or feature_name not in PYRAMID_FEATURES or box is None:
+            return None
+        if (kwargs.get('use_gray_scale') or kwargs.get('canny_lower') or kwargs.get('canny_higher')
+                or kwargs.get('template') is not None or kwargs.get('mask_function') is not None
+                or kwargs.get('screenshot') or kwargs.get('target_height')
+                or kwargs.get('match_method', cv2.TM_CCOEFF_NORMED) != cv2.TM_CCOEFF_NORMED):
+            return None
+        frame = self.frame if frame is None else frame
+        if frame is None:
+            return []
+        if isinstance(box, str):
+            box = self.get_box_by_name(box)
+        feature = self.get_feature_by_name(feature_name)
+        threshold = kwargs.get('threshold') or self.executor.feature_set.default_threshold
+        x1, y1 = max(box.x, 0), max(box.y, 0)
+        x2, y2 = min(box.x + box.width, frame.shape[1]), min(box.y + box.height, frame.shape[0])
+        if x2 - x1 < feature.width or y2 - y1 < feature.height:
+            return None
+        limit = kwargs.get('limit', 0)
+        matches = pyramid_match(frame[y1:y2, x1:x2, :3], feature.mat, threshold, PYRAMID_FEATURES[feature_name],
+                                mask=feature.mask, limit=limit)
+        if matches is None:
+            return None
+        boxes = sort_boxes([Box(x1 + x, y1 + y, feature.width, feature.height, confidence, feature_name)
+                            for x, y, confidence in matches])
+        if limit > 0:
+            boxes = boxes[:limit]
+        return boxes
+
+    def ocr(self, x=0, y=0, to_x=1, to_y=1, match=None, width=0, height=0, box=None, name=None, threshold=0,
+            frame=None, target_height=0, use_grayscale=False, log=False, frame_processor=None, lib='default',
+            **kwargs):
+        """
+        同一帧同一区域同样参数的OCR只做一次, 缓存没有过滤的结果, match在缓存的结果上过滤
+        截图等其它参数不走缓存
+        """
+        image = frame if frame is not None else self.executor.frame
+        if image is None or kwargs:
+            with og.my_app.ocr_lock:
+                return super().ocr(x, y, to_x, to_y, match=match, width=width, height=height, box=box, name=name,
+                                   threshold=threshold, frame=frame, target_height=target_height,
+                                   use_grayscale=use_grayscale, log=log, frame_processor=frame_processor, lib=lib,
+                                   **kwargs)
+        if isinstance(box, str):
+            box = self.get_box_by_name(box)
+        if box is None:
+            box = relative_box(image.shape[1], image.shape[0], x, y, to_x, to_y, width, height, name)
+        key = (box.x, box.y, box.width, box.height, frame_processor, target_height, threshold, use_grayscale, lib)
+        cache = self.frame_ocr_cache(image)
+        boxes = cache.get(key)
+        if boxes is None:
+            self.ocr_cache_misses += 1
+            with og.my_app.ocr_lock:
+                boxes = super().ocr(box=box, threshold=threshold, frame=image, target_height=target_height,
+                                    use_grayscale=use_grayscale, log=log, frame_processor=frame_processor, lib=lib)
+            cache[key] = boxes
+        else:
+            self.ocr_cache_hit()
+            if log:
+                logger.info(f'ocr cache hit {box} {boxes}')
+        return self.filter_ocr(boxes, match)
+
+    def ocr_rois(self, rois, match=None, threshold=0, frame=None, frame_processor=None, lib='default'):
+        """
+        多个区域拼成一张图, 检测和识别各只跑一次, 结果按区域分开, 和ocr共用同一帧的缓存
+        被其它区域包含的区域不单独识别, 从大区域的结果里按文字中心取
+        Args:
+            rois: {名字: Box, box名字或者相对坐标(x, y, to_x, to_y)}
+            match: {名字: match}, 没有的区域不过滤
+        Returns:
+            {名字: list[Box]}
+        """
+        match = match or {}
+        image = frame if frame is not None else self.executor.frame
+        if image is None:
+            return {name: [] for name in rois}
+        cache = self.frame_ocr_cache(image)
+        results = {}
+        pending = []
+        for name, roi in rois.items():
+            if isinstance(roi, str):
+                box = self.get_box_by_name(roi)
+            elif isinstance(roi, tuple):
+                box = relative_box(image.shape[1], image.shape[0], *roi, name=name)
+            else:
+                box = roi
+            key = (box.x, box.y, box.width, box.height, frame_processor, 0, threshold, False, lib)
+            if (boxes := cache.get(key)) is not None:
+                self.ocr_cache_hit()
+                results[name] = boxes
+            else:
+                pending.append((name, box, key))
+        if pending:
+            self.ocr_cache_misses += len(pending)
+            self.ocr_batches += 1
+            rects = [(box.x, box.y, box.width, box.height) for _, box, _ in pending]
+            owners = containers(rects)
+            tiled = sorted(set(owners))
+            canvas, tiles = tile([image[y:y + h, x:x + w] for x, y, w, h in (rects[i] for i in tiled)],
+                                 gap=max(32, round(image.shape[0] * 0.03)))
+            with og.my_app.ocr_lock:
+                texts = super().ocr(threshold=threshold, frame=canvas, frame_processor=frame_processor, lib=lib)
+            tiled_texts = dict(zip(tiled, untile(texts, tiles, [rects[i][:2] for i in tiled])))
+            for (name, _, key), rect, owner in zip(pending, rects, owners):
+                # 被包含的区域从包含它的区域的结果里取
+                boxes = sort_boxes(tiled_texts[owner] if rect == rects[owner] else [
+                    text for text in tiled_texts[owner] if inside(text, rect)])
+                cache[key] = boxes
+                results[name] = boxes
+        return {name: self.filter_ocr(results[name], match.get(name)) for name in rois}
+
+    def frame_ocr_cache(self, image):
+        if image is not self._ocr_cache_frame:
+            # 新的一帧, 之前的结果全部失效
+            self._ocr_cache_frame = image
+            self._ocr_cache = {}
+        return self._ocr_cache
+
+    def ocr_cache_hit(self):
+        self.ocr_cache_hits += 1
+        self.info['OCR Cache Hits'] = f'{self.ocr_cache_hits}/{self.ocr_cache_hits + self.ocr_cache_misses}'
+
+    def filter_ocr(self, boxes, match):
+        # 返回副本, 调用方修改结果时不影响缓存
+        if match is not None:
+            boxes = find_boxes_by_name(boxes, self.fix_match_regex(match))
+        return [copy.copy(box) for box in boxes]
+
+    def cached_frame_processor(self, frame_processor, frame):
+        """
+        包装frame_processor, 同一帧同一搜索区域只处理一次, 结果在所有任务间共享
+        """
+
+        def cached(area):
+            if frame is None or not np.may_share_memory(area, frame):
+                return frame_processor(area)
+            return og.my_app.process_frame(frame, frame_processor, area)
+
+        return cached
+
     def in_realm(self):
-        return not self.config.get("Don't restart in Realm") and self.find_one('illusive_realm_exit', threshold=0.8,
-                                                                               frame_processor=convert_bw)
+        return not self.config.get("Don't restart in Realm") and self.scene_state(
+            'in_realm', lambda: self.find_one('illusive_realm_exit', threshold=0.8, frame_processor=convert_bw))
 
     def in_world(self):
-        return self.find_one('world_earth_icon', threshold=0.8, frame_processor=binarize_for_matching)
+        return self.scene_state('in_world', lambda: self.find_one('world_earth_icon', threshold=0.8,
+                                                                  frame_processor=binarize_for_matching))
 
     def in_illusive_realm(self):
         return self.find_one('new_realm_4') and self.in_realm() and self.find_one('illusive_realm_menu', threshold=0.6)
@@ -468,8 +681,8 @@ class BaseWWTask(BaseTask):
             return True
 
     def has_claim(self):
-        return not self.in_team()[0] and self.find_one('claim_cancel_button_hcenter_vcenter', horizontal_variance=0.05,
-                                                       vertical_variance=0.1, threshold=0.8)
+        return self.scene_state('has_claim', lambda: not self.in_team()[0] and self.find_one(
+            'claim_cancel_button_hcenter_vcenter', horizontal_variance=0.05, vertical_variance=0.1, threshold=0.8))
 
     def test_absorb(self):
         # self.set_image('tests/images/absorb.png')
@@ -477,7 +690,7 @@ class BaseWWTask(BaseTask):
         result = self.executor.ocr_lib(image, use_det=True, use_cls=False, use_rec=True)
         self.logger.info(f'ocr_result {result}')
 
-    def find_echos(self, threshold=0.3):
+    def find_echos(self, threshold=0.3, profile=None, roi=None):
         """
         Main function to load ONNX model, perform inference, draw bounding boxes, and display the output image.
 
@@ -489,8 +702,24 @@ class BaseWWTask(BaseTask):
             list: List of dictionaries containing detection information such as class_id, class_name, confidence, etc.
         """
         # Load the ONNX model
-        ret = og.my_app.yolo_detect(self.frame, threshold=threshold, label=0)
+        ret = og.my_app.yolo_detect(self.frame, threshold=threshold, label=0, roi=roi, profile=profile)
+        return self._to_echo_boxes(ret)
+
+    def find_echos_latest(self, threshold=0.3):
+        """
+        异步检测声骸, 提交当前帧后立即返回最新一次完成的检测结果, 不等待推理
+
+        Args:
+            threshold (float): 置信度阈值
+
+        Returns:
+            tuple: (声骸列表, 结果对应帧的时间戳), 还没有结果时时间戳为0
+        """
+        og.my_app.yolo_submit(self.frame, time.time())
+        ret, frame_time = og.my_app.yolo_latest(threshold=threshold, label=0)
+        return self._to_echo_boxes(ret), frame_time
 
+    def _to_echo_boxes(self, ret):
         for box in ret:
             box.y += box.height * 1 / 3
             box.height = 1
@@ -543,7 +772,8 @@ class BaseWWTask(BaseTask):
         else:
             return True
 
-    def yolo_find_echo(self, use_color=False, turn=True, update_function=None, time_out=8, threshold=0.5):
+    def yolo_find_echo(self, use_color=False, turn=True, update_function=None, time_out=8, threshold=0.5,
+                       profile=None, walk_profile=None):
         # if self.debug:
         #     self.screenshot('yolo_echo_start')
         max_echo_count = 0
@@ -552,16 +782,26 @@ class BaseWWTask(BaseTask):
             return True, True
         front_box = self.box_of_screen(0.35, 0.35, 0.65, 0.53, hcenter=True)
         color_threshold = 0.02
+        if turn and not use_color and og.my_app.yolo_batch_scan:
+            found, max_echo_count = self.scan_echo_views(threshold=threshold, profile=profile)
+            if not found:
+                self.center_camera()
+                return False, max_echo_count > 1
+            if self.find_echos(threshold=threshold, profile=profile):
+                return self.walk_to_yolo_echo(update_function=update_function, time_out=time_out,
+                                              profile=walk_profile), max_echo_count > 1
+            self.log_debug('scan_echo_views echo lost after turning back, scan one by one')
         for i in range(4):
             if turn:
                 self.center_camera()
-            echos = self.find_echos(threshold=threshold)
+            echos = self.find_echos(threshold=threshold, profile=profile)
             max_echo_count = max(max_echo_count, len(echos))
             self.log_debug(f'max_echo_count {max_echo_count}')
             if echos:
                 self.log_info(f'yolo found echo {echos}')
                 # return self.walk_to_box(self.find_echos, time_out=15, end_condition=self.pick_echo), max_echo_count > 1
-                return self.walk_to_yolo_echo(update_function=update_function, time_out=time_out), max_echo_count > 1
+                return self.walk_to_yolo_echo(update_function=update_function, time_out=time_out,
+                                              profile=walk_profile), max_echo_count > 1
             if use_color:
                 color_percent = self.calculate_color_percentage(echo_color, front_box)
                 self.log_debug(f'pick_echo color_percent:{color_percent}')
@@ -570,7 +810,8 @@ class BaseWWTask(BaseTask):
                     #     self.screenshot('echo_color_picked')
                     self.log_debug(f'found color_percent {color_percent} > {color_threshold}, walk now')
                     # return self.walk_to_box(self.find_echos, time_out=15, end_condition=self.pick_echo), max_echo_count > 1
-                    return self.walk_to_yolo_echo(update_function=update_function), max_echo_count > 1
+                    return self.walk_to_yolo_echo(update_function=update_function,
+                                                  profile=walk_profile), max_echo_count > 1
             if not turn and i == 0:
                 return False, max_echo_count > 1
             self.send_key('a', down_time=0.05)
@@ -579,6 +820,37 @@ class BaseWWTask(BaseTask):
         self.center_camera()
         return False, max_echo_count > 1
 
+    def scan_echo_views(self, threshold=0.5, profile=None, views=4):
+        """
+        转动视角截取所有方向, 一次batch推理, 然后转回第一个有声骸的方向
+
+        Args:
+            threshold (float): 置信度阈值
+            profile (str): 检测配置
+            views (int): 转一圈截取的方向数
+
+        Returns:
+            tuple: (是否找到声骸, 单个方向最多的声骸数)
+        """
+        frames = []
+        for i in range(views):
+            if i > 0:
+                self.send_key('a', down_time=0.05)
+                self.sleep(0.5)
+            self.center_camera()
+            frames.append(self.frame)
+        results = og.my_app.yolo_detect_batch(frames, threshold=threshold, label=0, profile=profile)
+        max_echo_count = max(len(echos) for echos in results)
+        self.log_debug(f'scan_echo_views {[len(echos) for echos in results]}')
+        for i, echos in enumerate(results):
+            if echos:
+                for _ in range((i - views + 1) % views):
+                    self.send_key('a', down_time=0.05)
+                    self.sleep(0.5)
+                self.center_camera()
+                return True, max_echo_count
+        return False, max_echo_count
+
     def center_camera(self):
         self.click(0.5, 0.5, down_time=0.2, key='middle')
         self.wait_until(self.in_combat, time_out=1)
@@ -668,38 +940,15 @@ class BaseWWTask(BaseTask):
 
     def rotate_arrow_and_find(self):
         arrow_template = self.get_feature_by_name('arrow')
-        original_mat = arrow_template.mat
-        max_conf = 0
-        max_angle = 0
-        max_target = None
-        max_mat = None
-        (h, w) = arrow_template.mat.shape[:2]
-        # self.log_debug(f'turn_east h:{h} w:{w}')
-        center = (w // 2, h // 2)
         target_box = self.get_box_by_name('arrow')
-        # if self.debug:
-        #     self.screenshot('arrow_original', original_ mat)
-        for angle in range(0, 360):
-            # Rotate the template image
-            rotation_matrix = cv2.getRotationMatrix2D(center, -angle, 1.0)
-            template = cv2.warpAffine(original_mat, rotation_matrix, (w, h))
-            # mask = np.where(np.all(template == [0, 0, 0], axis=2), 0, 255).astype(np.uint8)
-
-            target = self.find_one(box=target_box,
-                                   template=template, threshold=0.01)
-            # if self.debug and angle % 90 == 0:
-            #     self.screenshot(f'arrow_rotated_{angle}', arrow_template.mat)
-            if target and target.confidence > max_conf:
-                max_conf = target.confidence
-                max_angle = angle
-                max_target = target
-                # max_mat = template
-        # arrow_template.mat = original_mat
-        # arrow_template.mask = None
-        # if self.debug and max_mat is not None:
-        #     self.screenshot('max_mat',frame=max_mat)
-        # self.log_debug(f'turn_east max_conf: {max_conf} {max_angle}')
-        return max_angle, max_target
+        estimator = og.my_app.arrow_estimator(arrow_template.mat)
+        crop = self.frame[target_box.y:target_box.y + target_box.height, target_box.x:target_box.x + target_box.width]
+        if crop.shape[0] < estimator.h or crop.shape[1] < estimator.w:
+            return 0, None
+        angle, confidence, (x, y) = estimator.estimate(crop)
+        if confidence < 0.01:
+            return 0, None
+        return angle, Box(target_box.x + x, target_box.y + y, estimator.w, estimator.h, confidence, 'arrow')
 
     def get_mini_map_turn_angle(self, feature, threshold=0.72, x_offset=0, y_offset=0):
         box = self.get_box_by_name('box_minimap')
@@ -783,32 +1032,52 @@ class BaseWWTask(BaseTask):
         return current_direction, current_adjust, False
 
     def in_team(self):
-        c1 = self.find_one('char_1_text',
-                           threshold=0.8)
-        c2 = self.find_one('char_2_text',
-                           threshold=0.8)
-        c3 = self.find_one('char_3_text',
-                           threshold=0.8)
-        arr = [c1, c2, c3]
-        # logger.debug(f'in_team check {arr}')
+        result = self.scene_state('in_team', self.match_char_slots)
+        if result[0]:
+            self._logged_in = True
+        return result
+
+    def match_char_slots(self):
+        """
+        三个角色槽位的数字一次匹配完, 不经过三次find_one
+        Returns:
+            (是否在队伍中, 当前角色序号, 队伍人数)
+        """
+        frame = self.frame
+        if frame is None:
+            return False, -1, 1
+        feature_set = self.executor.feature_set
+        x_offset = feature_set.width * feature_set.default_horizontal_variance
+        y_offset = feature_set.height * feature_set.default_vertical_variance
         current = -1
         exist_count = 0
-        for i in range(len(arr)):
-            if arr[i] is None:
-                if current == -1:
-                    current = i
-            else:
+        for i in range(3):
+            feature = self.get_feature_by_name(f'char_{i + 1}_text')
+            search_area = frame[max(0, round(feature.y - y_offset)):round(feature.y + feature.height + y_offset),
+                                max(0, round(feature.x - x_offset)):round(feature.x + feature.width + x_offset), :3]
+            result = cv2.matchTemplate(search_area, feature.mat, cv2.TM_CCOEFF_NORMED, mask=feature.mask)
+            np.nan_to_num(result, copy=False, nan=0, posinf=0, neginf=0)
+            if cv2.minMaxLoc(result)[1] >= 0.8:
                 exist_count += 1
+            elif current == -1:
+                current = i
         if exist_count == 2 or exist_count == 1:
-            self._logged_in = True
             return True, current, exist_count + 1
         else:
             return False, -1, exist_count + 1
 
+    def scene_state(self, name, fun):
+        """
+        当前帧的界面判断结果, 所有任务共享, 同一帧只算一次
+        """
+        if self.scene is None:
+            return fun()
+        return self.scene.state(name, fun, self.frame)
+
         # Function to check if a component forms a ring
 
     def handle_monthly_card(self):
-        monthly_card = self.find_one('monthly_card', threshold=0.8)
+        monthly_card = self.scene_state('monthly_card', lambda: self.find_one('monthly_card', threshold=0.8))
         # self.screenshot('monthly_card1')
         if monthly_card is not None:
             # self.screenshot('monthly_card1')
@@ -141,10 +141,12 @@ class BulkFusionDiscardTask(WWOneTimeTask, BaseWWTask):
     def _read_fusion_count(self):
         # 讀取「數據融合次數」文本（批量融合按鈕上方區域）
         box = self.box_of_screen(0.58, 0.80, 0.93, 0.90, name='fusion_count_area')
-        texts = self.ocr(box=box, match=self.text_fusion_count)
+        # 次數區域在右下區域裡面，兩個區域一次 OCR 讀完
+        tokens = self.ocr_rois({'count': box, 'area': self.box_of_screen(0.50, 0.75, 0.98, 0.95)})
+        texts = self.filter_ocr(tokens['count'], self.text_fusion_count)
         if not texts:
             # 若未匹配到，嘗試整個右下區域
-            texts = self.ocr(box=self.box_of_screen(0.50, 0.75, 0.98, 0.95), match=self.text_fusion_count)
+            texts = self.filter_ocr(tokens['area'], self.text_fusion_count)
         if texts:
             # 取第一個匹配，提取數字
             for t in texts:
@@ -161,12 +163,10 @@ class BulkFusionDiscardTask(WWOneTimeTask, BaseWWTask):
 
         # Fallback：直接拼接 ROI 內的 OCR 文本後再整體匹配
         try:
-            all_tokens = self.ocr(box=box)
-            joined = ''.join([t.name for t in (all_tokens or [])])
+            joined = ''.join([t.name for t in tokens['count']])
             if not joined:
                 # 再嘗試更大的右下區域
-                all_tokens = self.ocr(box=self.box_of_screen(0.50, 0.75, 0.98, 0.95))
-                joined = ''.join([t.name for t in (all_tokens or [])])
+                joined = ''.join([t.name for t in tokens['area']])
             if joined:
                 m = self.text_fusion_count.search(joined)
                 if m:
@@ -10,6 +10,8 @@ from src.task.WWOneTimeTask import WWOneTimeTask
 from src.task.BaseCombatTask import BaseCombatTask
 
 logger = Logger.get_logger(__name__)
+daily_progress_re = re.compile(r'^(\d+)/180$')
+claim_progress_re = re.compile(r"^[1-9]\d*/\d+$")
 
 
 class DailyTask(WWOneTimeTask, BaseCombatTask):
@@ -70,19 +72,31 @@ class DailyTask(WWOneTimeTask, BaseCombatTask):
         self.log_info('open_daily')
         gray_book_quest = self.openF2Book("gray_book_quest")
         self.click_box(gray_book_quest, after_sleep=1.5)
-        progress = self.ocr(0.1, 0.1, 0.5, 0.75, match=re.compile(r'^(\d+)/180$'))
-        if not progress:
+        texts = self.ocr_daily()
+        if not texts['progress']:
             self.click(0.96, 0.56, after_sleep=1)
-            progress = self.ocr(0.1, 0.1, 0.5, 0.75, match=re.compile(r'^(\d+)/180$'))
-        if progress:
-            current = int(progress[0].name.split('/')[0])
+            texts = self.ocr_daily()
+        if texts['progress']:
+            current = int(texts['progress'][0].name.split('/')[0])
         else:
             current = 0
         self.info_set('current daily progress', current)
-        return current, self.get_total_daily_points() >= 100
+        return current, self.get_total_daily_points(texts['points']) >= 100
 
-    def get_total_daily_points(self):
-        points_boxes = self.ocr(0.19, 0.8, 0.30, 0.93, match=number_re)
+    def ocr_daily(self, claim=False):
+        """
+        活跃度进度, 活跃度点数, 可领取的任务一次OCR读完
+        """
+        rois = {'progress': (0.1, 0.1, 0.5, 0.75), 'points': (0.19, 0.8, 0.30, 0.93)}
+        match = {'progress': daily_progress_re, 'points': number_re}
+        if claim:
+            rois['claim'] = (0.23, 0.16, 0.31, 0.69)
+            match['claim'] = claim_progress_re
+        return self.ocr_rois(rois, match=match)
+
+    def get_total_daily_points(self, points_boxes=None):
+        if points_boxes is None:
+            points_boxes = self.ocr(0.19, 0.8, 0.30, 0.93, match=number_re)
         if points_boxes:
             points = int(points_boxes[0].name)
         else:
@@ -95,9 +109,9 @@ class DailyTask(WWOneTimeTask, BaseCombatTask):
         self.ensure_main(time_out=5)
         self.open_daily()
         while True:
-            boxes = self.ocr(0.23, 0.16, 0.31, 0.69, match=re.compile(r"^[1-9]\d*/\d+$"))
+            texts = self.ocr_daily(claim=True)
             count = 0
-            for box in boxes:
+            for box in texts['claim']:
                 parts = box.name.split('/')
                 if len(parts) == 2 and parts[0] == parts[1]:
                     count += 1
@@ -109,7 +123,7 @@ class DailyTask(WWOneTimeTask, BaseCombatTask):
                 self.click(0.87, 0.17, after_sleep=0.5)
             self.sleep(1)
 
-        total_points = self.get_total_daily_points()
+        total_points = self.get_total_daily_points(texts['points'])
         self.info_set('daily points', total_points)
         if total_points < 100:
             raise Exception("Can't complete daily task, may need to increase stamina manually!")
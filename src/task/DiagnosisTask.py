@@ -1,6 +1,6 @@
 import time
 
-from ok import Logger
+from ok import Logger, og
 from src.task.BaseCombatTask import BaseCombatTask
 from src.task.WWOneTimeTask import WWOneTimeTask
 
@@ -40,7 +40,17 @@ class DiagnosisTask(WWOneTimeTask, BaseCombatTask):
                 self.info['Resonance CD'] = self.get_cd('resonance')
                 self.info['Echo CD'] = self.get_cd('echo')
                 self.info['Liberation CD'] = self.get_cd('liberation')
+                self.info['CD OCR Fallback'] = f'{og.my_app.cd_reader.fallbacks}/{og.my_app.cd_reader.reads}'
+                self.info['CD Reads Saved'] = f'{self.cd_estimator.saved}/{self.cd_estimator.checks}'
                 self.info['Concerto'] = char.get_current_con()
+                index = self.portrait_index
+                self.info['Load Chars Time'] = f'{self.load_chars_time * 1000:.2f}ms'
+                self.info['Portrait Reused/Atlas/Full'] = f'{index.reused}/{index.atlas_matched}/{index.full_matched}'
+                hits, total = og.my_app.processed_hits, og.my_app.processed_hits + og.my_app.processed_misses
+                self.info['Frame Processor Cache Hit Rate'] = f'{hits / (total or 1):.0%} ({hits}/{total})'
+                if self.scene is not None:
+                    for name, stat in self.scene.stats_summary().items():
+                        self.info[f'Scene {name}'] = stat
                 self.next_frame()
 
     def choose_level(self, start):
@@ -4,10 +4,11 @@ import time
 from typing import List
 
 import cv2
-import numpy as np
 from qfluentwidgets import FluentIcon
 
 from ok import Logger, Box, get_bounding_box
+from src.MiniMapLocator import MiniMapLocator
+from src.StarRoute import StarRoute
 from src.task.BaseCombatTask import BaseCombatTask
 from src.task.BaseWWTask import calculate_angle_clockwise
 from src.task.WWOneTimeTask import WWOneTimeTask
@@ -22,12 +23,18 @@ class BigMap(WWOneTimeTask, BaseCombatTask):
         self.stars = None
         self.my_box = None
         self.diamond = None
+        self.locator = None
+        self.route = None
+        self.my_location = None
 
     def reset(self):
         self.big_map_frame = None
         self.stars = None
         self.my_box = None
         self.diamond = None
+        self.locator = None
+        self.route = None
+        self.my_location = None
 
     def load_stars(self, wait_world=True):
         self.reset()
@@ -40,8 +47,9 @@ class BigMap(WWOneTimeTask, BaseCombatTask):
         self.stars = self.find_feature('big_map_star', threshold=0.7, frame=self.big_map_frame,
                                        box=Box(0, 0, self.big_map_frame.shape[1], self.big_map_frame.shape[0]))
         all_star_len = len(self.stars)
-        self.stars = sort_stars(self.stars, self.diamond, self.height_of_screen(0.2))
-        self.stars.insert(0, self.diamond)
+        self.route = StarRoute(self.stars, self.diamond, self.height_of_screen(0.2),
+                               cell_size=self.height_of_screen(0.05))
+        self.stars = self.route.stars
         mini_map_box = self.get_box_by_name('box_minimap')
         self.my_box = self.diamond.scale(mini_map_box.width / self.diamond.width * 2)
         # if self.debug:
@@ -50,7 +58,9 @@ class BigMap(WWOneTimeTask, BaseCombatTask):
         if len(self.stars) <= 2:
             raise Exception('Need be in the map screen and have a path of at least 3 stars!')
 
-        self.log_info(f'Loaded {len(self.stars)} from {all_star_len + 1} Stars', notify=True)
+        self.log_info(f'Loaded {len(self.stars)} from {all_star_len + 1} Stars, route length '
+                      f'{self.route.length:.0f} greedy {self.route.greedy_length:.0f}', notify=True)
+        self.info_set('Route Length', f'{self.route.length:.0f}/{self.route.greedy_length:.0f}')
 
         # self.click(self.diamond, after_sleep=1)
         # self.wait_click_travel()
@@ -60,22 +70,14 @@ class BigMap(WWOneTimeTask, BaseCombatTask):
             self.wait_in_team_and_world()
 
     def find_closest(self, my_box):
-        min_distance = 100000
-        min_star = None
-        if len(self.stars) == 0:
-            return None, 0, 0
-        for star in self.stars:
-            distance = star.center_distance(my_box)
-            if distance < min_distance:
-                min_distance = distance
-                min_star = star
-        return min_star
+        star, _ = self.route.closest(my_box)
+        return star
 
     def find_direction_angle(self, screenshot=False):
         if len(self.stars) == 0:
             return None, 0, 0
         my_box = self.find_my_location(screenshot=screenshot)
-        sort_stars(self.stars, my_box, 0)
+        self.my_location = my_box
         min_star = self.stars[0]
         min_distance = my_box.center_distance(min_star)
         self.draw_boxes('star', min_star, color='green')
@@ -87,65 +89,35 @@ class BigMap(WWOneTimeTask, BaseCombatTask):
 
     def remove_star(self, star):
         before = len(self.stars)
-        self.stars.remove(star)
+        self.route.remove(star)
         self.info_set('Stars', len(self.stars))
         self.log_debug(f'removed star {before} -> {len(self.stars)}')
 
     def find_my_location(self, screenshot=False):
-        frame = self.big_map_frame
         mat = self.get_box_by_name('box_minimap').crop_frame(self.frame)
-        # mask = create_circle_mask_with_hole(mat)
-        # mat = cv2.bitwise_and(mat, mat, mask=mask)
-
-        in_big_map = self.find_one(frame=frame, template=mat, threshold=0.05,
-                                   box=self.my_box, mask_function=create_circle_mask_with_hole,
-                                   screenshot=screenshot)
-        # in_big_maps = self.find_feature(frame=frame, template=mat, threshold=0.01, box=self.bounding_box)
-        if not in_big_map:
+        if self.locator is None:
+            self.locator = MiniMapLocator(self.big_map_frame,
+                                          (self.my_box.x, self.my_box.y, self.my_box.width, self.my_box.height))
+        found = self.locator.locate(mat)
+        if screenshot:
+            self.screenshot('template_minimap', frame=mat)
+        if not found:
             raise RuntimeError('can not find my cords on big map!')
-        self.log_debug(f'found in_big_map: {in_big_map}')
-        if self.debug and in_big_map:
+        x, y, confidence = found
+        in_big_map = Box(x, y, mat.shape[1], mat.shape[0], confidence, 'in_big_map')
+        self.log_debug(f'found in_big_map: {in_big_map} drift: {self.locator.drift:.1f}')
+        self.info_set('Locate Confidence', round(confidence, 2))
+        self.info_set('Locate Drift', round(self.locator.drift, 1))
+        self.info_set('Locate Time', f'{self.locator.average_time * 1000:.1f}ms')
+        self.my_box = Box(*self.locator.window, name='my_box')
+        if self.debug:
             self.draw_boxes('stars', self.stars)
             self.draw_boxes('my_box', self.my_box, color='green')
             self.draw_boxes('in_big_map', in_big_map, color='yellow')
             self.draw_boxes('me', in_big_map.scale(0.1), color='blue')
-            # self.screenshot('box_minimap', frame=frame, show_box=True)
-            # self.screenshot('template_minimap', frame=mat)
-        self.my_box = in_big_map.scale(1.3)
         return in_big_map
 
 
-def create_circle_mask_with_hole(image):
-    """
-    Creates a binary circular mask with a rectangular hole in the center.
-    The circle fills the mask dimensions, and the hole is 1/4 width and height.
-    Args:
-        shape (tuple): The (height, width) of the desired mask.
-    Returns:
-        numpy.ndarray: A uint8 NumPy array representing the mask
-                       (255 in the circle ring, 0 elsewhere and in the hole).
-    """
-    h, w = image.shape[:2]
-    mask = np.zeros((h, w), dtype=np.uint8)
-    center_x, center_y = w // 2, h // 2
-    radius = min(w, h) // 2
-    # 1. Draw the outer filled white circle
-    cv2.circle(mask, (center_x, center_y), radius, 255, -1)
-    # 2. Calculate rectangle dimensions and corners for the hole
-    rect_w = round(w / 4.4)
-    rect_h = round(h / 4.4)
-    # Calculate top-left corner centered
-    rect_x1 = center_x - rect_w // 2
-    rect_y1 = center_y - rect_h // 2
-    # Calculate bottom-right corner
-    rect_x2 = rect_x1 + rect_w
-    rect_y2 = rect_y1 + rect_h
-    # 3. Draw the inner filled black rectangle (the hole)
-    # Use color=0 and thickness=-1 to fill with black
-    cv2.rectangle(mask, (rect_x1, rect_y1), (rect_x2, rect_y2), 0, -1)
-    return mask
-
-
 class FarmMapTask(BigMap):
 
     def __init__(self, *args, **kwargs):
@@ -211,7 +183,11 @@ class FarmMapTask(BigMap):
                     self.log_info(f'reached star {star} {distance} {self.star_move_distance_threshold}')
                     self.remove_star(star)
                     continue
-                elif distance >= self.height_of_screen(0.4):
+                passed = self.find_closest(self.my_location)
+                if passed is not star and self.my_location.center_distance(passed) <= self.star_move_distance_threshold:
+                    self.log_info(f'passed star {passed} on the way to {star}')
+                    self.remove_star(passed)
+                if distance >= self.height_of_screen(0.4):
                     too_far_count += 1
                     if self.debug:
                         self.screenshot('too_far', frame=self.big_map_frame, show_box=True)
@@ -249,36 +225,6 @@ star_color = {
 }
 
 
-def sort_stars(points, start_point, max_distance=0):
-    """
-    BUILDS A PATH using Nearest Neighbor heuristic starting from 'start_point'.
-    Filters steps where distance < 'min_distance'. Prepends start_point.
-    NOTE: This is a HEURISTIC, likely NOT the absolute shortest total path.
-    """
-    unvisited = points[:]  # Copy the list of points to visit
-    if not unvisited:  # Handle empty input list
-        return []
-
-    path_result = []  # Initialize empty list for the results (excluding start)
-    current_point = start_point  # Start the calculation from start_point
-    while unvisited:
-        # Find points reachable according to min_distance
-        # If min_distance is 0, distance(..) >= 0 is always true for distinct points.
-        reachable_points = [p for p in unvisited if
-                            max_distance == 0 or current_point.center_distance(p) <= max_distance]
-        if not reachable_points:
-            # Stop if no remaining points meet the criteria (or if unvisited is empty)
-            # print(f"Stopping: No remaining points meet criteria from {current_point}.") # Optional debug
-            break
-            # Find the closest point among the reachable ones
-        next_point = min(reachable_points, key=lambda p: current_point.center_distance(p))
-
-        path_result.append(next_point)  # Add the chosen point to the result list
-        unvisited.remove(next_point)  # Mark as visited
-        current_point = next_point  # Update the current point for the next iteration
-    return path_result
-
-
 def mask_star(image):
     # return image
     return create_color_mask(image, star_color)
@@ -2,7 +2,7 @@ import cv2
 import numpy as np
 
 import re
-from ok import find_boxes_by_name, find_boxes_within_boundary, Logger
+from ok import find_boxes_within_boundary, Logger
 from src.task.BaseCombatTask import BaseCombatTask
 
 logger = Logger.get_logger(__name__)
@@ -71,6 +71,12 @@ class FiveToOneTask(BaseCombatTask):
         name_box = self.box_of_screen(0.11, 0.19, 0.87, 0.75)
         return self.ocr(box=name_box, threshold=0.1)
 
+    def ocr_merge_result(self):
+        """
+        右下的按钮和上方的获得声骸一次OCR读完
+        """
+        return self.ocr_rois({'button': 'bottom_right', 'got': 'top'}, match={'got': "获得声骸"})
+
     def merge_set(self, name_box, set_name, step):
         keeps = self.config.get(set_name, [])
         self.log_info(f'keeps: {len(keeps)} set_name: {set_name} keep: {keeps}')
@@ -126,15 +132,18 @@ class FiveToOneTask(BaseCombatTask):
         while True:
             self.click_relative(0.26, 0.91, after_sleep=0.5)  # 全选
             self.click_relative(0.78, 0.9, after_sleep=1)
+            texts = self.ocr_merge_result()
             if not self.claim_handled:
-                if confirm := self.ocr(match="确认", box="bottom_right"):
+                if confirm := self.filter_ocr(texts['button'], "确认"):
                     self.click_relative(0.49, 0.55, after_sleep=0.1)
                     self.click_box(confirm, after_sleep=0.5)
                     self.claim_handled = True
-            if self.ocr(match="批量融合", box="bottom_right"):
+                    texts = self.ocr_merge_result()
+            if self.filter_ocr(texts['button'], "批量融合"):
                 self.click_relative(0.26, 0.91, after_sleep=0.5)
                 self.log_info(f"{set_name} 不够5个")
                 break  # 没有更多
+            # 同一帧的top已经在ocr_merge_result里读过, 第一次检查直接用缓存
             self.wait_ocr(match="获得声骸", box="top", raise_if_not_found=True, settle_time=1)
             self.click_relative(0.53, 0.05, after_sleep=0.5)
             self.click_relative(0.68, 0.91, after_sleep=0.5)  # 批量融合
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from ok import Logger, Box, get_path_relative_to_exe
+
+logger = Logger.get_logger(__name__)
+
+PACK_FOLDER = os.path.join('assets', 'template_pack')
+PACK_VERSION = 2
+
+
+def pack_dir(width, height, folder=PACK_FOLDER):
+    return os.path.join(folder, f'{width}x{height}')
+
+
+def source_hash(coco_json):
+    with open(coco_json, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def write_pack(feature_dict, box_dict, coco_json, width, height, folder=PACK_FOLDER):
+    """
+    把已经按分辨率缩放并经过feature_processor处理的模板写成一个uint8数组加索引
+    """
+    out = pack_dir(width, height, folder)
+    os.makedirs(out, exist_ok=True)
+    index = {}
+    offset = 0
+    mats = []
+    masks = {}
+    for name, feature in feature_dict.items():
+        mat = np.ascontiguousarray(feature.mat, dtype=np.uint8)
+        box = box_dict[name]
+        index[name] = {'offset': offset, 'shape': list(mat.shape), 'x': feature.x, 'y': feature.y,
+                       'scaling': feature.scaling, 'box': [box.x, box.y, box.width, box.height]}
+        if feature.mask is not None:
+            # mask的类型不一定是uint8, 单独保存
+            index[name]['mask'] = f'm{len(masks)}'
+            masks[index[name]['mask']] = feature.mask
+        offset += mat.size
+        mats.append(mat.ravel())
+    np.save(os.path.join(out, 'templates.npy'), np.concatenate(mats) if mats else np.zeros(0, dtype=np.uint8))
+    np.savez(os.path.join(out, 'masks.npz'), **masks)
+    with open(os.path.join(out, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': PACK_VERSION, 'source': source_hash(coco_json), 'width': width, 'height': height,
+                   'features': index}, f, ensure_ascii=False)
+    return out
+
+
+def read_pack(width, height, coco_json, folder=PACK_FOLDER):
+    """
+    Returns:
+        (feature_dict, box_dict), 没有对应分辨率的包或者包和result.json不一致时返回None
+    """
+    from ok import Feature
+    out = pack_dir(width, height, folder)
+    index_path = os.path.join(out, 'index.json')
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get('version') != PACK_VERSION or index.get('source') != source_hash(coco_json):
+        logger.warning(f'template pack {out} is outdated, rebuild with tools/build_template_pack.py')
+        return None
+    # copy-on-write映射, 只有用到的模板才会读入内存
+    data = np.load(os.path.join(out, 'templates.npy'), mmap_mode='c')
+    masks = np.load(os.path.join(out, 'masks.npz'))
+    feature_dict = {}
+    box_dict = {}
+    for name, item in index['features'].items():
+        shape = tuple(item['shape'])
+        mat = data[item['offset']:item['offset'] + int(np.prod(shape))].reshape(shape)
+        feature = Feature(mat, item['x'], item['y'], item['scaling'])
+        if 'mask' in item:
+            feature.mask = masks[item['mask']]
+        feature_dict[name] = feature
+        box_dict[name] = Box(*item['box'], name=name)
+    return feature_dict, box_dict
+
+
+def install_template_pack(feature_set, folder=PACK_FOLDER):
+    """
+    替换feature_set的process_data, 当前分辨率有预编译的模板包时直接映射, 否则走原来的png流程
+    """
+    if feature_set is None or getattr(feature_set, 'template_pack_installed', False):
+        return
+    folder = get_path_relative_to_exe(folder)
+    if not os.path.isdir(folder):
+        return
+    if os.path.exists(os.path.join('ok_tasks', 'assets', 'coco_annotations.json')) or os.path.isdir('ok_import'):
+        # 额外的标注需要和result.json合并, 包里没有
+        return
+    process_data = feature_set.process_data
+    loaded = [None]
+    # 没有包的分辨率, 不用每次都去找
+    missing = set()
+
+    def process_data_from_pack(*args, **kwargs):
+        size = (feature_set.width, feature_set.height)
+        if feature_set.feature_dict and loaded[0] == size:
+            # 包里已经是全部模板, 不存在的名字不用再读png
+            return True
+        if loaded[0] != size and size not in missing:
+            # 分辨率变了, feature_dict里可能还是上一个分辨率的模板, 先找新分辨率的包
+            feature_set.feature_dict = {}
+            feature_set.box_dict = {}
+            start = time.perf_counter()
+            try:
+                pack = read_pack(feature_set.width, feature_set.height, feature_set.coco_json, folder)
+            except Exception as e:
+                logger.error(f'read template pack error: {e}')
+                pack = None
+            if pack is not None:
+                feature_set.feature_dict, feature_set.box_dict = pack
+                feature_set.load_success = True
+                loaded[0] = size
+                logger.info(f'loaded {len(pack[0])} templates from pack {size[0]}x{size[1]} '
+                            f'in {(time.perf_counter() - start) * 1000:.1f}ms')
+                return True
+            missing.add(size)
+        loaded[0] = None
+        return process_data(*args, **kwargs)
+
+    feature_set.process_data = process_data_from_pack
+    feature_set.template_pack_installed = True
+    logger.info(f'template pack installed from {folder}')
+
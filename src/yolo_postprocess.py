@@ -0,0 +1,145 @@
+from typing import Tuple
+
+import numpy as np
+
+from ok import Box
+
+
+def letterbox_gain(input_shape: Tuple[int, int], orig_shape: Tuple[int, int]) -> float:
+    """
+    计算letterbox缩放比例
+    Args:
+        input_shape: 模型输入 (height, width)
+        orig_shape: 原图 (height, width)
+    Returns:
+        缩放比例, 模型坐标 / gain = 原图坐标
+    """
+    return min(input_shape[0] / orig_shape[0], input_shape[1] / orig_shape[1])
+
+
+def decode_output(output: np.ndarray, padding: Tuple[int, int], gain: float, confidence_threshold: float,
+                  label: int = -1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    解码YOLOv8原始输出, 全部使用numpy向量运算
+    Args:
+        output: 模型输出, 形状 (1, 4 + nc, anchors) 或 (4 + nc, anchors)
+        padding: letterbox填充 (top, left)
+        gain: letterbox缩放比例
+        confidence_threshold: 置信度阈值
+        label: 只保留该类别, -1为全部
+    Returns:
+        boxes (N, 4) float32 [left, top, width, height] 原图坐标, scores (N,), class_ids (N,)
+    """
+    predictions = np.squeeze(output)
+    if predictions.ndim == 1:
+        predictions = predictions[:, np.newaxis]
+    # (4 + nc, anchors), 只在类别维度上取最大值, 不转置整个输出
+    class_scores = predictions[4:]
+    class_ids = np.argmax(class_scores, axis=0)
+    scores = np.take_along_axis(class_scores, class_ids[np.newaxis, :], axis=0)[0]
+
+    mask = scores >= confidence_threshold
+    if label != -1:
+        mask &= class_ids == label
+    keep = np.flatnonzero(mask)
+    if keep.size == 0:
+        return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+    cx, cy, w, h = predictions[:4, keep]
+    boxes = np.empty((keep.size, 4), dtype=np.float32)
+    boxes[:, 0] = (cx - padding[1] - w / 2) / gain
+    boxes[:, 1] = (cy - padding[0] - h / 2) / gain
+    boxes[:, 2] = w / gain
+    boxes[:, 3] = h / gain
+    return boxes, scores[keep].astype(np.float32, copy=False), class_ids[keep]
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    按类别的非极大值抑制, 不同类别的框互不抑制
+    Args:
+        boxes: (N, 4) [left, top, width, height]
+        scores: (N,)
+        class_ids: (N,)
+        iou_threshold: IoU阈值
+    Returns:
+        保留的下标, 按分数降序
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    # 按类别平移框, 让不同类别的框不可能重叠, 一次NMS即可完成按类别抑制
+    offset = class_ids.astype(np.float32) * (boxes[:, :2].max() + boxes[:, 2:].max() + 1)
+    x1 = boxes[:, 0] + offset
+    y1 = boxes[:, 1] + offset
+    x2 = x1 + boxes[:, 2]
+    y2 = y1 + boxes[:, 3]
+    areas = boxes[:, 2] * boxes[:, 3]
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        inter_w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        inter_h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = inter_w * inter_h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-6)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def to_boxes(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray, dic_labels: dict) -> list:
+    """
+    转换为Box列表
+    """
+    results = []
+    for (left, top, width, height), score, class_id in zip(boxes.astype(np.int32).tolist(), scores.tolist(),
+                                                           class_ids.tolist()):
+        results.append(Box(left, top, width, height, confidence=score,
+                           name=dic_labels.get(int(class_id), 'unknown')))
+    return results
+
+
+def postprocess_arrays(output: np.ndarray, padding: Tuple[int, int], orig_shape: Tuple[int, int],
+                       input_shape: Tuple[int, int], confidence_threshold: float, iou_threshold: float,
+                       label: int = -1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    YOLOv8输出后处理: 置信度过滤, 类别选择, 坐标还原, 按类别NMS
+    Args:
+        output: 模型输出
+        padding: letterbox填充 (top, left)
+        orig_shape: 原图 (height, width)
+        input_shape: 模型输入 (height, width)
+        confidence_threshold: 置信度阈值
+        iou_threshold: NMS IoU阈值
+        label: 只保留该类别, -1为全部
+    Returns:
+        NMS后的 boxes (N, 4) [left, top, width, height], scores (N,), class_ids (N,)
+    """
+    gain = letterbox_gain(input_shape, orig_shape)
+    boxes, scores, class_ids = decode_output(output, padding, gain, confidence_threshold, label)
+    keep = nms(boxes, scores, class_ids, iou_threshold)
+    return boxes[keep], scores[keep], class_ids[keep]
+
+
+def filter_detections(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray, confidence_threshold: float,
+                      label: int = -1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    在NMS后的结果上按更高的阈值和类别过滤
+    按类别NMS中一个框只会被同类别更高分的框抑制, 所以低阈值NMS后再过滤与直接用高阈值结果相同
+    """
+    mask = scores >= confidence_threshold
+    if label != -1:
+        mask &= class_ids == label
+    return boxes[mask], scores[mask], class_ids[mask]
+
+
+def postprocess(output: np.ndarray, padding: Tuple[int, int], orig_shape: Tuple[int, int],
+                input_shape: Tuple[int, int], confidence_threshold: float, iou_threshold: float,
+                dic_labels: dict, label: int = -1) -> list:
+    """
+    YOLOv8输出后处理, 返回 list[Box]
+    """
+    return to_boxes(*postprocess_arrays(output, padding, orig_shape, input_shape, confidence_threshold,
+                                        iou_threshold, label), dic_labels)
@@ -0,0 +1,75 @@
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+PAD_VALUE = 114
+
+
+class _Slot:
+    """
+    batch中一张图的缩放/填充参数和缩放缓冲区
+    """
+
+    def __init__(self):
+        self.source_shape = None
+        self.resized = None
+        self.size = (0, 0)
+        self.pad = (0, 0)
+
+
+class LetterboxPreprocessor:
+    """
+    letterbox预处理, 直接写入预分配的NCHW float32输入张量
+    输入分辨率不变时复用缩放缓冲区和填充区域, 每帧不再产生整图临时数组
+    """
+
+    def __init__(self, input_h: int, input_w: int, batch: int = 1):
+        self.input_h = input_h
+        self.input_w = input_w
+        self.tensor = np.empty((batch, 3, input_h, input_w), dtype=np.float32)
+        self._slots = [_Slot() for _ in range(batch)]
+
+    @property
+    def pad(self):
+        return self._slots[0].pad
+
+    def _prepare(self, slot: _Slot, index: int, source_shape: Tuple[int, int]):
+        """
+        分辨率变化时重新计算缩放/填充参数, 并重新填充背景
+        """
+        h, w = source_shape
+        r = min(self.input_h / h, self.input_w / w)
+        new_w, new_h = int(round(w * r)), int(round(h * r))
+        dw, dh = (self.input_w - new_w) / 2, (self.input_h - new_h) / 2
+        top, left = int(round(dh - 0.1)), int(round(dw - 0.1))
+        slot.size = (new_w, new_h)
+        slot.pad = (top, left)
+        slot.resized = None if (new_w, new_h) == (w, h) else np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self.tensor[index].fill(PAD_VALUE / 255.0)
+        slot.source_shape = source_shape
+
+    def __call__(self, img: np.ndarray, index: int = 0) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """
+        Args:
+            img: BGR图像
+            index: 写入batch中的第几张
+        Returns:
+            (batch, 3, H, W) RGB 0-1 输入张量 (每次调用复用同一数组), 填充 (top, left)
+        """
+        slot = self._slots[index]
+        source_shape = img.shape[:2]
+        if source_shape != slot.source_shape:
+            self._prepare(slot, index, source_shape)
+        if slot.resized is not None:
+            cv2.resize(img, slot.size, dst=slot.resized, interpolation=cv2.INTER_LINEAR)
+            resized = slot.resized
+        else:
+            resized = img
+        new_w, new_h = slot.size
+        top, left = slot.pad
+        # BGR -> RGB 通过通道下标完成, 归一化直接写入张量
+        for c in range(3):
+            np.divide(resized[:, :, 2 - c], np.float32(255.0), dtype=np.float32,
+                      out=self.tensor[index, c, top:top + new_h, left:left + new_w])
+        return self.tensor, slot.pad
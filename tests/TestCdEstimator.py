@@ -0,0 +1,106 @@
+import unittest
+
+from src.CdEstimator import CdEstimator
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCdEstimator(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.estimator = CdEstimator(clock=self.clock)
+
+    def read(self, index, resonance=0, echo=0, liberation=0):
+        self.estimator.observe(index, {'resonance': resonance, 'echo': echo, 'liberation': liberation})
+
+    def test_first_check_reads(self):
+        self.assertTrue(self.estimator.needs_read(0))
+        self.assertEqual(0, self.estimator.get(0, 'echo'))
+
+    def test_predicts_cooling_until_zero(self):
+        self.read(0, resonance=5.0)
+        self.clock.now += 1.5
+        self.assertFalse(self.estimator.needs_read(0))
+        self.assertAlmostEqual(3.5, self.estimator.get(0, 'resonance'))
+        self.clock.now += 3.3
+        self.assertTrue(self.estimator.needs_read(0))
+        self.read(0)
+        self.assertFalse(self.estimator.needs_read(0))
+        self.assertEqual(2, self.estimator.saved)
+
+    def test_ready_is_rechecked(self):
+        self.read(0)
+        self.clock.now += 1.5
+        self.assertFalse(self.estimator.needs_read(0))
+        self.clock.now += 1
+        self.assertTrue(self.estimator.needs_read(0))
+
+    def test_long_cooldown_is_rechecked(self):
+        self.read(0, 15.0, 18.0, 20.0)
+        self.clock.now += 7
+        self.assertFalse(self.estimator.needs_read(0))
+        self.clock.now += 2
+        self.assertTrue(self.estimator.needs_read(0))
+
+    def test_freeze(self):
+        frozen = 1.5
+        estimator = CdEstimator(lambda start: self.clock() - start - frozen, clock=self.clock)
+        estimator.observe(0, {'resonance': 5.0})
+        self.clock.now += 3
+        self.assertAlmostEqual(3.5, estimator.get(0, 'resonance'))
+
+    def test_cast(self):
+        self.read(1)
+        self.estimator.cast(1, 'resonance', 12)
+        self.assertFalse(self.estimator.needs_read(1))
+        self.clock.now += 0.1
+        # 技能栏还没变
+        self.read(1)
+        self.assertAlmostEqual(11.9, self.estimator.get(1, 'resonance'))
+        self.clock.now += 0.3
+        self.read(1, resonance=10.5)
+        self.assertAlmostEqual(10.5, self.estimator.get(1, 'resonance'))
+        self.assertFalse(self.estimator.needs_read(1))
+
+    def test_cast_trusted_until_ready(self):
+        self.read(0, echo=20.0, liberation=25.0)
+        self.estimator.cast(0, 'resonance', 5.0)
+        for _ in range(8):
+            self.clock.now += 0.5
+            self.assertFalse(self.estimator.needs_read(0), self.estimator.predict(0, 'resonance'))
+        self.assertEqual(8, self.estimator.saved)
+        self.clock.now += 0.8
+        self.assertTrue(self.estimator.needs_read(0))
+
+    def test_cast_other_char(self):
+        self.read(0)
+        self.estimator.cast(0, 'echo', 25)
+        self.clock.now += 5
+        self.assertAlmostEqual(20, self.estimator.get(0, 'echo'))
+        self.estimator.cast(0, 'liberation', None)
+        self.assertIsNone(self.estimator.predict(0, 'liberation'))
+
+    def test_surprise(self):
+        self.read(0, resonance=5.0)
+        self.clock.now += 1
+        self.read(0, resonance=8.0)
+        self.assertEqual(1, self.estimator.surprises)
+
+    def test_reset(self):
+        self.read(0)
+        self.estimator.needs_read(0)
+        self.estimator.reset()
+        self.assertEqual(0, self.estimator.checks)
+        self.assertTrue(self.estimator.needs_read(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
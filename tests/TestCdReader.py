@@ -0,0 +1,46 @@
+import time
+import unittest
+
+import cv2
+
+from src.CdReader import CdReader, SLOTS
+
+# OCR在这些截图上读到的冷却时间 (共鸣技能, 声骸, 共鸣解放)
+OCR_CDS = {
+    'tests/images/all_cd_1080p.png': (13.6, 18.4, 22.6),
+    'tests/images/in_combat.png': (0, 0, 0),
+    'tests/images/in_combat2.png': (0, 0, 0),
+    'tests/images/in_combat3.png': (0, 0, 17.2),
+    'tests/images/absorb.png': (0, 3.5, 0),
+}
+
+
+class TestCdReader(unittest.TestCase):
+
+    def test_same_as_ocr(self):
+        reader = CdReader()
+        for path, cds in OCR_CDS.items():
+            self.assertEqual(dict(zip(SLOTS, cds)), reader.read(cv2.imread(path)), path)
+
+    def test_fast(self):
+        reader = CdReader()
+        frame = cv2.imread('tests/images/all_cd_1080p.png')
+        reader.read(frame)
+        start = time.perf_counter()
+        for _ in range(100):
+            reader.read(frame)
+        self.assertLess((time.perf_counter() - start) / 100, 0.001)
+
+    def test_unknown_glyphs_fall_back_and_learn(self):
+        reader = CdReader(glyph_file=None)
+        frame = cv2.imread('tests/images/all_cd_1080p.png')
+        self.assertIsNone(reader.read(frame))
+        self.assertEqual(1, reader.fallbacks)
+        width = frame.shape[1]
+        learned = reader.learn(frame, [(width * 0.84, '13.6'), (width * 0.885, '18.4'), (width * 0.94, '22.6')])
+        self.assertEqual(9, learned)
+        self.assertEqual({'resonance': 13.6, 'echo': 18.4, 'liberation': 22.6}, reader.read(frame))
+
+
+if __name__ == '__main__':
+    unittest.main()
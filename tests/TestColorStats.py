@@ -0,0 +1,27 @@
+import unittest
+
+import cv2
+
+from ok import Box, calculate_color_percentage
+from src import text_white_color
+from src.char.BaseChar import forte_white_color
+from src.color_stats import color_percentages
+from src.task.BaseCombatTask import con_colors
+
+
+class TestColorStats(unittest.TestCase):
+
+    def test_same_as_calculate_color_percentage(self):
+        frame = cv2.imread('tests/images/in_combat3.png')
+        boxes = [Box(1713, 950, 60, 60), Box(715, 971, 63, 63), Box(1127, 996, 30, 12), Box(0, 0, 1920, 1080)]
+        regions = [(box, color) for box in boxes for color in [text_white_color, forte_white_color] + con_colors]
+        expected = [calculate_color_percentage(frame, color, box) for box, color in regions]
+        self.assertEqual(expected, color_percentages(frame, regions))
+
+    def test_out_of_frame_is_zero(self):
+        frame = cv2.imread('tests/images/in_combat3.png')
+        self.assertEqual([0], color_percentages(frame, [(Box(1900, 1000, 100, 100), text_white_color)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+from ok import Box
+from src.EchoTracker import EchoTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDetector:
+    """
+    an echo moving at a constant speed, like the character walking towards it
+    """
+
+    def __init__(self, clock, start=(100, 500), velocity=(150, -30), size=(80, 120)):
+        self.clock = clock
+        self.start = start
+        self.velocity = velocity
+        self.size = size
+        self.calls = 0
+        self.visible = True
+
+    def position(self):
+        return (self.start[0] + self.velocity[0] * self.clock.now,
+                self.start[1] + self.velocity[1] * self.clock.now)
+
+    def __call__(self):
+        self.calls += 1
+        if not self.visible:
+            return []
+        x, y = self.position()
+        return [Box(round(x), round(y), self.size[0], self.size[1], confidence=0.9, name='echo')]
+
+
+class TestEchoTracker(unittest.TestCase):
+
+    def run_frames(self, tracker, detector, clock, frames, frame_time=0.05):
+        errors = []
+        for _ in range(frames):
+            clock.now += frame_time
+            boxes = tracker.update()
+            self.assertEqual(1, len(boxes))
+            x, y = detector.position()
+            errors.append(max(abs(boxes[0].x - x), abs(boxes[0].y - y)))
+        return errors
+
+    def test_predict_between_detections(self):
+        clock = FakeClock()
+        detector = FakeDetector(clock)
+        tracker = EchoTracker(detector, min_interval=4, max_interval=4, min_confidence=0.1,
+                              time_function=clock)
+        errors = self.run_frames(tracker, detector, clock, 40)
+        self.assertEqual(10, detector.calls)
+        # once the velocity is learned the prediction stays within a few pixels
+        self.assertLess(max(errors[8:]), 5)
+
+    def test_low_confidence_forces_detection(self):
+        clock = FakeClock()
+        detector = FakeDetector(clock)
+        tracker = EchoTracker(detector, min_interval=10, max_interval=10, decay=0.5, min_confidence=0.3,
+                              time_function=clock)
+        self.run_frames(tracker, detector, clock, 12)
+        # 0.9 -> 0.45 -> 0.225, re-detect every third frame instead of every tenth
+        self.assertEqual(4, detector.calls)
+
+    def test_interval_adapts_to_inference_cost(self):
+        clock = FakeClock()
+        tracker = EchoTracker(FakeDetector(clock), min_interval=1, max_interval=6, budget=0.01,
+                              time_function=clock)
+        tracker._update_interval(0.035)
+        self.assertEqual(4, tracker.interval)
+        tracker = EchoTracker(FakeDetector(clock), min_interval=1, max_interval=6, budget=0.01,
+                              time_function=clock)
+        tracker._update_interval(0.2)
+        self.assertEqual(6, tracker.interval)
+        tracker = EchoTracker(FakeDetector(clock), min_interval=1, max_interval=6, budget=0.01,
+                              time_function=clock)
+        tracker._update_interval(0.002)
+        self.assertEqual(1, tracker.interval)
+
+    def test_lost_track_is_dropped(self):
+        clock = FakeClock()
+        detector = FakeDetector(clock)
+        tracker = EchoTracker(detector, min_interval=1, max_interval=1, max_misses=2, time_function=clock)
+        self.run_frames(tracker, detector, clock, 3)
+        detector.visible = False
+        for _ in range(3):
+            clock.now += 0.05
+            self.assertEqual([], tracker.update())
+        self.assertEqual([], tracker.tracks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+from config import config
+from ok import og
+from ok.test.TaskTestCase import TaskTestCase
+from src.task.DailyTask import DailyTask
+from src.yolo_postprocess import to_boxes
+
+config['debug'] = True
+
+BOXES = np.array([[10, 10, 20, 20], [100, 100, 30, 30], [300, 200, 40, 40]], dtype=np.float32)
+SCORES = np.array([0.9, 0.5, 0.25], dtype=np.float32)
+CLASS_IDS = np.zeros(3, dtype=np.int64)
+
+
+class FakeYolo:
+    """
+    不推理, 返回固定的检测结果, 记录调用次数
+    """
+
+    def __init__(self):
+        self.arrays_calls = 0
+        self.detect_calls = 0
+
+    def detect_arrays(self, image, threshold=0.5, label=-1, roi=None, input_shape=None):
+        self.arrays_calls += 1
+        keep = SCORES >= threshold
+        return BOXES[keep].copy(), SCORES[keep].copy(), CLASS_IDS[keep].copy()
+
+    def detect(self, image, threshold=0.5, label=-1, roi=None, input_shape=None):
+        self.detect_calls += 1
+        return self.to_boxes(*self.detect_arrays(image, threshold))
+
+    def to_boxes(self, boxes, scores, class_ids):
+        return to_boxes(boxes, scores, class_ids, {0: 'echo'})
+
+
+class TestFrameCache(TaskTestCase):
+    task_class = DailyTask
+    config = config
+
+    def setUp(self):
+        super().setUp()
+        self.app = og.my_app
+        self.yolo = FakeYolo()
+        self.old_model = self.app._yolo_model
+        self.app._yolo_model = self.yolo
+        self.frame = np.zeros((540, 960, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        self.app._yolo_model = self.old_model
+        super().tearDown()
+
+    def test_yolo_hit(self):
+        hits = self.app.yolo_cache_hits
+        first = self.app.yolo_detect(self.frame, threshold=0.3)
+        second = self.app.yolo_detect(self.frame, threshold=0.3)
+        self.assertEqual(1, self.yolo.arrays_calls)
+        self.assertEqual(hits + 1, self.app.yolo_cache_hits)
+        self.assertEqual([(b.x, b.confidence) for b in first], [(b.x, b.confidence) for b in second])
+
+    def test_yolo_higher_threshold_filters_cache(self):
+        self.assertEqual(3, len(self.app.yolo_detect(self.frame, threshold=0.2)))
+        boxes = self.app.yolo_detect(self.frame, threshold=0.6)
+        self.assertEqual(1, self.yolo.arrays_calls)
+        self.assertEqual([10], [box.x for box in boxes])
+
+    def test_yolo_lower_threshold_misses(self):
+        self.app.yolo_detect(self.frame, threshold=0.3)
+        boxes = self.app.yolo_detect(self.frame, threshold=0.1)
+        self.assertEqual(1, self.yolo.detect_calls)
+        self.assertEqual(3, len(boxes))
+
+    def test_yolo_new_frame(self):
+        self.app.yolo_detect(self.frame, threshold=0.3)
+        self.app.yolo_detect(self.frame.copy(), threshold=0.3)
+        self.assertEqual(2, self.yolo.arrays_calls)
+
+    def test_yolo_returns_new_boxes(self):
+        boxes = self.app.yolo_detect(self.frame, threshold=0.3)
+        boxes[0].x += 100
+        self.assertEqual(10, self.app.yolo_detect(self.frame, threshold=0.3)[0].x)
+
+    def test_process_frame(self):
+        calls = []
+
+        def processor(area):
+            calls.append(area.shape)
+            return area.copy()
+
+        area = self.frame[10:50, 20:80]
+        first = self.app.process_frame(self.frame, processor, area)
+        self.assertIs(first, self.app.process_frame(self.frame, processor, self.frame[10:50, 20:80]))
+        self.assertEqual(1, len(calls))
+        self.app.process_frame(self.frame, processor, self.frame[10:60, 20:80])
+        self.assertEqual(2, len(calls))
+        frame = self.frame.copy()
+        self.app.process_frame(frame, processor, frame[10:50, 20:80])
+        self.assertEqual(3, len(calls))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import time
 import unittest
 from config import config
 from ok.test.TaskTestCase import TaskTestCase
+from src.ArrowAngleEstimator import ArrowAngleEstimator
 from src.task.FarmMapTask import FarmMapTask
 
 config['debug'] = True
@@ -17,6 +18,20 @@ class TestTacet(TaskTestCase):
         self.logger.info(f'test_find_treasure_icon {angle}')
         self.assertTrue(100 <= angle <= 200)
 
+    def test_arrow_angle_matches_brute_force(self):
+        self.set_image('tests/images/mini_map.png')
+        arrow_template = self.task.get_feature_by_name('arrow')
+        target_box = self.task.get_box_by_name('arrow')
+        estimator = ArrowAngleEstimator(arrow_template.mat)
+        crop = self.task.frame[target_box.y:target_box.y + target_box.height,
+                               target_box.x:target_box.x + target_box.width]
+        brute_angle, brute_confidence, _ = estimator.brute_force(crop)
+        angle, confidence, _ = estimator.estimate(crop)
+        self.logger.info(f'test_arrow_angle_matches_brute_force {angle} {brute_angle}')
+        self.assertEqual(brute_angle, angle)
+        self.assertAlmostEqual(brute_confidence, confidence, places=4)
+        self.assertEqual(angle, self.task.get_my_angle())
+
     def test_find_path(self):
         self.set_image('tests/images/path.png')
         self.task.load_stars(wait_world=False)
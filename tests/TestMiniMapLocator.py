@@ -0,0 +1,58 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from src.MiniMapLocator import MiniMapLocator, circle_mask_with_hole
+
+
+def load_maps():
+    big_map = cv2.imread('tests/images/path.png')
+    # box_minimap在1920x1080下的位置
+    mini_map = cv2.imread('tests/images/mini_map.png')[28:213, 36:222]
+    return big_map, mini_map
+
+
+class TestMiniMapLocator(unittest.TestCase):
+
+    def test_same_as_full_matching(self):
+        big_map, mini_map = load_maps()
+        window = (1000, 350, 372, 319)
+        result = cv2.matchTemplate(big_map[350:669, 1000:1372], mini_map, cv2.TM_CCOEFF_NORMED,
+                                   mask=circle_mask_with_hole(*mini_map.shape[:2]))
+        _, expected, _, (x, y) = cv2.minMaxLoc(result)
+        locator = MiniMapLocator(big_map, window)
+        found = locator.locate(mini_map, now=0)
+        self.assertEqual((1000 + x, 350 + y), found[:2])
+        self.assertAlmostEqual(expected, found[2], places=4)
+
+    def test_track_moving(self):
+        big_map, mini_map = load_maps()
+        locator = MiniMapLocator(big_map, (1000, 350, 372, 319))
+        x, y, _ = locator.locate(mini_map, now=0)
+        for i in range(1, 10):
+            sx, sy = x + 6 * i, y + 3 * i
+            found = locator.locate(big_map[sy:sy + 185, sx:sx + 186], now=i * 0.2)
+            self.assertEqual((sx, sy), found[:2])
+            self.assertGreater(found[2], 0.99)
+        # 速度稳定后预测位置几乎不偏
+        self.assertLess(locator.drift, 1)
+        self.assertLess(locator.window[2], 372)
+
+    def test_lost_grows_window(self):
+        big_map, mini_map = load_maps()
+        locator = MiniMapLocator(big_map, (1000, 350, 372, 319))
+        locator.locate(mini_map, now=0)
+        noise = np.random.default_rng(0).integers(0, 255, mini_map.shape, dtype=np.uint8)
+        self.assertIsNone(locator.locate(noise, now=0.2))
+        width = locator.window[2]
+        locator.locate(noise, now=0.4)
+        self.assertGreater(locator.window[2], width)
+        self.assertIsNotNone(locator.locate(mini_map, now=0.6))
+
+    def test_mask_cached(self):
+        self.assertIs(circle_mask_with_hole(185, 186), circle_mask_with_hole(185, 186))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,6 +21,28 @@ class TestTacet(TaskTestCase):
         # angle, box = self.task.get_my_angle()
         self.assertTrue(result)
 
+    def test_ocr_cache(self):
+        self.set_image('tests/images/absorb.png')
+        texts = self.task.ocr(0.5, 0.3, 0.9, 0.9)
+        hits = self.task.ocr_cache_hits
+        matched = self.task.ocr(0.5, 0.3, 0.9, 0.9, match=texts[0].name)
+        self.assertEqual(hits + 1, self.task.ocr_cache_hits)
+        self.assertTrue(matched)
+        self.assertTrue(all(text.name == texts[0].name for text in matched))
+        self.set_image('tests/images/absorb.png')
+        self.task.ocr(0.5, 0.3, 0.9, 0.9)
+        self.assertEqual(hits + 1, self.task.ocr_cache_hits)
+
+    def test_ocr_cache_copies(self):
+        self.set_image('tests/images/absorb.png')
+        texts = self.task.ocr(0.5, 0.3, 0.9, 0.9)
+        x, name = texts[0].x, texts[0].name
+        texts[0].x += 100
+        texts[0].name = 'changed'
+        again = self.task.ocr(0.5, 0.3, 0.9, 0.9)
+        self.assertEqual((x, name), (again[0].x, again[0].name))
+        again[0].x += 100
+        self.assertEqual(x, self.task.ocr(0.5, 0.3, 0.9, 0.9)[0].x)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,49 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.ocr_batch import containers, inside, tile, untile
+
+
+def text(x, y, width=20, height=10, name=''):
+    return SimpleNamespace(x=x, y=y, width=width, height=height, name=name)
+
+
+class TestOcrBatch(unittest.TestCase):
+
+    def test_containers(self):
+        rects = [(10, 10, 50, 20), (0, 0, 100, 100), (200, 0, 10, 10), (0, 0, 100, 100)]
+        self.assertEqual([1, 1, 2, 1], containers(rects))
+
+    def test_tile_keeps_crops(self):
+        crops = [np.full((h, w, 3), i + 1, dtype=np.uint8) for i, (h, w) in enumerate([(40, 300), (60, 80), (30, 90)])]
+        canvas, tiles = tile(crops, gap=32)
+        self.assertEqual(3, len(tiles))
+        for i, (x, y, w, h) in enumerate(tiles):
+            self.assertTrue((canvas[y:y + h, x:x + w] == i + 1).all())
+        for i, a in enumerate(tiles):
+            for b in tiles[i + 1:]:
+                separated_x = a[0] + a[2] + 32 <= b[0] or b[0] + b[2] + 32 <= a[0]
+                separated_y = a[1] + a[3] + 32 <= b[1] or b[1] + b[3] + 32 <= a[1]
+                self.assertTrue(separated_x or separated_y)
+        # 按行排, 比竖着排成一列矮
+        self.assertLess(canvas.shape[0], 40 + 60 + 30 + 64)
+
+    def test_untile(self):
+        crops = [np.zeros((40, 300, 3), np.uint8), np.zeros((60, 80, 3), np.uint8)]
+        _, tiles = tile(crops, gap=32)
+        boxes = [text(tiles[1][0] + 5, tiles[1][1] + 5, name='b'), text(10, 10, name='a'),
+                 text(tiles[0][0] + 300 + 5, tiles[0][1] + 100, name='gap')]
+        a, b = untile(boxes, tiles, [(1000, 500), (50, 60)])
+        self.assertEqual(['a'], [t.name for t in a])
+        self.assertEqual((1010, 510), (a[0].x, a[0].y))
+        self.assertEqual((55, 65), (b[0].x, b[0].y))
+
+    def test_inside(self):
+        self.assertTrue(inside(text(0, 0), (5, 0, 20, 20)))
+        self.assertFalse(inside(text(0, 0), (15, 0, 20, 20)))
+
+
+if __name__ == '__main__':
+    unittest.main()
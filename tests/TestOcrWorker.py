@@ -0,0 +1,85 @@
+import threading
+import unittest
+from concurrent.futures import CancelledError
+
+from src.OcrWorker import OcrWorker
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestOcrWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = []
+        self.worker = OcrWorker(self.ocr, max_pending=2, max_age=0.5, clock=self.clock)
+
+    def tearDown(self):
+        self.release.set()
+        self.worker.close()
+
+    def ocr(self, frame, box, params):
+        self.calls.append(frame)
+        self.started.set()
+        self.release.wait(5)
+        if frame == 'bad':
+            raise ValueError('bad frame')
+        return [f'{frame} {box} {params.get("match")}']
+
+    def block(self):
+        # 第一个任务卡在识别里, 后面提交的任务只能排队
+        self.release.clear()
+        first = self.worker.submit('first', 'box')
+        self.assertTrue(self.started.wait(5))
+        return first
+
+    def test_result(self):
+        future = self.worker.submit('frame', 'box', match='Lv')
+        self.assertEqual(['frame box Lv'], future.result(5))
+        self.assertEqual(1, self.worker.completed)
+
+    def test_drop_oldest_when_full(self):
+        first = self.block()
+        futures = [self.worker.submit(f'frame{i}', 'box') for i in range(3)]
+        self.assertTrue(futures[0].cancelled())
+        self.release.set()
+        self.assertEqual(['first box None'], first.result(5))
+        self.assertEqual(['frame2 box None'], futures[2].result(5))
+        self.assertEqual(['first', 'frame1', 'frame2'], self.calls)
+        self.assertEqual(1, self.worker.dropped)
+
+    def test_stale_cancelled(self):
+        first = self.block()
+        old = self.worker.submit('old', 'box', timestamp=self.clock.now)
+        self.clock.now += 1
+        new = self.worker.submit('new', 'box')
+        self.release.set()
+        first.result(5)
+        self.assertEqual(['new box None'], new.result(5))
+        with self.assertRaises(CancelledError):
+            old.result(5)
+        self.assertEqual(['first', 'new'], self.calls)
+        self.assertEqual(1, self.worker.stale)
+
+    def test_exception(self):
+        future = self.worker.submit('bad', 'box')
+        self.assertIsInstance(future.exception(5), ValueError)
+        self.assertEqual(1, self.worker.failed)
+
+    def test_closed(self):
+        self.worker.close()
+        self.assertTrue(self.worker.submit('frame', 'box').cancelled())
+
+
+if __name__ == '__main__':
+    unittest.main()
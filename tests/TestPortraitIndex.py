@@ -0,0 +1,36 @@
+import unittest
+from config import config
+from ok.test.TaskTestCase import TaskTestCase
+from src.char.CharFactory import char_names
+from src.task.AutoCombatTask import AutoCombatTask
+
+config['debug'] = True
+
+
+class TestPortraitIndex(TaskTestCase):
+    task_class = AutoCombatTask
+    config = config
+
+    def test_atlas_match_same_as_full_match(self):
+        for image in ['tests/images/in_combat2.png', 'tests/images/in_combat3.png', 'tests/images/test_forte.png']:
+            self.set_image(image)
+            for slot in ['box_char_1', 'box_char_2', 'box_char_3']:
+                box = self.task.get_box_by_name(slot)
+                expected = self.task.find_best_match_in_box(box, char_names, threshold=0.72)
+                matched = self.task.portrait_index.match(self.task, box, threshold=0.72)
+                self.assertEqual(expected.name, matched.name)
+
+    def test_unchanged_portraits_reuse_chars(self):
+        self.set_image('tests/images/in_combat3.png')
+        self.task.load_chars()
+        chars = list(self.task.chars)
+        reused = self.task.portrait_index.reused
+        self.set_image('tests/images/in_combat3.png')
+        self.task.load_chars()
+        self.assertEqual(reused + 3, self.task.portrait_index.reused)
+        for old, new in zip(chars, self.task.chars):
+            self.assertIs(old, new)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import unittest
+
+import cv2
+import numpy as np
+
+from src.pyramid_match import PYRAMID_FEATURES, pyramid_match
+
+
+def load_case(name, width=1920, height=1080):
+    """
+    result.json里的标注图缩放到目标分辨率, 返回(截图, 模板, 标注位置)
+    """
+    with open(os.path.join('assets', 'result.json'), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    category_id = next(c['id'] for c in data['categories'] if c['name'] == name)
+    annotation = next(a for a in data['annotations'] if a['category_id'] == category_id)
+    file_name = next(i['file_name'] for i in data['images'] if i['id'] == annotation['image_id'])
+    image = cv2.imread(os.path.join('assets', file_name))
+    scale = width / image.shape[1]
+    x, y, w, h = annotation['bbox']
+    template = image[round(y):round(y + h), round(x):round(x + w), :3]
+    template = cv2.resize(template, (round(template.shape[1] * scale), round(template.shape[0] * scale)))
+    frame = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    return frame, template, (round(x * scale), round(y * scale))
+
+
+def full_matches(frame, template, threshold):
+    """
+    全图matchTemplate, 按置信度从高到低取互不重叠的结果
+    """
+    result = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+    ys, xs = np.where(result >= threshold)
+    height, width = template.shape[:2]
+    selected = []
+    for i in np.argsort(-result[ys, xs], kind='stable'):
+        x, y = int(xs[i]), int(ys[i])
+        if not any(x < sx + width and x + width > sx and y < sy + height and y + height > sy
+                   for sx, sy, _ in selected):
+            selected.append((x, y, float(result[y, x])))
+    return selected
+
+
+def paste_stars(count=48):
+    """
+    大地图上按网格贴很多星星, 全部都要找到
+    """
+    frame, template, _ = load_case('big_map_star')
+    height, width = template.shape[:2]
+    columns = 8
+    for i in range(count):
+        x = 200 + (i % columns) * width * 3
+        y = 150 + (i // columns) * height * 3
+        frame[y:y + height, x:x + width] = template
+    return frame, template
+
+
+class TestPyramidMatch(unittest.TestCase):
+
+    def test_same_as_full_matching(self):
+        for name in PYRAMID_FEATURES:
+            frame, template, (x, y) = load_case(name)
+            result = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+            _, expected, _, expected_loc = cv2.minMaxLoc(result)
+            matches = pyramid_match(frame, template, 0.7, PYRAMID_FEATURES[name], limit=1)
+            self.assertEqual(1, len(matches), name)
+            mx, my, confidence = matches[0]
+            self.assertEqual(expected_loc, (mx, my), name)
+            self.assertAlmostEqual(expected, confidence, places=4, msg=name)
+            self.assertLessEqual(abs(mx - x) + abs(my - y), 2, name)
+
+    def test_many_matches(self):
+        frame, template = paste_stars()
+        expected = full_matches(frame, template, 0.7)
+        self.assertGreaterEqual(len(expected), 48)
+        matches = pyramid_match(frame, template, 0.7, PYRAMID_FEATURES['big_map_star'])
+        self.assertEqual(len(expected), len(matches))
+        for ex, ey, confidence in expected:
+            self.assertTrue(any((mx, my) == (ex, ey) and abs(c - confidence) < 1e-4 for mx, my, c in matches),
+                            f'missed {ex},{ey} {confidence:.3f}')
+
+    def test_too_many_candidates_falls_back(self):
+        frame, template = paste_stars()
+        self.assertIsNone(pyramid_match(frame, template, 0.7, PYRAMID_FEATURES['big_map_star'], max_candidates=16))
+        self.assertEqual(1, len(pyramid_match(frame, template, 0.7, PYRAMID_FEATURES['big_map_star'], limit=1,
+                                              max_candidates=16)))
+
+    def test_not_found(self):
+        frame, template, _ = load_case('big_map_star')
+        self.assertEqual([], pyramid_match(frame[:, 1000:], template, 0.7, 4))
+
+    def test_small_template_falls_back(self):
+        frame, template, _ = load_case('boss_check_mark', 1280, 720)
+        self.assertIsNone(pyramid_match(frame, template, 0.7, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
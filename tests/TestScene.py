@@ -0,0 +1,37 @@
+import unittest
+from config import config
+from ok.test.TaskTestCase import TaskTestCase
+from src.task.AutoCombatTask import AutoCombatTask
+
+config['debug'] = True
+
+
+class TestScene(TaskTestCase):
+    task_class = AutoCombatTask
+    config = config
+
+    def test_char_slots_match_find_one(self):
+        for image in ['tests/images/in_combat.png', 'tests/images/mini_map.png', 'tests/images/big_map.png']:
+            self.set_image(image)
+            slots = [self.task.find_one(f'char_{i}_text', threshold=0.8) for i in range(1, 4)]
+            exist_count = sum(slot is not None for slot in slots)
+            current = next((i for i, slot in enumerate(slots) if slot is None), -1)
+            expected = (True, current, exist_count + 1) if exist_count in (1, 2) else (False, -1, exist_count + 1)
+            self.assertEqual(expected, self.task.match_char_slots())
+
+    def test_in_team_evaluated_once_per_frame(self):
+        self.set_image('tests/images/in_combat.png')
+        in_team = self.task.in_team()
+        self.assertTrue(in_team[0])
+        stat = self.task.scene.stats['in_team']
+        evaluations = stat.evaluations
+        self.assertEqual(in_team, self.task.in_team())
+        self.assertTrue(self.task.in_team_and_world())
+        self.assertEqual(evaluations, stat.evaluations)
+        self.set_image('tests/images/big_map.png')
+        self.task.in_team()
+        self.assertEqual(evaluations + 1, stat.evaluations)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import random
+import unittest
+
+from src.StarRoute import StarRoute, distance, nearest_neighbour, path_length
+
+
+def identity(point):
+    return point
+
+
+class TestStarRoute(unittest.TestCase):
+
+    def test_shorter_than_greedy(self):
+        rng = random.Random(1)
+        points = [(rng.uniform(0, 1920), rng.uniform(0, 1080)) for _ in range(40)]
+        route = StarRoute(points, (960, 540), position=identity)
+        self.assertEqual(sorted(points), sorted(route.stars[1:]))
+        self.assertEqual((960, 540), route.stars[0])
+        self.assertLess(route.length, route.greedy_length)
+        self.assertAlmostEqual(route.length, path_length(route.stars[0], route.stars[1:]))
+
+    def test_greedy_order(self):
+        points = [(0, 10), (0, 30), (0, 20), (0, 100)]
+        self.assertEqual([0, 2, 1], nearest_neighbour((0, 0), points, max_distance=20))
+
+    def test_max_distance(self):
+        rng = random.Random(2)
+        # 一条弯曲的星星路线
+        points = [(i * 40 + rng.uniform(-10, 10), (i % 5) * 30 + rng.uniform(-10, 10)) for i in range(30)]
+        rng.shuffle(points)
+        route = StarRoute(points, (0, 0), max_distance=80, position=identity)
+        self.assertLessEqual(route.length, route.greedy_length)
+        for a, b in zip(route.stars, route.stars[1:]):
+            self.assertLessEqual(distance(a, b), 80)
+
+    def test_closest_after_remove(self):
+        rng = random.Random(3)
+        points = [(rng.uniform(0, 1920), rng.uniform(0, 1080)) for _ in range(50)]
+        route = StarRoute(points, (960, 540), cell_size=64, position=identity)
+        for point in route.stars[:20]:
+            route.remove(point)
+        for _ in range(100):
+            query = (rng.uniform(-200, 2100), rng.uniform(-200, 1300))
+            star, d = route.closest(query)
+            self.assertAlmostEqual(min(distance(query, p) for p in route.stars), d)
+            self.assertIn(star, route.stars)
+
+
+if __name__ == '__main__':
+    unittest.main()
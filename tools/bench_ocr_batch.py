@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ocr_batch import containers, inside, tile, untile
+
+# 迁移到ocr_rois的任务里同一帧读取的区域, 相对坐标(x, y, to_x, to_y)
+ROI_SETS = {
+    'DailyTask': {'progress': (0.1, 0.1, 0.5, 0.75), 'points': (0.19, 0.8, 0.30, 0.93)},
+    'BulkFusionDiscardTask': {'count': (0.58, 0.80, 0.93, 0.90), 'area': (0.50, 0.75, 0.98, 0.95)},
+    'FiveToOneTask': {'button': (0.5, 0.5, 1, 1), 'got': (0, 0, 1, 0.5)},
+}
+
+
+class Text:
+
+    def __init__(self, pos, text):
+        self.x, self.y = round(pos[0][0]), round(pos[0][1])
+        self.width, self.height = round(pos[2][0] - pos[0][0]), round(pos[2][1] - pos[0][1])
+        self.name = text
+
+
+def read(ocr, image):
+    result = ocr.ocr(image)
+    return [Text(pos, text) for pos, (text, _) in (result[0] or [])]
+
+
+def main(image_path='tests/images/5_to_1.png', runtime='openvino', iterations=5):
+    """
+    对比每个区域单独OCR和ocr_rois的拼图OCR, runtime是openvino(config里的默认)或者onnxruntime
+    """
+    from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+    ocr = ONNXPaddleOcr(use_angle_cls=False, use_dml=False, use_npu=False, use_openvino=runtime == 'openvino')
+    frame = cv2.imread(image_path)
+    height, width = frame.shape[:2]
+    print(f'IMAGE: {image_path} {width}x{height} {runtime}')
+    for task, rois in ROI_SETS.items():
+        rects = [(round(x * width), round(y * height), round((to_x - x) * width), round((to_y - y) * height))
+                 for x, y, to_x, to_y in rois.values()]
+        crops = [frame[y:y + h, x:x + w] for x, y, w, h in rects]
+
+        def separate():
+            return [sorted(text.name for text in read(ocr, crop)) for crop in crops]
+
+        def batched():
+            owners = containers(rects)
+            tiled = sorted(set(owners))
+            canvas, tiles = tile([crops[i] for i in tiled], gap=max(32, round(height * 0.03)))
+            texts = dict(zip(tiled, untile(read(ocr, canvas), tiles, [rects[i][:2] for i in tiled])))
+            return [sorted(text.name for text in texts[owner] if owner == i or inside(text, rect))
+                    for i, (rect, owner) in enumerate(zip(rects, owners))]
+
+        results = {}
+        for name, fn in (('separate', separate), ('batched', batched)):
+            results[name] = fn()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            elapsed = (time.perf_counter() - start) / iterations
+            print(f'{task:<24}{name:<10}{elapsed * 1000:8.1f}ms per {len(rois)} rois, '
+                  f'{len(rois) / elapsed:6.1f} rois/s, {1 / elapsed:6.1f} calls/s')
+        same = results['separate'] == results['batched']
+        print(f"{task:<24}{'SAME' if same else 'DIFF'} {results['batched']}"
+              f"{'' if same else ' separate: ' + str(results['separate'])}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
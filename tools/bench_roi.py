@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ok import Box, adjust_coordinates, calculate_color_percentage
+from src import text_white_color
+from src.roi import RoiRegistry, scaled
+
+HUD = {
+    'check_count_down': (1820, 266, 2100, 340),
+    'con_full': (1431, 1942, 1557, 2068),
+    'forte_full': (2251, 1993, 2311, 2016),
+    'zani_attack_text': (2709, 1894, 2827, 1972),
+}
+
+
+class Screen:
+    """
+    box_of_screen_scaled的计算, 和BaseTask相同
+    """
+
+    def __init__(self, frame):
+        self.height, self.width = frame.shape[:2]
+        self.screen_width, self.screen_height = self.width, self.height
+
+    def box_of_screen_scaled(self, original_width, original_height, x, y, to_x, to_y, name=None, hcenter=False,
+                             vcenter=False):
+        x, y, w, h, _ = adjust_coordinates(x, y, to_x - x, to_y - y, self.screen_width, self.screen_height,
+                                           original_width, original_height, hcenter=hcenter, vcenter=vcenter)
+        return Box(x, y, w, h, name=name)
+
+
+def bench(name, fun, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fun()
+    elapsed = (time.perf_counter() - start) * 1e6 / iterations
+    print(f"{name:<40}{elapsed:>10.2f}us")
+    return elapsed
+
+
+def main(image_path='tests/images/in_combat3.png', iterations=20000):
+    frame = cv2.imread(image_path)
+    if frame is None:
+        print(f"ERROR: can not read {image_path}")
+        sys.exit(1)
+    screen = Screen(frame)
+    registry = RoiRegistry()
+    for key, area in HUD.items():
+        registry.declare(key, scaled(3840, 2160, *area, name=key, hcenter=True))
+
+    def per_call_boxes():
+        for key, area in HUD.items():
+            box = screen.box_of_screen_scaled(3840, 2160, *area, name=key, hcenter=True)
+            calculate_color_percentage(frame, text_white_color, box)
+            box.crop_frame(frame)
+
+    def registry_boxes():
+        for key in HUD:
+            calculate_color_percentage(frame, text_white_color, registry.box(screen, key))
+            frame[registry.slice(screen, key)]
+
+    print(f"IMAGE: {image_path} {frame.shape[1]}x{frame.shape[0]}, {len(HUD)} hud regions per read")
+    before = bench('box_of_screen_scaled + crop_frame', per_call_boxes, iterations)
+    after = bench('roi registry + slice view', registry_boxes, iterations)
+    print(f"speedup {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
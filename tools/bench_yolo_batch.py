@@ -0,0 +1,52 @@
+import glob
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.yolo_preprocess import LetterboxPreprocessor
+
+
+def main(model_path='assets/echo_model/echo.onnx', iterations=20):
+    import onnxruntime as ort
+    if not os.path.exists(model_path):
+        print(f"ERROR: model not found: {model_path}")
+        sys.exit(1)
+    frames = [cv2.imread(path) for path in sorted(glob.glob('tests/images/*.png'))[:4]]
+    session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    model_input = session.get_inputs()[0]
+    if isinstance(model_input.shape[0], int):
+        print(f"ERROR: model batch is fixed to {model_input.shape[0]}, export it with dynamic=True")
+        sys.exit(2)
+    h, w = [d if isinstance(d, int) else 640 for d in model_input.shape[2:4]]
+    output_name = session.get_outputs()[0].name
+    print(f"MODEL: {model_path} input {model_input.shape} frames {len(frames)}")
+
+    single = LetterboxPreprocessor(h, w)
+    batch = LetterboxPreprocessor(h, w, batch=len(frames))
+
+    def run_single():
+        for frame in frames:
+            tensor, _ = single(frame)
+            session.run([output_name], {model_input.name: tensor})
+
+    def run_batch():
+        for i, frame in enumerate(frames):
+            batch(frame, i)
+        session.run([output_name], {model_input.name: batch.tensor})
+
+    for name, fn in (('batch-1', run_single), (f'batch-{len(frames)}', run_batch)):
+        fn()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed * 1000 / iterations:.1f}ms per {len(frames)} frames, "
+              f"{iterations * len(frames) / elapsed:.1f} frames/s")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.yolo_postprocess import decode_output, letterbox_gain, nms
+
+
+def letterbox(img, new_shape=(640, 640)):
+    shape = img.shape[:2]
+    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+    new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
+    dw, dh = (new_shape[1] - new_unpad[0]) / 2, (new_shape[0] - new_unpad[1]) / 2
+    if shape[::-1] != new_unpad:
+        img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return img, (top, left)
+
+
+def run_model(model_path, image):
+    import onnxruntime as ort
+    session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    h, w = session.get_inputs()[0].shape[2:4]
+    img, pad = letterbox(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), (h, w))
+    data = np.expand_dims(np.transpose(img / 255.0, (2, 0, 1)), axis=0).astype(np.float32)
+    output = session.run([session.get_outputs()[0].name], {session.get_inputs()[0].name: data})[0]
+    return output, pad, (h, w)
+
+
+def synthetic_output(nc=1, anchors=8400, objects=5, seed=0):
+    rng = np.random.default_rng(seed)
+    output = np.zeros((1, 4 + nc, anchors), dtype=np.float32)
+    output[0, 0:2] = rng.uniform(0, 640, (2, anchors))
+    output[0, 2:4] = rng.uniform(8, 64, (2, anchors))
+    output[0, 4:] = rng.uniform(0, 0.3, (nc, anchors))
+    # clusters of overlapping candidates around a few objects
+    for i in range(objects):
+        idx = rng.choice(anchors, 20, replace=False)
+        output[0, 0, idx] = 100 + i * 90 + rng.normal(0, 2, 20)
+        output[0, 1, idx] = 320 + rng.normal(0, 2, 20)
+        output[0, 2:4, idx] = 48
+        output[0, 4 + i % nc, idx] = rng.uniform(0.5, 0.95, 20)
+    return output, (140, 0), (640, 640)
+
+
+def legacy_postprocess(output, padding, orig_shape, input_shape, confidence_threshold, iou_threshold, label=-1):
+    outputs = np.transpose(np.squeeze(output[0] if isinstance(output, list) else output)).copy()
+    if outputs.ndim == 1:
+        outputs = outputs[np.newaxis, :]
+    boxes, scores, class_ids = [], [], []
+    gain = min(input_shape[0] / orig_shape[0], input_shape[1] / orig_shape[1])
+    outputs[:, 0] -= padding[1]
+    outputs[:, 1] -= padding[0]
+    for i in range(outputs.shape[0]):
+        classes_scores = outputs[i][4:]
+        max_score = np.amax(classes_scores)
+        class_id = np.argmax(classes_scores)
+        if max_score >= confidence_threshold and (label == -1 or label == class_id):
+            x, y, w, h = outputs[i][0], outputs[i][1], outputs[i][2], outputs[i][3]
+            class_ids.append(class_id)
+            scores.append(max_score)
+            boxes.append([int((x - w / 2) / gain), int((y - h / 2) / gain), int(w / gain), int(h / gain)])
+    indices = cv2.dnn.NMSBoxes(boxes, scores, confidence_threshold, iou_threshold)
+    return [(*boxes[i], float(scores[i])) for i in np.array(indices).flatten()]
+
+
+def vectorized_postprocess(output, padding, orig_shape, input_shape, confidence_threshold, iou_threshold, label=-1):
+    gain = letterbox_gain(input_shape, orig_shape)
+    boxes, scores, class_ids = decode_output(output, padding, gain, confidence_threshold, label)
+    keep = nms(boxes, scores, class_ids, iou_threshold)
+    return [(*box, score) for box, score in zip(boxes[keep].astype(np.int32).tolist(), scores[keep].tolist())]
+
+
+def bench(fn, args, iterations):
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = fn(*args)
+    return (time.perf_counter() - start) * 1000 / iterations, result
+
+
+def main(image_path='tests/images/echo.png', model_path='assets/echo_model/echo.onnx', iterations=50):
+    image = cv2.imread(image_path)
+    if image is None:
+        print(f"ERROR: image not found: {image_path}")
+        sys.exit(1)
+    if os.path.exists(model_path):
+        output, pad, input_shape = run_model(model_path, image)
+        print(f"MODEL: {model_path} output {output.shape}")
+    else:
+        output, pad, input_shape = synthetic_output()
+        print(f"WARN: model not found: {model_path}, using synthetic output {output.shape}")
+
+    for threshold in (0.3, 0.5):
+        args = (output, pad, image.shape[:2], input_shape, threshold, 0.45)
+        legacy_ms, legacy = bench(legacy_postprocess, args, iterations)
+        vec_ms, vec = bench(vectorized_postprocess, args, iterations)
+        same = sorted(b[:4] for b in legacy) == sorted(b[:4] for b in vec)
+        print(f"threshold {threshold}: legacy {legacy_ms:.3f}ms vectorized {vec_ms:.3f}ms "
+              f"speedup {legacy_ms / max(vec_ms, 1e-6):.1f}x boxes {len(legacy)}/{len(vec)} same {same}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.yolo_preprocess import LetterboxPreprocessor
+
+
+def legacy_preprocess(img, new_shape=(640, 640)):
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    shape = img.shape[:2]
+    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+    new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
+    dw, dh = (new_shape[1] - new_unpad[0]) / 2, (new_shape[0] - new_unpad[1]) / 2
+    if shape[::-1] != new_unpad:
+        img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    image_data = np.array(img) / 255.0
+    image_data = np.transpose(image_data, (2, 0, 1))
+    return np.expand_dims(image_data, axis=0).astype(np.float32), (top, left)
+
+
+def measure(fn, frame, iterations):
+    fn(frame)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = fn(frame)
+    elapsed = (time.perf_counter() - start) * 1000 / iterations
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size for stat in snapshot.statistics('filename'))
+    return elapsed, peak, allocated, result
+
+
+def main(image_path='tests/images/echo.png', iterations=50):
+    frame = cv2.imread(image_path)
+    if frame is None:
+        print(f"ERROR: image not found: {image_path}")
+        sys.exit(1)
+    print(f"IMAGE: {image_path} {frame.shape}")
+    preprocessor = LetterboxPreprocessor(640, 640)
+    legacy_ms, legacy_peak, _, (legacy_tensor, legacy_pad) = measure(legacy_preprocess, frame, iterations)
+    new_ms, new_peak, _, (new_tensor, new_pad) = measure(preprocessor, frame, iterations)
+    print(f"legacy: {legacy_ms:.2f}ms/frame peak alloc {legacy_peak / 1024 / 1024:.1f}MB")
+    print(f"preallocated: {new_ms:.2f}ms/frame peak alloc {new_peak / 1024 / 1024:.2f}MB")
+    print(f"max abs diff {np.abs(legacy_tensor - new_tensor).max():.6f} pad {legacy_pad}/{new_pad}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
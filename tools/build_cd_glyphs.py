@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.CdReader import CdReader, GLYPH_FILE, SLOTS
+
+# 截图里OCR读到的冷却时间 (共鸣技能, 声骸, 共鸣解放), 没有冷却为0
+LABELS = {
+    'tests/images/all_cd_1080p.png': (13.6, 18.4, 22.6),
+    'tests/images/in_combat.png': (0, 0, 0),
+    'tests/images/in_combat2.png': (0, 0, 0),
+    'tests/images/in_combat3.png': (0, 0, 17.2),
+    'tests/images/absorb.png': (0, 3.5, 0),
+    'tests/images/echo.png': (6.6, 6.8, 0),
+    'tests/images/treasure2.png': (0, 0, 4.6),
+}
+
+SLOT_X = {'resonance': 0.84, 'echo': 0.885, 'liberation': 0.94}
+
+
+def main(out=GLYPH_FILE):
+    """
+    从标注过的截图切出数字字形生成字形库, 然后检查每张截图都能读对
+    """
+    reader = CdReader(glyph_file=None)
+    for path, cds in LABELS.items():
+        frame = cv2.imread(path)
+        texts = [(frame.shape[1] * SLOT_X[slot], f'{cd:.1f}') for slot, cd in zip(SLOTS, cds) if cd > 0]
+        learned = reader.learn(frame, texts)
+        expected = sum(len(text) - 1 for _, text in texts)
+        if learned != expected:
+            print(f'ERROR: {path} segmented {learned} digits, expected {expected}')
+            sys.exit(1)
+    np.savez_compressed(out, labels=reader.labels, bank=reader.bank.astype(np.float16))
+    print(f'saved {len(reader.labels)} glyphs {sorted(set(reader.labels))} to {out}')
+
+    reader = CdReader(out)
+    for path, cds in LABELS.items():
+        frame = cv2.imread(path)
+        result = reader.read(frame)
+        start = time.perf_counter()
+        for _ in range(100):
+            reader.read(frame)
+        elapsed = (time.perf_counter() - start) * 1e6 / 100
+        expected = dict(zip(SLOTS, cds))
+        print(f"{path:<35}{elapsed:8.1f}us {result} {'OK' if result == expected else 'ERROR'}")
+        if result != expected:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from src.template_pack import write_pack, read_pack, PACK_FOLDER
+
+
+def load_png_features(width, height):
+    """
+    和启动时一样从result.json和png加载一个分辨率的全部模板
+    """
+    from ok.feature.FeatureSet import FeatureSet
+    template_matching = config['template_matching']
+    feature_set = FeatureSet(False, template_matching['coco_feature_json'],
+                             default_horizontal_variance=template_matching['default_horizontal_variance'],
+                             default_vertical_variance=template_matching['default_vertical_variance'],
+                             default_threshold=template_matching['default_threshold'],
+                             feature_processor=template_matching['feature_processor'])
+    start = time.perf_counter()
+    feature_set.check_size(np.zeros((height, width, 3), dtype=np.uint8))
+    if not feature_set.feature_dict:
+        feature_set.process_data()
+    return feature_set, time.perf_counter() - start
+
+
+def same_array(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return a.dtype == b.dtype and np.array_equal(a, b)
+
+
+def same_feature(a, b):
+    return same_array(a.mat, b.mat) and same_array(a.mask, b.mask) and (a.x, a.y, a.scaling) == (
+        b.x, b.y, b.scaling)
+
+
+def same_box(a, b):
+    return (a.x, a.y, a.width, a.height, a.name) == (b.x, b.y, b.width, b.height, b.name)
+
+
+def main(folder=PACK_FOLDER):
+    """
+    为supported_resolution里的每个分辨率生成模板包, 并对比png加载和模板包加载的耗时
+    """
+    coco_json = config['template_matching']['coco_feature_json']
+    for width, height in config['supported_resolution']['resize_to']:
+        feature_set, png_time = load_png_features(width, height)
+        out = write_pack(feature_set.feature_dict, feature_set.box_dict, coco_json, width, height, folder)
+        start = time.perf_counter()
+        feature_dict, box_dict = read_pack(width, height, coco_json, folder)
+        pack_time = time.perf_counter() - start
+        if feature_dict.keys() != feature_set.feature_dict.keys():
+            print(f"ERROR: {width}x{height} pack has different template names")
+            sys.exit(1)
+        for name, feature in feature_set.feature_dict.items():
+            if not same_feature(feature, feature_dict[name]) or not same_box(feature_set.box_dict[name],
+                                                                            box_dict[name]):
+                print(f"ERROR: {name} differs between png and pack")
+                sys.exit(1)
+        size = os.path.getsize(os.path.join(out, 'templates.npy')) / 1e6
+        print(f"{width}x{height}: {len(feature_dict)} templates {size:.1f}MB, "
+              f"png {png_time * 1000:.0f}ms pack {pack_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,127 @@
+import glob
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.yolo_postprocess import postprocess_arrays
+from src.yolo_preprocess import LetterboxPreprocessor
+
+IMAGES = 'tests/images/*.png'
+
+
+def load_images(pattern=IMAGES):
+    images = []
+    for path in sorted(glob.glob(pattern)):
+        image = cv2.imread(path)
+        if image is not None:
+            images.append((os.path.basename(path), image))
+    return images
+
+
+def input_size(model_path):
+    import onnxruntime as ort
+    shape = ort.InferenceSession(model_path, providers=['CPUExecutionProvider']).get_inputs()[0].shape
+    return tuple(d if isinstance(d, int) else 640 for d in shape[2:4])
+
+
+class EchoCalibrationReader:
+    """
+    calibration data for onnxruntime quantize_static, the same letterbox as the detectors
+    """
+
+    def __init__(self, input_name, images, input_shape):
+        self.input_name = input_name
+        self.preprocessor = LetterboxPreprocessor(*input_shape)
+        self.images = iter(images)
+
+    def get_next(self):
+        item = next(self.images, None)
+        if item is None:
+            return None
+        tensor, _ = self.preprocessor(item[1])
+        return {self.input_name: tensor.copy()}
+
+
+def quantize(fp32_path, int8_path, images):
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    input_name = ort.InferenceSession(fp32_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    reader = EchoCalibrationReader(input_name, images, input_size(fp32_path))
+    start = time.perf_counter()
+    quantize_static(fp32_path, int8_path, reader, quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    print(f"QUANTIZED: {int8_path} with {len(images)} calibration frames in {time.perf_counter() - start:.1f}s")
+
+
+def run(model_path, images, threshold, iterations):
+    import onnxruntime as ort
+    session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+    input_shape = input_size(model_path)
+    preprocessor = LetterboxPreprocessor(*input_shape)
+    results = []
+    elapsed = 0
+    for _, image in images:
+        tensor, pad = preprocessor(image)
+        session.run(None, {input_name: tensor})
+        start = time.perf_counter()
+        for _ in range(iterations):
+            output = session.run(None, {input_name: tensor})[0]
+        elapsed += time.perf_counter() - start
+        results.append(postprocess_arrays(output, pad, image.shape[:2], input_shape, threshold, 0.45))
+    return results, elapsed * 1000 / (iterations * len(images))
+
+
+def match(a, b, iou_threshold=0.5):
+    """
+    count boxes of a that have a box of b with iou >= iou_threshold
+    """
+    matched = 0
+    for x, y, w, h in a:
+        for bx, by, bw, bh in b:
+            inter = max(0, min(x + w, bx + bw) - max(x, bx)) * max(0, min(y + h, by + bh) - max(y, by))
+            if inter / max(w * h + bw * bh - inter, 1e-6) >= iou_threshold:
+                matched += 1
+                break
+    return matched
+
+
+def report(fp32_path, int8_path, images, threshold=0.5, iterations=5):
+    fp32, fp32_ms = run(fp32_path, images, threshold, iterations)
+    int8, int8_ms = run(int8_path, images, threshold, iterations)
+    total_fp32 = total_int8 = total_matched = total_int8_matched = 0
+    print(f"{'image':<24}{'fp32':>6}{'int8':>6}{'matched':>9}{'max score diff':>16}")
+    for (name, _), (fp32_boxes, fp32_scores, _), (int8_boxes, int8_scores, _) in zip(images, fp32, int8):
+        matched = match(fp32_boxes.tolist(), int8_boxes.tolist())
+        score_diff = abs(float(fp32_scores.max(initial=0)) - float(int8_scores.max(initial=0)))
+        print(f"{name:<24}{len(fp32_boxes):>6}{len(int8_boxes):>6}{matched:>9}{score_diff:>16.3f}")
+        total_fp32 += len(fp32_boxes)
+        total_int8 += len(int8_boxes)
+        total_matched += matched
+        total_int8_matched += match(int8_boxes.tolist(), fp32_boxes.tolist())
+    recall = total_matched / total_fp32 if total_fp32 else 1
+    precision = total_int8_matched / total_int8 if total_int8 else 1
+    print(f"agreement: recall {recall:.3f} precision {precision:.3f} ({total_matched}/{total_fp32} fp32 boxes)")
+    print(f"latency: fp32 {fp32_ms:.1f}ms int8 {int8_ms:.1f}ms per frame, "
+          f"{os.path.getsize(fp32_path) / 1e6:.1f}MB -> {os.path.getsize(int8_path) / 1e6:.1f}MB")
+
+
+def main(fp32_path='assets/echo_model/echo.onnx', int8_path='assets/echo_model/echo_int8.onnx'):
+    if not os.path.exists(fp32_path):
+        print(f"ERROR: model not found: {fp32_path}")
+        sys.exit(1)
+    images = load_images()
+    if not images:
+        print(f"ERROR: no calibration images in {IMAGES}")
+        sys.exit(2)
+    if not os.path.exists(int8_path):
+        quantize(fp32_path, int8_path, images)
+    report(fp32_path, int8_path, images)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
@@ -0,0 +1,47 @@
+import glob
+import os
+import sys
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.EchoTracker import EchoTracker
+from src.OnnxYolo8Detect import OnnxYolo8Detect
+
+
+def main(frames_dir: str, fps: float = 30, model_path='assets/echo_model/echo.onnx', threshold=0.5):
+    """
+    replay frames written by extract_frames.py (or any png sequence), compare the tracker
+    against running the detector on every frame
+    """
+    paths = sorted(glob.glob(os.path.join(frames_dir, '*.png')))
+    if not paths:
+        print(f"ERROR: no png frames in {frames_dir}")
+        sys.exit(1)
+    detector = OnnxYolo8Detect(weights=model_path)
+    clock = [0.0]
+    frame = [None]
+    tracker = EchoTracker(lambda: detector.detect(frame[0], threshold=threshold, label=0),
+                          time_function=lambda: clock[0])
+    errors = []
+    for i, path in enumerate(paths):
+        frame[0] = cv2.imread(path)
+        clock[0] = i / fps
+        tracked = tracker.update()
+        truth = detector.detect(frame[0], threshold=threshold, label=0)
+        if tracked and truth:
+            tx, ty = tracked[0].center()
+            dx, dy = truth[0].center()
+            errors.append(max(abs(tx - dx), abs(ty - dy)))
+    print(f"frames {tracker.frames} detections {tracker.detections} interval {tracker.interval} "
+          f"inference {tracker.inference_cost * 1000:.1f}ms")
+    if errors:
+        print(f"center error mean {sum(errors) / len(errors):.1f}px max {max(errors):.1f}px")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python replay_echo_tracker.py <frames_dir> [fps] [model_path]")
+        sys.exit(1)
+    main(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else 30, *sys.argv[3:4])
@@ -0,0 +1,96 @@
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from src.pyramid_match import PYRAMID_FEATURES, pyramid_match
+
+THRESHOLD = 0.6  # 比调用处的阈值都低, 需要找回的匹配更多
+
+
+def load_annotations(coco_json):
+    with open(coco_json, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    images = {image['id']: image['file_name'] for image in data['images']}
+    categories = {category['id']: category['name'] for category in data['categories']}
+    return {categories[a['category_id']]: (os.path.join(os.path.dirname(coco_json), images[a['image_id']]), a['bbox'])
+            for a in data['annotations']}
+
+
+def scaled_case(image, bbox, width, height):
+    """
+    和FeatureSet一样把模板缩放到目标分辨率, 截图用INTER_AREA缩放
+    Returns:
+        (frame, template, 标注位置)
+    """
+    scale = width / image.shape[1]
+    x, y, w, h = bbox
+    template = image[round(y):round(y + h), round(x):round(x + w), :3]
+    frame = image if scale == 1 else cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    if scale != 1:
+        template = cv2.resize(template, (max(1, round(template.shape[1] * scale)),
+                                         max(1, round(template.shape[0] * scale))))
+    return frame, template, (round(x * scale), round(y * scale))
+
+
+def full_matches(frame, template, threshold):
+    result = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+    ys, xs = np.where(result >= threshold)
+    order = np.argsort(-result[ys, xs])
+    height, width = template.shape[:2]
+    selected = []
+    for i in order:
+        x, y = int(xs[i]), int(ys[i])
+        if not any(x < sx + width and x + width > sx and y < sy + height and y + height > sy
+                   for sx, sy, _ in selected):
+            selected.append((x, y, float(result[y, x])))
+    return selected
+
+
+def validate(name, path, bbox, factor, width, height):
+    """
+    全图搜索, 金字塔匹配需要找到标注位置, 并且找回全图匹配的每一个结果
+    """
+    frame, template, (x, y) = scaled_case(cv2.imread(path), bbox, width, height)
+    start = time.perf_counter()
+    expected = full_matches(frame, template, THRESHOLD)
+    full_time = time.perf_counter() - start
+    start = time.perf_counter()
+    matches = pyramid_match(frame, template, THRESHOLD, factor)
+    pyramid_time = time.perf_counter() - start
+    errors = []
+    if matches is None:
+        # 模板太小时退回全图匹配
+        print(f"{name:<20}{width}x{height} fallback to full matching")
+        return True
+    if not any(abs(mx - x) <= 2 and abs(my - y) <= 2 for mx, my, _ in matches):
+        errors.append(f'annotated {x},{y} not found')
+    for ex, ey, confidence in expected:
+        if not any(abs(mx - ex) <= 1 and abs(my - ey) <= 1 and abs(c - confidence) < 0.01 for mx, my, c in matches):
+            errors.append(f'missed {ex},{ey} {confidence:.3f}')
+    print(f"{name:<20}{width}x{height} x{factor} full {full_time * 1000:6.1f}ms pyramid {pyramid_time * 1000:5.1f}ms "
+          f"{len(matches)}/{len(expected)} {'OK' if not errors else errors}")
+    return not errors
+
+
+def main(coco_json=config['template_matching']['coco_feature_json']):
+    annotations = load_annotations(coco_json)
+    resolutions = [(3840, 2160)] + list(config['supported_resolution']['resize_to'])
+    ok = True
+    for name, factor in PYRAMID_FEATURES.items():
+        path, bbox = annotations[name]
+        for width, height in resolutions:
+            ok = validate(name, path, bbox, factor, width, height) and ok
+    if not ok:
+        print('ERROR: pyramid matching differs from full matching')
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])